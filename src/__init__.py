@@ -1,4 +1,10 @@
 from .server import serve
+from .cache import MetadataCache
+from .clusters import ClusterRegistry, load_cluster_configs
+from .snapshot import MetadataSnapshot
+from .logging_setup import configure_logging
+from .codec import CodecRegistry
+from .dispatch import SessionLimits, ToolLimits, parse_tool_limit
 
 
 def main():
@@ -10,35 +16,95 @@ def main():
         description="Give a model the ability to interact with Apache Kafka"
     )
     # Kafka connection arguments
-    parser.add_argument("--kafka-bootstrap-servers", type=str, required=True, help="Comma-separated list of Kafka bootstrap servers (e.g., 'localhost:9092')")
+    parser.add_argument("--kafka-bootstrap-servers", type=str, help="Comma-separated list of Kafka bootstrap servers (e.g., 'localhost:9092'). Required unless --clusters-config is given")
     parser.add_argument("--kafka-security-protocol", type=str, default="PLAINTEXT", help="Security protocol for Kafka connection (e.g., PLAINTEXT, SSL, SASL_PLAINTEXT, SASL_SSL)")
     parser.add_argument("--kafka-sasl-mechanism", type=str, help="SASL mechanism for Kafka authentication (e.g., PLAIN, SCRAM-SHA-256, SCRAM-SHA-512)")
     parser.add_argument("--kafka-sasl-plain-username", type=str, help="Username for SASL/PLAIN authentication")
     parser.add_argument("--kafka-sasl-plain-password", type=str, help="Password for SASL/PLAIN authentication")
     # Add arguments for other SASL mechanisms or SSL configuration if needed (e.g., ssl_cafile, ssl_certfile, ssl_keyfile)
 
+    # Multi-cluster arguments
+    parser.add_argument("--clusters-config", type=str, help="JSON file of named clusters to serve from one process, used instead of --kafka-bootstrap-servers and the other connection options. Tools pick a cluster with their 'cluster' argument")
+    parser.add_argument("--cluster-idle-seconds", type=float, help="Close a cluster's clients after this many seconds without use; they reconnect on the next call. Defaults to 'idle_seconds' from the clusters config, otherwise clients stay open")
+
+    # Producer tuning arguments (applied to the shared producer only)
+    parser.add_argument("--kafka-linger-ms", type=int, help="Time in milliseconds the producer waits to fill a batch before sending it (producer linger.ms)")
+    parser.add_argument("--kafka-max-batch-size", type=int, help="Maximum size in bytes of a producer batch per partition (producer batch.size)")
+    parser.add_argument("--kafka-compression-type", type=str, choices=["gzip", "lz4", "zstd", "snappy"], help="Compression codec for produced batches. lz4, zstd and snappy need their compression libraries installed")
+    parser.add_argument("--kafka-acks", type=str, choices=["0", "1", "all"], help="Number of broker acknowledgments the producer waits for (producer acks)")
+    parser.add_argument("--kafka-enable-idempotence", action=argparse.BooleanOptionalAction, help="Idempotent producer, so retries cannot duplicate records. On by default unless --kafka-acks is 0 or 1; requires --kafka-acks all")
+    parser.add_argument("--kafka-transactional-id", type=str, help="Transactional id of the producer behind publish_transaction. Defaults to an id unique to this process; give every server instance its own id")
+
+    # Consumer tuning arguments (applied to pooled consumers only)
+    parser.add_argument("--kafka-fetch-max-bytes", type=int, help="Maximum bytes the broker returns for one fetch request across all partitions (consumer fetch.max.bytes)")
+    parser.add_argument("--kafka-max-partition-fetch-bytes", type=int, help="Maximum bytes the broker returns per partition in one fetch (consumer max.partition.fetch.bytes)")
+    parser.add_argument("--kafka-max-poll-records", type=int, help="Maximum records returned by a single poll (consumer max.poll.records)")
+    parser.add_argument("--kafka-fetch-max-wait-ms", type=int, help="Maximum time the broker waits to fill a fetch before answering (consumer fetch.max.wait.ms)")
+    parser.add_argument("--consumer-pool-size", type=int, default=8, help="Maximum number of warm assigned consumers kept for consume_messages")
+
+    # Metadata cache arguments
+    parser.add_argument("--metadata-cache-ttl", type=float, default=30.0, help="Seconds topic metadata is served from cache before it is refreshed. 0 disables the cache")
+    parser.add_argument("--metadata-cache-stale-ttl", type=float, default=300.0, help="Seconds past the TTL an entry may still be served while it is refreshed in the background")
+    parser.add_argument("--metadata-cache-size", type=int, default=1024, help="Maximum number of cached metadata entries (least recently used are evicted)")
+    parser.add_argument("--file-dir", type=str, help="Directory publish_large_message may read files from and consume_large_messages may write files to. Paths outside it are rejected; without it the tools only exchange payloads inline")
+    parser.add_argument("--metadata-snapshot", type=str, help="SQLite file the metadata cache is saved to and reloaded from at startup, so the first calls after a restart are served without waiting for the cluster")
+    parser.add_argument("--metadata-snapshot-max-age", type=float, default=7 * 86400, help="Seconds after which snapshot entries are no longer loaded")
+
+    # Output arguments
+    parser.add_argument("--output-format", type=str, default="compact", choices=["compact", "pretty"], help="JSON layout of tool results. Callers can override it per call")
+    parser.add_argument("--max-result-bytes", type=int, default=262144, help="Default size limit for tool results; larger results are paginated with a cursor, or cut if the tool writes or reads new data. 0 disables the limit")
+
+    # Payload codec arguments
+    parser.add_argument("--schema-dir", type=str, help="Directory of Avro schemas (<subject>.avsc) and compiled Protobuf descriptor sets (*.desc) for the avro and protobuf codecs")
+
+    # Tool admission control arguments
+    parser.add_argument("--tool-timeout", type=float, default=60.0, help="Default deadline in seconds for a tool call, including time queued. Calls past it are cancelled")
+    parser.add_argument("--tool-limit", action="append", default=[], metavar="NAME=CONCURRENCY[:QUEUE[:TIMEOUT]]", help="Override the limits of one tool, e.g. describe_topics=2:8:120. Calls beyond CONCURRENCY running and QUEUE waiting are rejected as busy (repeatable)")
+
+    # Transport arguments
+    parser.add_argument("--transport", type=str, default="stdio", choices=["stdio", "sse"], help="'stdio' serves the one client that started the process; 'sse' serves many clients over HTTP with Server-Sent Events, sharing the Kafka clients and caches. 'sse' needs the 'uvicorn' package")
+    parser.add_argument("--http-host", type=str, default="127.0.0.1", help="Address the sse transport binds to. Keep it local unless access to the port is restricted")
+    parser.add_argument("--http-port", type=int, default=8000, help="Port of the sse transport. Clients connect to http://HOST:PORT/sse")
+    parser.add_argument("--max-sessions", type=int, default=100, help="Maximum concurrent client sessions of the sse transport; further connections are refused with HTTP 503")
+    parser.add_argument("--session-rate-limit", type=float, help="Maximum tool calls per second of each client session, averaged over --session-burst calls. Unlimited by default")
+    parser.add_argument("--session-burst", type=int, help="Tool calls a session may make at once after being idle. Defaults to the rate limit, at least 1")
+    parser.add_argument("--session-max-concurrency", type=int, help="Maximum tool calls of each client session running or queued at once. Unlimited by default")
+
+    # Metrics endpoint arguments
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus text metrics over HTTP at /metrics on this port. Disabled by default; the get_server_metrics tool is always available")
+    parser.add_argument("--metrics-host", type=str, default="127.0.0.1", help="Address the metrics endpoint binds to. Keep it local unless the port is firewalled")
+
     # Logging configuration (optional, but good practice)
     parser.add_argument("--log-level", type=str, default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], help="Set the logging level")
+    parser.add_argument("--log-file", type=str, default="server.log", help="Log file path. An empty string disables file logging")
+    parser.add_argument("--log-max-bytes", type=int, default=10 * 1024 * 1024, help="Rotate the log file once it reaches this size")
+    parser.add_argument("--log-backup-count", type=int, default=5, help="Number of rotated log files to keep")
+    parser.add_argument("--log-rotate-when", type=str, help="Rotate the log file by time instead of size (e.g. 'midnight', 'H' or 'D')")
+    parser.add_argument("--log-hot-path-rate", type=float, default=10.0, help="Maximum per-call info messages per second for each message type; the rest are dropped and counted. 0 disables the limit")
 
     args = parser.parse_args()
 
-    # Configure logging
-    logging.basicConfig(
-        level=getattr(logging, args.log_level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('server.log'), # Keep logging to file
-            logging.StreamHandler()         # Keep logging to console
-        ]
+    # Configure logging. Records are queued and written to the rotating file
+    # and the console by a background thread, so log I/O never blocks the event loop.
+    log_listener = configure_logging(
+        level=args.log_level,
+        log_file=args.log_file or None,
+        max_bytes=args.log_max_bytes,
+        backup_count=args.log_backup_count,
+        rotate_when=args.log_rotate_when,
+        hot_path_rate=args.log_hot_path_rate,
     )
     logger = logging.getLogger("mcp-kafka")
     logger.info("Starting Kafka MCP Server...")
-    logger.debug(f"Parsed arguments: {args}")
+    logger.debug("Parsed arguments: %s", args)
 
 
+    if bool(args.kafka_bootstrap_servers) == bool(args.clusters_config):
+        parser.error("Exactly one of --kafka-bootstrap-servers and --clusters-config is required")
+
     # Prepare Kafka connection config dictionary
     kafka_config = {
-        "bootstrap_servers": args.kafka_bootstrap_servers.split(","),
+        "bootstrap_servers": args.kafka_bootstrap_servers.split(",") if args.kafka_bootstrap_servers else None,
         "security_protocol": args.kafka_security_protocol,
         "sasl_mechanism": args.kafka_sasl_mechanism,
         "sasl_plain_username": args.kafka_sasl_plain_username,
@@ -48,6 +114,49 @@ def main():
     # Filter out None values for cleaner config
     kafka_config = {k: v for k, v in kafka_config.items() if v is not None}
 
+    # Prepare producer-only config; these options are not valid for admin clients
+    producer_config = {
+        "linger_ms": args.kafka_linger_ms,
+        "max_batch_size": args.kafka_max_batch_size,
+        "compression_type": args.kafka_compression_type,
+        "acks": int(args.kafka_acks) if args.kafka_acks in ("0", "1") else args.kafka_acks,
+        "enable_idempotence": args.kafka_enable_idempotence,
+    }
+    producer_config = {k: v for k, v in producer_config.items() if v is not None}
+
+    if args.kafka_enable_idempotence and args.kafka_acks not in (None, "all"):
+        parser.error("--kafka-enable-idempotence requires --kafka-acks all")
+
+    # Prepare consumer-only config for the pooled consumers
+    consumer_config = {
+        "fetch_max_bytes": args.kafka_fetch_max_bytes,
+        "max_partition_fetch_bytes": args.kafka_max_partition_fetch_bytes,
+        "max_poll_records": args.kafka_max_poll_records,
+        "fetch_max_wait_ms": args.kafka_fetch_max_wait_ms,
+    }
+    consumer_config = {k: v for k, v in consumer_config.items() if v is not None}
+
+    # Per-tool admission limits
+    default_tool_limits = ToolLimits(timeout_seconds=args.tool_timeout)
+    tool_limits = {}
+    for spec in args.tool_limit:
+        try:
+            tool_name, limits = parse_tool_limit(spec, default_tool_limits)
+        except ValueError as e:
+            parser.error(str(e))
+        tool_limits[tool_name] = limits
+
+    # Per-session call limits
+    session_limits = SessionLimits(
+        rate_per_second=args.session_rate_limit,
+        burst=args.session_burst,
+        max_concurrency=args.session_max_concurrency,
+    )
+    if args.transport == "sse":
+        import importlib.util
+        if importlib.util.find_spec("uvicorn") is None:
+            parser.error("--transport sse requires the 'uvicorn' package (pip install mcp-server-kafka[http])")
+
     # Validate SASL configuration
     if args.kafka_sasl_mechanism:
         if args.kafka_sasl_mechanism == "PLAIN":
@@ -60,12 +169,67 @@ def main():
          parser.error("--kafka-sasl-mechanism must be provided when --kafka-security-protocol starts with SASL_")
 
 
+    # Every cluster gets its own clients and metadata cache
+    def metadata_cache():
+        return MetadataCache(
+            ttl_seconds=args.metadata_cache_ttl,
+            max_entries=args.metadata_cache_size,
+            stale_seconds=args.metadata_cache_stale_ttl,
+        )
+
+    snapshot = MetadataSnapshot(args.metadata_snapshot, args.metadata_snapshot_max_age) if args.metadata_snapshot else None
+
+    if args.clusters_config:
+        try:
+            cluster_settings = load_cluster_configs(
+                args.clusters_config,
+                producer_config=producer_config,
+                consumer_config=consumer_config,
+                consumer_pool_size=args.consumer_pool_size,
+                transactional_id=args.kafka_transactional_id,
+            )
+        except (OSError, ValueError) as e:
+            parser.error(f"Invalid --clusters-config: {e}")
+        if args.cluster_idle_seconds is not None:
+            cluster_settings["idle_seconds"] = args.cluster_idle_seconds
+        clusters = ClusterRegistry(**cluster_settings, cache_factory=metadata_cache, snapshot=snapshot)
+        logger.info("Serving clusters %s (default '%s').", clusters.names, clusters.default)
+    else:
+        clusters = ClusterRegistry.single(
+            kafka_config,
+            metadata_cache=metadata_cache(),
+            idle_seconds=args.cluster_idle_seconds,
+            snapshot=snapshot,
+            producer_config=producer_config,
+            consumer_config=consumer_config,
+            consumer_pool_size=args.consumer_pool_size,
+            transactional_id=args.kafka_transactional_id,
+        )
+
     try:
-        asyncio.run(serve(kafka_config=kafka_config))
+        asyncio.run(serve(
+            clusters=clusters,
+            output_pretty=args.output_format == "pretty",
+            max_result_bytes=args.max_result_bytes,
+            metrics_host=args.metrics_host,
+            metrics_port=args.metrics_port,
+            codecs=CodecRegistry(args.schema_dir),
+            file_dir=args.file_dir,
+            default_tool_limits=default_tool_limits,
+            tool_limits=tool_limits,
+            transport=args.transport,
+            http_host=args.http_host,
+            http_port=args.http_port,
+            max_sessions=args.max_sessions,
+            session_limits=session_limits,
+        ))
     except KeyboardInterrupt:
         logger.info("Server stopped by user.")
     except Exception as e:
-        logger.critical(f"Server encountered a critical error: {e}", exc_info=True)
+        logger.critical("Server encountered a critical error: %s", e, exc_info=True)
+    finally:
+        # Flushes queued records before the process exits
+        log_listener.stop()
 
 
 if __name__ == "__main__":
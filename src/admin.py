@@ -1,161 +1,296 @@
+import asyncio
+import fnmatch
 import logging
-from typing import Optional, List, Dict, Any
-from kafka.admin import AIOKafkaAdminClient, NewTopic, TopicPartition
-from kafka.errors import UnknownTopicOrPartitionError, TopicAlreadyExistsError
+import re
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Callable, Awaitable, Tuple
+from .cache import MetadataCache
+from .groups import fetch_committed, find_coordinators, list_groups
+from .logging_setup import HOT_PATH
+
+# aiokafka is the slowest import of the server and list_tools never needs it,
+# so the functions below import what they use on first call.
+if TYPE_CHECKING:
+    from aiokafka import AIOKafkaConsumer
+    from aiokafka.admin import AIOKafkaAdminClient
 
 logger = logging.getLogger(__name__)
 
-class RabbitMQAdmin:
-    def __init__(self, host: str, port: int, username: str, password: str, use_tls: bool):
-        self.protocol = "https" if use_tls else "http"
-        self.base_url = f"{self.protocol}://{host}:{port}/api"
-        self.auth = base64.b64encode(f"{username}:{password}".encode()).decode()
-        self.headers = {
-            "Authorization": f"Basic {self.auth}",
-            "Content-Type": "application/json"
-        }
-
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> requests.Response:
-        url = f"{self.base_url}/{endpoint}"
-        response = requests.request(method, url, headers=self.headers, json=data, verify=True)
-        response.raise_for_status()
-        return response
-
-    def list_queues(self) -> List[Dict]:
-        """List all queues in the RabbitMQ server"""
-        response = self._make_request("GET", "queues")
-        return response.json()
-
-    def list_exchanges(self) -> List[Dict]:
-        """List all exchanges in the RabbitMQ server"""
-        response = self._make_request("GET", "exchanges")
-        return response.json()
-
-    def get_queue_info(self, queue: str, vhost: str = "/") -> Dict:
-        """Get detailed information about a specific queue"""
-        vhost_encoded = requests.utils.quote(vhost, safe='')
-        response = self._make_request("GET", f"queues/{vhost_encoded}/{queue}")
-        return response.json()
-
-    def delete_queue(self, queue: str, vhost: str = "/") -> None:
-        """Delete a queue"""
-        validate_rabbitmq_name(queue, "Queue name")
-        vhost_encoded = requests.utils.quote(vhost, safe='')
-        self._make_request("DELETE", f"queues/{vhost_encoded}/{queue}")
-
-    def purge_queue(self, queue: str, vhost: str = "/") -> None:
-        """Remove all messages from a queue"""
-        validate_rabbitmq_name(queue, "Queue name")
-        vhost_encoded = requests.utils.quote(vhost, safe='')
-        self._make_request("DELETE", f"queues/{vhost_encoded}/{queue}/contents")
-
-    def get_exchange_info(self, exchange: str, vhost: str = "/") -> Dict:
-        """Get detailed information about a specific exchange"""
-        vhost_encoded = requests.utils.quote(vhost, safe='')
-        response = self._make_request("GET", f"exchanges/{vhost_encoded}/{exchange}")
-        return response.json()
-
-    def delete_exchange(self, exchange: str, vhost: str = "/") -> None:
-        """Delete an exchange"""
-        validate_rabbitmq_name(exchange, "Exchange name")
-        vhost_encoded = requests.utils.quote(vhost, safe='')
-        self._make_request("DELETE", f"exchanges/{vhost_encoded}/{exchange}")
-
-    def get_bindings(self, queue: Optional[str] = None, exchange: Optional[str] = None, vhost: str = "/") -> List[Dict]:
-        """Get bindings, optionally filtered by queue or exchange"""
-        vhost_encoded = requests.utils.quote(vhost, safe='')
-        if queue:
-            validate_rabbitmq_name(queue, "Queue name")
-            response = self._make_request("GET", f"queues/{vhost_encoded}/{queue}/bindings")
-        elif exchange:
-            validate_rabbitmq_name(exchange, "Exchange name")
-            response = self._make_request("GET", f"exchanges/{vhost_encoded}/{exchange}/bindings/source")
-        else:
-            response = self._make_request("GET", f"bindings/{vhost_encoded}")
-        return response.json()
+def format_topic_info(topic_metadata: Dict[str, Any], topic_config: Optional[Dict[str, str]]) -> Dict[str, Any]:
+    """Builds the get_topic_info result from a describe_topics entry and its configs."""
+    return {
+        "topic_name": topic_metadata['topic'],
+        "is_internal": topic_metadata['is_internal'],
+        "partitions": [
+            {
+                "partition_id": p_meta['partition'],
+                "leader": p_meta['leader'],
+                "replicas": p_meta['replicas'],
+                "isr": p_meta['isr'],
+                # Add partition offset info if needed (requires consumer API)
+            }
+            for p_meta in topic_metadata['partitions']
+        ],
+        "configuration": topic_config,
+        # "consumer_groups": topic_groups # Add if implemented
+    }
+
+def parse_topic_configs(responses: List[Any]) -> Dict[str, Dict[str, str]]:
+    """Flattens DescribeConfigs responses into {topic: {config_name: value}}."""
+    from aiokafka.errors import for_code
+    configs: Dict[str, Dict[str, str]] = {}
+    for response in responses:
+        for error_code, error_message, resource_type, resource_name, config_entries, *_ in response.resources:
+            if error_code:
+                logger.warning("Could not describe configs for '%s': %s %s", resource_name, for_code(error_code).__name__, error_message or '')
+                continue
+            configs[resource_name] = {entry[0]: entry[1] for entry in config_entries}
+    return configs
 
-    def get_overview(self) -> Dict:
-        """Get overview of RabbitMQ server including version, stats, and listeners"""
-        response = self._make_request("GET", "overview")
-        return response.json()
+def match_topics(topic_names: List[str], pattern: str, pattern_type: str = "glob") -> List[str]:
+    """Returns the topic names matching a glob or regular expression, sorted."""
+    if pattern_type == "regex":
+        compiled = re.compile(pattern)
+    else:
+        compiled = re.compile(fnmatch.translate(pattern))
+    return sorted(name for name in topic_names if compiled.fullmatch(name))
 
-async def handle_get_topic_info(admin_client: AIOKafkaAdminClient, topic: str) -> Dict[str, Any]:
+async def handle_get_topic_info(admin_client: "AIOKafkaAdminClient", topic: str) -> Dict[str, Any]:
     """Gets detailed information about a specific Kafka topic."""
-    logger.info(f"Fetching information for topic '{topic}'...")
+    from aiokafka.admin.config_resource import ConfigResource, ConfigResourceType
+    from aiokafka.errors import UnknownTopicOrPartitionError
+    logger.info("Fetching information for topic '%s'...", topic, extra=HOT_PATH)
     try:
+        # Metadata and configs are independent requests, so issue them together.
         # describe_topics returns a list, even for a single topic
-        topic_metadata_list = await admin_client.describe_topics([topic])
-        if not topic_metadata_list:
+        topic_metadata_list, config_desc = await asyncio.gather(
+            admin_client.describe_topics([topic]),
+            admin_client.describe_configs([ConfigResource(ConfigResourceType.TOPIC, topic)]),
+        )
+        if not topic_metadata_list or topic_metadata_list[0].get('error_code'):
             raise UnknownTopicOrPartitionError(f"Topic '{topic}' not found.")
 
         # Extract the metadata for the requested topic
         topic_metadata = topic_metadata_list[0]
+        topic_config = parse_topic_configs(config_desc).get(topic, {})
 
-        # Describe configs for the topic
-        config_desc = await admin_client.describe_configs(resource_configs=[('topic', topic)])
-        topic_config = config_desc[0]['configs'] if config_desc else {}
-
-        # Get consumer group information related to the topic (optional, can be complex)
-        # groups = await admin_client.list_consumer_groups()
-        # topic_groups = []
-        # for group_id, _ in groups:
-        #     try:
-        #         group_desc = await admin_client.describe_consumer_groups([group_id])
-        #         if group_desc and group_desc[0]['state'] != 'Dead':
-        #             # Check if group consumes the topic (requires offset fetching)
-        #             # This part can be involved and might require listing/fetching offsets
-        #             pass # Simplified for now
-        #     except Exception as group_err:
-        #         logger.warning(f"Could not describe group '{group_id}': {group_err}")
-
-        result = {
-            "topic_name": topic_metadata['topic'],
-            "is_internal": topic_metadata['is_internal'],
-            "partitions": [
-                {
-                    "partition_id": p_meta['partition'],
-                    "leader": p_meta['leader'],
-                    "replicas": p_meta['replicas'],
-                    "isr": p_meta['isr'],
-                    # Add partition offset info if needed (requires consumer API)
-                }
-                for p_meta in topic_metadata['partitions']
-            ],
-            "configuration": topic_config,
-            # "consumer_groups": topic_groups # Add if implemented
-        }
-        logger.info(f"Successfully fetched information for topic '{topic}'.")
+        # Consumer groups of the topic are reported by get_topic_offsets and
+        # describe_consumer_groups (groups.py), which batch the group requests
+
+        result = format_topic_info(topic_metadata, topic_config)
+        logger.info("Successfully fetched information for topic '%s'.", topic, extra=HOT_PATH)
         return result
     except UnknownTopicOrPartitionError as e:
-         logger.warning(f"Topic '{topic}' not found.")
+         logger.warning("Topic '%s' not found.", topic)
          raise e # Re-raise to be handled by the server
     except Exception as e:
-        logger.error(f"Failed to get information for topic '{topic}': {e}", exc_info=True)
+        logger.error("Failed to get information for topic '%s': %s", topic, e, exc_info=True)
+        raise
+
+async def handle_describe_topics(
+    admin_client: "AIOKafkaAdminClient",
+    topics: List[str],
+    include_configs: bool = True,
+    batch_size: int = 50,
+    max_concurrency: int = 4,
+    on_batch: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """Describes many topics with batched, concurrent admin requests.
+
+    Topics are split into batches of batch_size. Each batch costs one Metadata
+    request and, if include_configs is set, one DescribeConfigs request sent
+    concurrently with it. At most max_concurrency batches are in flight at a
+    time. on_batch is awaited with each batch's results as soon as it completes
+    so callers can stream partial results.
+    """
+    from aiokafka.admin.config_resource import ConfigResource, ConfigResourceType
+    from aiokafka.errors import UnknownTopicOrPartitionError, for_code
+    logger.info("Describing %s topics in batches of %s (concurrency %s)...", len(topics), batch_size, max_concurrency, extra=HOT_PATH)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def describe_batch(batch: List[str]) -> List[Dict[str, Any]]:
+        async with semaphore:
+            requests = [admin_client.describe_topics(batch)]
+            if include_configs:
+                requests.append(admin_client.describe_configs(
+                    [ConfigResource(ConfigResourceType.TOPIC, name) for name in batch]
+                ))
+            try:
+                responses = await asyncio.gather(*requests)
+            except Exception as e:
+                logger.error("Failed to describe batch of %s topics: %s", len(batch), e, exc_info=True)
+                results = [{"topic_name": name, "error": f"{type(e).__name__}: {e}"} for name in batch]
+            else:
+                configs = parse_topic_configs(responses[1]) if include_configs else {}
+                metadata_by_name = {meta['topic']: meta for meta in responses[0]}
+                results = []
+                for name in batch:
+                    meta = metadata_by_name.get(name)
+                    if meta is None or meta.get('error_code'):
+                        error = for_code(meta['error_code']).__name__ if meta else UnknownTopicOrPartitionError.__name__
+                        results.append({"topic_name": name, "error": error})
+                    else:
+                        results.append(format_topic_info(meta, configs.get(name) if include_configs else None))
+        if on_batch is not None:
+            await on_batch(results)
+        return results
+
+    batches = [topics[i:i + batch_size] for i in range(0, len(topics), batch_size)]
+    described = [info for batch_results in await asyncio.gather(*(describe_batch(b) for b in batches)) for info in batch_results]
+    errors = [info for info in described if "error" in info]
+    logger.info("Described %s topics (%s errors).", len(described) - len(errors), len(errors), extra=HOT_PATH)
+    return {
+        "count": len(described) - len(errors),
+        "topics": [info for info in described if "error" not in info],
+        "errors": errors,
+    }
+
+async def get_topic_partitions(admin_client: "AIOKafkaAdminClient", topic: str) -> List[int]:
+    """Returns the partition ids of a topic from a single metadata request."""
+    return (await get_topics_partitions(admin_client, [topic]))[topic]
+
+async def get_topics_partitions(admin_client: "AIOKafkaAdminClient", topics: List[str]) -> Dict[str, List[int]]:
+    """Returns the partition ids of several topics from a single metadata request."""
+    from aiokafka.errors import UnknownTopicOrPartitionError
+    topic_metadata_list = await admin_client.describe_topics(topics)
+    partitions = {
+        meta['topic']: sorted(p_meta['partition'] for p_meta in meta['partitions'])
+        for meta in topic_metadata_list
+        if not meta.get('error_code') and meta['partitions']
+    }
+    missing = [topic for topic in topics if topic not in partitions]
+    if missing:
+        raise UnknownTopicOrPartitionError(f"Topic(s) not found: {', '.join(missing)}")
+    return partitions
+
+async def handle_get_topic_offsets(
+    admin_client: "AIOKafkaAdminClient",
+    consumer: "AIOKafkaConsumer",
+    topic_partitions: Dict[str, List[int]],
+    group_ids: Optional[List[str]] = None,
+    include_lag: bool = True,
+    max_concurrency: int = 16,
+) -> Dict[str, Any]:
+    """Returns beginning/end offsets, message counts and consumer group lag for topics.
+
+    Beginning and end offsets for every partition are fetched with two
+    concurrent lookups; the consumer groups them into one ListOffsets request
+    per partition leader. If group_ids is None, every group with committed
+    offsets on these topics is reported; the groups are listed by all brokers
+    at once, each broker naming the groups it coordinates. Given groups get
+    their coordinators looked up concurrently. Committed offsets are then
+    fetched from the coordinators concurrently (bounded by max_concurrency).
+    """
+    from aiokafka.structs import TopicPartition
+    tps = [TopicPartition(topic, p) for topic, partitions in topic_partitions.items() for p in partitions]
+    logger.info("Fetching offsets for %s partitions across %s topics...", len(tps), len(topic_partitions), extra=HOT_PATH)
+    try:
+        beginning_offsets, end_offsets = await asyncio.gather(
+            consumer.beginning_offsets(tps),
+            consumer.end_offsets(tps),
+        )
+        topics_result: Dict[str, Any] = {}
+        for topic, partitions in topic_partitions.items():
+            partition_offsets = []
+            for p in partitions:
+                tp = TopicPartition(topic, p)
+                partition_offsets.append({
+                    "partition": p,
+                    "beginning_offset": beginning_offsets[tp],
+                    "end_offset": end_offsets[tp],
+                    # Approximate: compaction and transaction markers leave gaps
+                    "messages": end_offsets[tp] - beginning_offsets[tp],
+                })
+            topics_result[topic] = {
+                "total_messages": sum(p["messages"] for p in partition_offsets),
+                "partitions": partition_offsets,
+            }
+        result: Dict[str, Any] = {"topics": topics_result}
+        if not include_lag:
+            return result
+
+        if group_ids is None:
+            # Listed by their coordinators, so no lookups are needed
+            coordinators = {group_id: node for group_id, _, node in await list_groups(admin_client)}
+            group_ids, lookup_errors = list(coordinators), {}
+        else:
+            by_node, lookup_errors = await find_coordinators(admin_client, group_ids, max_concurrency)
+            coordinators = {group_id: node for node, node_groups in by_node.items() for group_id in node_groups}
+        committed = await fetch_committed(admin_client, coordinators, max_concurrency)
+        wanted = set(tps)
+        groups_result = []
+        errors = []
+        for group_id in group_ids:
+            if group_id in lookup_errors:
+                errors.append({"group_id": group_id, "error": lookup_errors[group_id]})
+                continue
+            offsets = committed[group_id]
+            if isinstance(offsets, Exception):
+                errors.append({"group_id": group_id, "error": f"{type(offsets).__name__}: {offsets}"})
+                continue
+            group_topics: Dict[str, Any] = {}
+            for tp, meta in sorted(offsets.items()):
+                if tp not in wanted or meta.offset < 0:
+                    continue
+                lag = max(end_offsets[tp] - meta.offset, 0)
+                entry = group_topics.setdefault(tp.topic, {"lag": 0, "partitions": []})
+                entry["lag"] += lag
+                entry["partitions"].append({"partition": tp.partition, "committed_offset": meta.offset, "lag": lag})
+            if group_topics:
+                groups_result.append({
+                    "group_id": group_id,
+                    "total_lag": sum(t["lag"] for t in group_topics.values()),
+                    "topics": group_topics,
+                })
+        # Most lagging groups first
+        groups_result.sort(key=lambda g: g["total_lag"], reverse=True)
+        result["consumer_groups"] = groups_result
+        if errors:
+            result["errors"] = errors
+        logger.info("Fetched offsets and lag for %s consumer groups.", len(groups_result), extra=HOT_PATH)
+        return result
+    except Exception as e:
+        logger.error("Failed to fetch offsets for topics %s: %s", list(topic_partitions), e, exc_info=True)
         raise
 
-async def handle_delete_topic(admin_client: AIOKafkaAdminClient, topic: str) -> None:
-    """Deletes a Kafka topic."""
-    logger.info(f"Attempting to delete topic '{topic}'...")
+async def handle_delete_topic(admin_client: "AIOKafkaAdminClient", topic: str, cache: Optional[MetadataCache] = None) -> None:
+    """Deletes a Kafka topic and drops it from the metadata cache."""
+    from aiokafka.errors import UnknownTopicOrPartitionError
+    logger.info("Attempting to delete topic '%s'...", topic)
     try:
         await admin_client.delete_topics(topics=[topic], timeout_ms=30000) # 30 second timeout
-        logger.info(f"Successfully submitted deletion request for topic '{topic}'. Note: Deletion might take time on the broker.")
+        logger.info("Successfully submitted deletion request for topic '%s'. Note: Deletion might take time on the broker.", topic)
     except UnknownTopicOrPartitionError:
-         logger.warning(f"Cannot delete topic '{topic}': Topic not found.")
+         logger.warning("Cannot delete topic '%s': Topic not found.", topic)
          raise # Re-raise to inform the user
     except Exception as e:
         # Add more specific error handling if needed (e.g., PolicyViolationError)
-        logger.error(f"Failed to delete topic '{topic}': {e}", exc_info=True)
+        logger.error("Failed to delete topic '%s': %s", topic, e, exc_info=True)
         raise
+    finally:
+        # Invalidate even on failure; a timed-out request may still have deleted the topic
+        if cache is not None:
+            cache.invalidate_topic(topic)
+
+def topic_error_codes(response: Any) -> Dict[str, Tuple[int, Optional[str]]]:
+    """Maps each topic of a CreateTopics response to (error_code, error_message)."""
+    errors = {}
+    for entry in response.topic_errors:
+        # v0 responses carry no error message
+        errors[entry[0]] = (entry[1], entry[2] if len(entry) > 2 else None)
+    return errors
 
 async def handle_create_topic(
-    admin_client: AIOKafkaAdminClient,
+    admin_client: "AIOKafkaAdminClient",
     topic: str,
     num_partitions: int = 1,
     replication_factor: int = 1,
-    config: Optional[Dict[str, str]] = None
+    config: Optional[Dict[str, str]] = None,
+    cache: Optional[MetadataCache] = None
 ) -> None:
-    """Creates a new Kafka topic."""
-    logger.info(f"Attempting to create topic '{topic}' with {num_partitions} partitions and replication factor {replication_factor}...")
+    """Creates a new Kafka topic and drops stale entries from the metadata cache."""
+    from aiokafka.admin import NewTopic
+    from aiokafka.errors import TopicAlreadyExistsError, for_code
+    logger.info("Attempting to create topic '%s' with %s partitions and replication factor %s...", topic, num_partitions, replication_factor)
     new_topic = NewTopic(
         name=topic,
         num_partitions=num_partitions,
@@ -163,15 +298,175 @@ async def handle_create_topic(
         topic_configs=config or {}
     )
     try:
-        await admin_client.create_topics(new_topics=[new_topic], validate_only=False)
-        logger.info(f"Successfully created topic '{topic}'.")
+        response = await admin_client.create_topics(new_topics=[new_topic], validate_only=False)
+        # Errors come back per topic in the response rather than as exceptions
+        error_code, error_message = topic_error_codes(response).get(topic, (0, None))
+        if error_code:
+            raise for_code(error_code)(error_message or f"Topic '{topic}'")
+        logger.info("Successfully created topic '%s'.", topic)
     except TopicAlreadyExistsError:
-        logger.warning(f"Topic '{topic}' already exists.")
+        logger.warning("Topic '%s' already exists.", topic)
         # Decide if this should be an error or just a warning
         # raise # Uncomment to make it an error
     except Exception as e:
         # Add more specific error handling (e.g., PolicyViolationError, InvalidReplicationFactorError)
-        logger.error(f"Failed to create topic '{topic}': {e}", exc_info=True)
+        logger.error("Failed to create topic '%s': %s", topic, e, exc_info=True)
         raise
+    finally:
+        # Invalidate even on failure; a timed-out request may still have created the topic
+        if cache is not None:
+            cache.invalidate_topic(topic)
+
+def topic_config_overrides(responses: List[Any]) -> Dict[str, Dict[str, Optional[str]]]:
+    """Extracts the configs explicitly set on each topic from DescribeConfigs responses.
+
+    Sensitive overrides, whose values the broker does not return, map to None.
+    """
+    from aiokafka.errors import for_code
+    overrides: Dict[str, Dict[str, str]] = {}
+    for response in responses:
+        version = getattr(response, "API_VERSION", 0)
+        for error_code, error_message, resource_type, resource_name, config_entries, *_ in response.resources:
+            if error_code:
+                raise for_code(error_code)(error_message or f"Could not describe configs for '{resource_name}'")
+            topic_overrides = {}
+            for entry in config_entries:
+                # v0 flags defaults with is_default; v1+ reports the source, 1 = dynamic topic config
+                explicit = entry[3] == 1 if version >= 1 else not entry[3]
+                if explicit:
+                    topic_overrides[entry[0]] = entry[1]
+            overrides[resource_name] = topic_overrides
+    return overrides
+
+async def handle_create_topics(
+    admin_client: "AIOKafkaAdminClient",
+    specs: List[Any],
+    validate_only: bool = False,
+    if_exists: str = "error",
+    timeout_ms: int = 30000,
+    cache: Optional[MetadataCache] = None,
+) -> Dict[str, Any]:
+    """Creates many topics with one CreateTopics request and reports per-topic results.
+
+    Topics that already exist are reported as errors, skipped, or, with
+    if_exists="update_configs", get their requested configs applied with one
+    AlterConfigs request. AlterConfigs replaces a topic's whole config set, so
+    the current overrides are described first (one request) and merged with
+    the changes; a None value removes an override. This is not atomic: an
+    override changed by another client in between is reverted. Topics with
+    sensitive overrides, which cannot be read back, are refused rather than
+    stripped of them. With validate_only the
+    broker checks the creates without applying them, and config updates are
+    only reported as a diff.
+    """
+    from aiokafka.admin import NewTopic
+    from aiokafka.errors import TopicAlreadyExistsError, for_code
+    names = [spec.topic for spec in specs]
+    logger.info("%s %s topics...", "Validating" if validate_only else "Creating", len(names))
+    new_topics = [
+        NewTopic(
+            name=spec.topic,
+            num_partitions=spec.num_partitions,
+            replication_factor=spec.replication_factor,
+            # Unset values are left to the broker default
+            topic_configs={k: v for k, v in (spec.config or {}).items() if v is not None},
+        )
+        for spec in specs
+    ]
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        response = await admin_client.create_topics(new_topics=new_topics, timeout_ms=timeout_ms, validate_only=validate_only)
+        errors = topic_error_codes(response)
+        existing = []
+        for spec in specs:
+            error_code, error_message = errors.get(spec.topic, (0, None))
+            if not error_code:
+                results[spec.topic] = {"topic": spec.topic, "status": "validated" if validate_only else "created"}
+            elif error_code == TopicAlreadyExistsError.errno and if_exists != "error":
+                results[spec.topic] = {"topic": spec.topic, "status": "exists"}
+                if if_exists == "update_configs" and spec.config:
+                    existing.append(spec)
+            else:
+                results[spec.topic] = {
+                    "topic": spec.topic,
+                    "status": "error",
+                    "error": f"{for_code(error_code).__name__}: {error_message or ''}".rstrip(": "),
+                }
+
+        if existing:
+            await _update_topic_configs(admin_client, existing, results, validate_only)
+    finally:
+        # Invalidate even on failure; a timed-out request may still have created topics
+        if cache is not None and not validate_only:
+            for name in names:
+                cache.invalidate_topic(name)
+
+    ordered = [results[name] for name in dict.fromkeys(names)]
+    failed = sum(1 for r in ordered if r["status"] == "error")
+    logger.info("Processed %s topics (%s errors).", len(ordered), failed)
+    return {"count": len(ordered), "failed": failed, "validate_only": validate_only, "topics": ordered}
+
+async def _update_topic_configs(
+    admin_client: "AIOKafkaAdminClient",
+    specs: List[Any],
+    results: Dict[str, Dict[str, Any]],
+    validate_only: bool,
+) -> None:
+    """Applies requested configs to existing topics with one describe and one alter request."""
+    from aiokafka.admin.config_resource import ConfigResource, ConfigResourceType
+    from aiokafka.errors import for_code
+    try:
+        current = topic_config_overrides(await admin_client.describe_configs(
+            config_resources=[ConfigResource(ConfigResourceType.TOPIC, spec.topic) for spec in specs],
+        ))
+    except Exception as e:
+        for spec in specs:
+            results[spec.topic].update(status="error", error=f"{type(e).__name__}: {e}")
+        return
+
+    resources = []
+    for spec in specs:
+        before = current.get(spec.topic, {})
+        hidden = sorted(name for name, value in before.items() if value is None)
+        if hidden:
+            # Replacing the config set would drop overrides whose values cannot be read back
+            results[spec.topic].update(
+                status="error",
+                error=f"Topic has sensitive config overrides ({', '.join(hidden)}) whose values cannot be read back; replacing its configs would remove them.",
+            )
+            continue
+        after = dict(before)
+        for name, value in spec.config.items():
+            if value is None:
+                after.pop(name, None)
+            else:
+                after[name] = value
+        changes = {name: after.get(name) for name in set(before) | set(after) if before.get(name) != after.get(name)}
+        if not changes:
+            results[spec.topic]["status"] = "unchanged"
+            continue
+        results[spec.topic]["config_changes"] = changes
+        if validate_only:
+            results[spec.topic]["status"] = "would_update_configs"
+        else:
+            resources.append(ConfigResource(ConfigResourceType.TOPIC, spec.topic, configs=after))
+
+    if not resources:
+        return
+    try:
+        responses = await admin_client.alter_configs(resources)
+    except Exception as e:
+        for resource in resources:
+            results[resource.name].update(status="error", error=f"{type(e).__name__}: {e}")
+        return
+    for response in responses:
+        for error_code, error_message, resource_type, resource_name, *_ in response.resources:
+            if error_code:
+                results[resource_name].update(
+                    status="error",
+                    error=f"{for_code(error_code).__name__}: {error_message or ''}".rstrip(": "),
+                )
+            else:
+                results[resource_name]["status"] = "configs_updated"
 
 # Add other admin functions as needed (e.g., handle_alter_topic_config)
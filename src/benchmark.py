@@ -0,0 +1,319 @@
+"""End-to-end benchmark of the MCP server against the in-process fake cluster.
+
+Every scenario drives serve()'s call_tool through a real MCP client session
+over in-memory streams, so the numbers include MCP framing, argument
+validation, client acquisition, the handler and result serialization. Only
+the broker is simulated (see fake_kafka.py).
+
+Run with: python -m mcp_server_kafka.benchmark [--iterations N] [--latency-ms MS] [--json]
+
+With --startup N it instead spawns the real server N times over stdio and
+reports cold start: package import time and the time from spawn to the
+initialize and first list_tools responses. With --warm-restart it times the
+first list_topics and get_topic_info calls of a fresh server, once without
+and once with the metadata snapshot written by a previous server.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import anyio
+from aiokafka.structs import TopicPartition
+from mcp.client.session import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+from mcp.shared.memory import create_client_server_memory_streams
+
+from .cache import MetadataCache
+from .clusters import ClusterRegistry
+from .connection import KafkaClientManager
+from .fake_kafka import FakeKafkaCluster
+from .server import serve
+from .snapshot import MetadataSnapshot
+
+BENCH_TOPIC = "bench.events"
+# Pre-filled source of the copy_messages scenario, copied in full by every call
+REPLAY_TOPIC = "bench.replay"
+
+# name -> (tool, arguments for call i, messages moved per call)
+Scenario = Tuple[str, Callable[[int], Dict[str, Any]], int]
+
+
+def build_scenarios(args: argparse.Namespace) -> Dict[str, Scenario]:
+    payload = "x" * args.message_bytes
+    records = [{"value": payload, "key": f"key-{i}"} for i in range(args.batch_size)]
+    groups = [f"bench.group.{i:05d}" for i in range(args.groups)]
+    return {
+        "publish_message": ("publish_message", lambda i: {"topic": BENCH_TOPIC, "message": payload, "key": f"key-{i}"}, 1),
+        "publish_messages": ("publish_messages", lambda i: {"topic": BENCH_TOPIC, "records": records}, args.batch_size),
+        "consume_messages": ("consume_messages", lambda i: {"topic": BENCH_TOPIC, "from_end": args.batch_size, "max_messages": args.batch_size}, args.batch_size),
+        "copy_messages": ("copy_messages", lambda i: {"source_topic": REPLAY_TOPIC, "target_topic": f"{REPLAY_TOPIC}.copy"}, args.batch_size * 10),
+        "search_messages": ("search_messages", lambda i: {"topic": BENCH_TOPIC, "key": f"key-{i % args.batch_size}", "max_matches": 10}, 0),
+        "list_topics": ("list_topics", lambda i: {"prefix": "bench.topic.", "limit": 100}, 0),
+        "list_topics_uncached": ("list_topics", lambda i: {"prefix": "bench.topic.", "limit": 100, "bypass_cache": True}, 0),
+        "get_topic_info": ("get_topic_info", lambda i: {"topic": f"bench.topic.{i % args.topics:05d}"}, 0),
+        "describe_topics": ("describe_topics", lambda i: {"pattern": "bench.topic.*", "bypass_cache": True, "fields": ["count"]}, 0),
+        "describe_consumer_groups": ("describe_consumer_groups", lambda i: {"group_ids": groups, "fields": ["count"]}, 0),
+        "reset_consumer_group_offsets": ("reset_consumer_group_offsets", lambda i: {"group_ids": groups, "topics": [BENCH_TOPIC], "to": "earliest", "fields": ["count"]}, 0),
+    }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+async def measure(session: ClientSession, cluster: FakeKafkaCluster, scenario: Scenario, iterations: int) -> Dict[str, Any]:
+    tool, make_arguments, messages_per_call = scenario
+    latencies: List[float] = []
+    errors = 0
+    requests_before = cluster.requests
+    connections_before = cluster.connections
+    started = time.perf_counter()
+    for i in range(iterations):
+        arguments = make_arguments(i)
+        call_started = time.perf_counter()
+        result = await session.call_tool(tool, arguments)
+        latencies.append(time.perf_counter() - call_started)
+        text = result.content[0].text if result.content else ""
+        if result.isError or text.startswith("Failed to execute tool"):
+            errors += 1
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "calls": iterations,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "calls_per_sec": round(iterations / elapsed, 1),
+        "messages_per_sec": round(iterations * messages_per_call / elapsed, 1),
+        "broker_requests_per_call": round((cluster.requests - requests_before) / iterations, 2),
+        "new_connections": cluster.connections - connections_before,
+    }
+
+
+async def background_load(session: ClientSession, scenario: Scenario) -> None:
+    tool, make_arguments, _ = scenario
+    i = 0
+    while True:
+        await session.call_tool(tool, make_arguments(i))
+        i += 1
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    cluster = FakeKafkaCluster(latency_ms=args.latency_ms, connect_ms=args.connect_ms, brokers=args.brokers)
+    cluster.create_topic(BENCH_TOPIC, num_partitions=args.partitions)
+    cluster.create_topic(REPLAY_TOPIC, num_partitions=args.partitions)
+    cluster.create_topic(f"{REPLAY_TOPIC}.copy", num_partitions=args.partitions)
+    payload = b"x" * args.message_bytes
+    for i in range(args.batch_size * 10):
+        cluster.append(REPLAY_TOPIC, payload, f"key-{i}".encode(), i % args.partitions)
+    for i in range(args.topics):
+        cluster.create_topic(f"bench.topic.{i:05d}", num_partitions=3, configs={"retention.ms": "604800000"})
+    for i in range(args.groups):
+        cluster.group_offsets[f"bench.group.{i:05d}"][TopicPartition(BENCH_TOPIC, 0)] = 0
+
+    clients = KafkaClientManager({}, **cluster.client_classes())
+    scenarios = build_scenarios(args)
+    selected = args.scenario or list(scenarios)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(functools.partial(
+                serve,
+                {},
+                clients=clients,
+                streams=server_streams,
+                metadata_cache=MetadataCache(ttl_seconds=args.metadata_cache_ttl),
+            ))
+            async with ClientSession(client_streams[0], client_streams[1]) as session:
+                await session.initialize()
+                # Optional competing heavy calls, to check that cheap tools stay fast under mixed load
+                background = [
+                    asyncio.create_task(background_load(session, scenarios["describe_topics"]))
+                    for _ in range(args.background_load)
+                ]
+                for name in selected:
+                    # One untimed call warms clients and caches like a long-running server
+                    tool, make_arguments, _ = scenarios[name]
+                    await session.call_tool(tool, make_arguments(0))
+                    results[name] = await measure(session, cluster, scenarios[name], args.iterations)
+                for task in background:
+                    task.cancel()
+                await asyncio.gather(*background, return_exceptions=True)
+            tg.cancel_scope.cancel()
+    return results
+
+
+async def first_calls(cluster: FakeKafkaCluster, snapshot: MetadataSnapshot) -> Dict[str, float]:
+    """Starts a server with a new client set and cache and times its first metadata calls."""
+    clusters = ClusterRegistry.single(
+        {"bootstrap_servers": "bench:9092"},
+        clients=KafkaClientManager({}, **cluster.client_classes()),
+        metadata_cache=MetadataCache(),
+        snapshot=snapshot,
+    )
+    timings: Dict[str, float] = {}
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(functools.partial(serve, clusters=clusters, streams=server_streams))
+            async with ClientSession(client_streams[0], client_streams[1]) as session:
+                await session.initialize()
+                for name, tool, arguments in (
+                    ("first_list_topics_ms", "list_topics", {"prefix": "bench.topic.", "limit": 100}),
+                    ("first_get_topic_info_ms", "get_topic_info", {"topic": "bench.topic.00001"}),
+                ):
+                    started = time.perf_counter()
+                    await session.call_tool(tool, arguments)
+                    timings[name] = round((time.perf_counter() - started) * 1000, 3)
+                # Lets the background reconcile finish before the snapshot is written on exit
+                await asyncio.sleep(0.5)
+            # End of input stops the server like EOF on stdio, so it shuts down cleanly
+            await client_streams[1].aclose()
+    return timings
+
+
+async def run_restart_benchmark(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    cluster = FakeKafkaCluster(latency_ms=args.latency_ms, connect_ms=args.connect_ms)
+    for i in range(args.topics):
+        cluster.create_topic(f"bench.topic.{i:05d}", num_partitions=3, configs={"retention.ms": "604800000"})
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = MetadataSnapshot(os.path.join(directory, "metadata.db"))
+        cold = await first_calls(cluster, snapshot)
+        warm = await first_calls(cluster, snapshot)
+    return {"cold": cold, "warm": warm}
+
+
+# Modules that must not be loaded by importing the package; they are imported on first use
+DEFERRED_MODULES = ("aiokafka", "fastavro", "google.protobuf")
+
+IMPORT_PROBE = (
+    "import json, sys, time; started = time.perf_counter(); import mcp_server_kafka; "
+    "print(json.dumps({'import_ms': (time.perf_counter() - started) * 1000, "
+    "'loaded': [m for m in %r if m in sys.modules]}))" % (DEFERRED_MODULES,)
+)
+
+
+async def measure_cold_start(command: List[str]) -> Dict[str, float]:
+    """Spawns the server once and times its initialize and first list_tools responses."""
+    # Pass the full environment so a source checkout on PYTHONPATH works too
+    params = StdioServerParameters(command=command[0], args=command[1:], env=dict(os.environ))
+    started = time.perf_counter()
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            initialized = time.perf_counter()
+            tools = await session.list_tools()
+            listed = time.perf_counter()
+    return {
+        "initialize_ms": (initialized - started) * 1000,
+        "first_list_tools_ms": (listed - started) * 1000,
+        "tools": len(tools.tools),
+    }
+
+
+async def run_startup_benchmark(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    samples: Dict[str, List[float]] = {"import_ms": [], "initialize_ms": [], "first_list_tools_ms": []}
+    eagerly_loaded: List[str] = []
+    tools = 0
+    # The broker is never contacted before list_tools; an unreachable address keeps the run self-contained
+    command = [
+        sys.executable, "-m", "mcp_server_kafka",
+        "--kafka-bootstrap-servers", args.bootstrap_servers,
+        "--log-file", "", "--log-level", "CRITICAL",
+    ]
+    for _ in range(args.startup):
+        probe = subprocess.run([sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True)
+        imported = json.loads(probe.stdout)
+        samples["import_ms"].append(imported["import_ms"])
+        eagerly_loaded = sorted(set(eagerly_loaded) | set(imported["loaded"]))
+        cold_start = await measure_cold_start(command)
+        samples["initialize_ms"].append(cold_start["initialize_ms"])
+        samples["first_list_tools_ms"].append(cold_start["first_list_tools_ms"])
+        tools = cold_start["tools"]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, values in samples.items():
+        values.sort()
+        results[name] = {
+            "runs": len(values),
+            "p50_ms": round(percentile(values, 0.50), 1),
+            "min_ms": round(values[0], 1),
+            "max_ms": round(values[-1], 1),
+        }
+    results["first_list_tools_ms"]["tools"] = tools
+    # Should stay empty; anything listed here is paid for by every server start
+    results["import_ms"]["deferred_modules_loaded"] = eagerly_loaded
+    return results
+
+
+def print_rows(results: Dict[str, Dict[str, Any]]) -> None:
+    """Prints results whose rows have different fields as key=value pairs."""
+    name_width = max(len(name) for name in results)
+    for name, row in results.items():
+        print(f"{name:<{name_width}}" + "".join(f"  {key}={value}" for key, value in row.items()))
+
+
+def print_table(results: Dict[str, Dict[str, Any]]) -> None:
+    columns = ["p50_ms", "p99_ms", "calls_per_sec", "messages_per_sec", "broker_requests_per_call", "errors"]
+    # Each column is as wide as its header or its widest value
+    name_width = max([len("scenario")] + [len(name) for name in results])
+    widths = [max([len(c)] + [len(str(row[c])) for row in results.values()]) for c in columns]
+    print(f"{'scenario':<{name_width}}" + "".join(f"  {c:>{w}}" for c, w in zip(columns, widths)))
+    for name, row in results.items():
+        print(f"{name:<{name_width}}" + "".join(f"  {row[c]!s:>{w}}" for c, w in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Kafka MCP server against an in-process fake cluster")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per scenario")
+    parser.add_argument("--batch-size", type=int, default=100, help="Records per publish_messages / consume_messages call")
+    parser.add_argument("--message-bytes", type=int, default=256, help="Payload size of each published message")
+    parser.add_argument("--partitions", type=int, default=6, help="Partitions of the benchmark topic")
+    parser.add_argument("--topics", type=int, default=500, help="Number of extra topics for list/describe scenarios")
+    parser.add_argument("--groups", type=int, default=200, help="Number of consumer groups for the consumer group scenarios")
+    parser.add_argument("--brokers", type=int, default=3, help="Simulated brokers the consumer groups are spread over")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Simulated round-trip time of every broker request")
+    parser.add_argument("--connect-ms", type=float, default=20.0, help="Simulated connection setup time of every client start")
+    parser.add_argument("--metadata-cache-ttl", type=float, default=30.0, help="Metadata cache TTL; 0 disables the cache")
+    parser.add_argument("--background-load", type=int, default=0, help="Concurrent describe_topics loops running during every scenario")
+    parser.add_argument("--scenario", action="append", help="Run only this scenario (repeatable)")
+    parser.add_argument("--startup", type=int, metavar="N", help="Measure cold start over N spawned servers instead of tool latency")
+    parser.add_argument("--bootstrap-servers", default="127.0.0.1:9", help="Bootstrap servers passed to the spawned servers with --startup")
+    parser.add_argument("--warm-restart", action="store_true", help="Time the first metadata calls after a restart, without and with a metadata snapshot")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.warm_restart:
+        results = asyncio.run(run_restart_benchmark(args))
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_rows(results)
+        return
+
+    if args.startup:
+        results = asyncio.run(run_startup_benchmark(args))
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_rows(results)
+        return
+
+    results = asyncio.run(run_benchmarks(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
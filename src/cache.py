@@ -0,0 +1,255 @@
+import asyncio
+import bisect
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache keys. TOPICS_KEY holds the TopicIndex of the whole cluster. Per-topic
+# entries share the "<kind>:<topic>" shape so a topic can be invalidated across
+# every kind at once.
+TOPICS_KEY = "topics"
+
+def topic_key(kind: str, topic: str) -> str:
+    return f"{kind}:{topic}"
+
+
+class TopicIndex:
+    """Sorted, immutable index of the cluster's topic names.
+
+    Built once per metadata refresh, it answers a page of a prefix listing in
+    O(log n + page) with bisect instead of scanning or re-fetching the cluster.
+    """
+
+    def __init__(self, names: Iterable[str], internal: Iterable[str] = ()):
+        self.names: List[str] = sorted(set(names))
+        self.internal = frozenset(internal)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        i = bisect.bisect_left(self.names, name)
+        return i < len(self.names) and self.names[i] == name
+
+    def page(
+        self,
+        prefix: str = "",
+        pattern: Optional[str] = None,
+        include_internal: bool = False,
+        descending: bool = False,
+        after: Optional[str] = None,
+        limit: int = 1000,
+    ) -> Tuple[List[str], bool]:
+        """Returns up to limit matching names following 'after', and whether more remain."""
+        names = self.names
+        compiled = re.compile(pattern) if pattern else None
+        # Every name starting with prefix sorts in [lo, hi)
+        lo = bisect.bisect_left(names, prefix)
+        hi = bisect.bisect_left(names, prefix + "\U0010ffff") if prefix else len(names)
+        if descending:
+            if after is not None:
+                hi = min(hi, bisect.bisect_left(names, after))
+            indices = range(hi - 1, lo - 1, -1)
+        else:
+            if after is not None:
+                lo = max(lo, bisect.bisect_right(names, after))
+            indices = range(lo, hi)
+
+        page: List[str] = []
+        for i in indices:
+            name = names[i]
+            if not include_internal and name in self.internal:
+                continue
+            if compiled is not None and not compiled.search(name):
+                continue
+            if len(page) == limit:
+                return page, True
+            page.append(name)
+        return page, False
+
+
+class _CacheEntry:
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value: Any, stored_at: float):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class MetadataCache:
+    """In-process TTL cache for cluster metadata with size-bounded LRU eviction.
+
+    Entries younger than ttl_seconds are served directly. Entries that are older
+    but still within stale_seconds past the TTL are served immediately while a
+    single background task refreshes them (stale-while-revalidate). Concurrent
+    misses for the same key share one load. Cached values are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 1024, stale_seconds: float = 300.0):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+        # Bumped on every invalidation so loads started earlier never store stale data
+        self._generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Called with (key, value) when an entry is stored and (key, None) when
+        # it is dropped, e.g. to persist the cache (see snapshot.py)
+        self.on_change: Optional[Callable[[str, Any], None]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], bypass: bool = False) -> Any:
+        """Returns the cached value for key, calling loader on a miss.
+
+        With bypass=True the cluster is always queried and the fresh result
+        replaces whatever was cached.
+        """
+        if not self.enabled:
+            return await loader()
+        entry = self._entries.get(key)
+        if entry is not None and not bypass:
+            age = time.monotonic() - entry.stored_at
+            if age < self.ttl_seconds:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._schedule_refresh(key, loader)
+                return entry.value
+        self.misses += 1
+        return await self._load(key, loader)
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Returns a fresh cached value without loading or counting it, or None."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry.stored_at >= self.ttl_seconds:
+            return None
+        return entry.value
+
+    def put(self, key: str, value: Any) -> None:
+        """Stores a value obtained elsewhere (e.g. from a batched describe)."""
+        if self.enabled:
+            self._store(key, value)
+
+    def seed(self, key: str, value: Any) -> None:
+        """Stores a value from an earlier run as already expired.
+
+        It is served as a stale hit, which triggers a background refresh, for
+        up to stale_seconds; after that it is a miss like any expired entry.
+        """
+        if self.enabled:
+            self._entries[key] = _CacheEntry(value, time.monotonic() - self.ttl_seconds)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value = await loader()
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Mark retrieved so an unawaited failure does not log a warning
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        if generation == self._generation:
+            self._store(key, value)
+        future.set_result(value)
+        return value
+
+    def _store(self, key: str, value: Any) -> None:
+        self._entries[key] = _CacheEntry(value, time.monotonic())
+        self._entries.move_to_end(key)
+        self._evict()
+        if self.on_change is not None:
+            self.on_change(key, value)
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _schedule_refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refresh_tasks or key in self._inflight:
+            return
+        task = asyncio.create_task(self._refresh(key, loader))
+        self._refresh_tasks[key] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(key, None))
+
+    async def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await self._load(key, loader)
+            logger.debug("Refreshed metadata cache entry '%s' in the background.", key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Background refresh of metadata cache entry '%s' failed, keeping stale value: %s", key, e)
+
+    def invalidate(self, *keys: str) -> None:
+        self._generation += 1
+        for key in keys:
+            self._entries.pop(key, None)
+            self._dropped(key)
+
+    def _dropped(self, key: str) -> None:
+        if self.on_change is not None:
+            self.on_change(key, None)
+
+    def invalidate_topic(self, topic: str) -> None:
+        """Drops the topic list and every per-topic entry for this topic."""
+        self._generation += 1
+        suffix = f":{topic}"
+        for key in [k for k in self._entries if k == TOPICS_KEY or k.endswith(suffix)]:
+            del self._entries[key]
+            self._dropped(key)
+
+    def clear(self) -> int:
+        """Drops every entry and returns how many were removed."""
+        self._generation += 1
+        removed = len(self._entries)
+        for key in self._entries:
+            self._dropped(key)
+        self._entries.clear()
+        return removed
+
+    async def close(self) -> None:
+        """Cancels pending background refreshes."""
+        tasks = list(self._refresh_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
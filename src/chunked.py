@@ -0,0 +1,406 @@
+"""Publishing payloads larger than a Kafka record as sequences of chunks, and reading them back.
+
+Every chunk is an ordinary record carrying the payload's id, its position and
+the payload's chunk count and size in headers; the last chunk also carries a
+SHA-256 of the whole payload. All chunks share one key, so they land on one
+partition in order, and readers that know nothing about chunking still see
+valid records.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, List, Optional, Set, Tuple
+
+from .codec import Decoder, decode_payload
+from .handlers import RangeReader, decode_utf8, seek_start_positions
+from .logging_setup import HOT_PATH
+from .metrics import METRICS
+
+if TYPE_CHECKING:
+    from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+
+logger = logging.getLogger(__name__)
+
+# Chunk headers. Values are UTF-8 text.
+HEADER_ID = "mcp.chunk.id"
+HEADER_INDEX = "mcp.chunk.index"
+HEADER_COUNT = "mcp.chunk.count"
+HEADER_SIZE = "mcp.chunk.size"
+HEADER_NAME = "mcp.chunk.name"
+HEADER_SHA256 = "mcp.chunk.sha256"
+CHUNK_HEADERS = frozenset((HEADER_ID, HEADER_INDEX, HEADER_COUNT, HEADER_SIZE, HEADER_NAME, HEADER_SHA256))
+
+
+def resolve_local_path(file_dir: Optional[str], path: str) -> str:
+    """Resolves a tool's file path inside the server's file directory, rejecting anything outside it."""
+    if not file_dir:
+        raise ValueError("File access is disabled; start the server with --file-dir to read and write files.")
+    root = os.path.realpath(file_dir)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Path '{path}' is outside the server's file directory.")
+    return resolved
+
+
+async def handle_publish_chunked(
+    producer: "AIOKafkaProducer",
+    topic: str,
+    payload: Optional[bytes] = None,
+    file: Optional[BinaryIO] = None,
+    size: Optional[int] = None,
+    key: Optional[bytes] = None,
+    partition: Optional[int] = None,
+    headers: Optional[Dict[str, str]] = None,
+    name: Optional[str] = None,
+    chunk_bytes: int = 524288,
+    max_in_flight: int = 4,
+) -> Dict[str, Any]:
+    """Publishes one payload as a sequence of chunk records.
+
+    The payload is either bytes, sliced through a memoryview so only the chunk
+    being sent is copied, or an open file of the given size, read one chunk at
+    a time in a worker thread. Either way at most max_in_flight chunks await
+    acknowledgement, so memory stays at a few chunks whatever the payload size.
+    Without a key, the payload id is used as the key, which keeps every chunk
+    on one partition.
+    """
+    if (payload is None) == (file is None):
+        raise ValueError("Give either a payload or a file to publish.")
+    total = len(payload) if payload is not None else size
+    message_id = uuid.uuid4().hex
+    count = max(1, -(-total // chunk_bytes))
+    logger.info("Publishing %s bytes to topic '%s' as %s chunks of up to %s bytes...", total, topic, count, chunk_bytes, extra=HOT_PATH)
+    common = [(header, value.encode('utf-8')) for header, value in (headers or {}).items()]
+    common += [
+        (HEADER_ID, message_id.encode('utf-8')),
+        (HEADER_COUNT, str(count).encode('utf-8')),
+        (HEADER_SIZE, str(total).encode('utf-8')),
+    ]
+    if name:
+        common.append((HEADER_NAME, name.encode('utf-8')))
+    key = key if key is not None else message_id.encode('utf-8')
+    view = memoryview(payload) if payload is not None else None
+    digest = hashlib.sha256()
+    in_flight: List[asyncio.Future] = []
+    results = []
+    sent_bytes = 0
+
+    try:
+        for index in range(count):
+            if view is not None:
+                chunk = bytes(view[index * chunk_bytes:(index + 1) * chunk_bytes])
+            else:
+                # Blocking file reads stay off the event loop
+                chunk = await asyncio.to_thread(file.read, chunk_bytes)
+                if len(chunk) != min(chunk_bytes, total - sent_bytes):
+                    raise ValueError(f"File changed while publishing: expected {total} bytes.")
+            digest.update(chunk)
+            chunk_headers = common + [(HEADER_INDEX, str(index).encode('utf-8'))]
+            if index == count - 1:
+                chunk_headers.append((HEADER_SHA256, digest.hexdigest().encode('utf-8')))
+            if len(in_flight) >= max_in_flight:
+                results.append(await in_flight.pop(0))
+            in_flight.append(await producer.send(topic, value=chunk, key=key, partition=partition, headers=chunk_headers))
+            sent_bytes += len(chunk)
+        # Chunks are acknowledged in order; the first failure aborts the rest
+        results.extend([await future for future in in_flight])
+    except Exception as e:
+        for future in in_flight:
+            future.cancel()
+        logger.error("Failed to publish chunked payload %s to topic '%s' after %s bytes: %s", message_id, topic, sent_bytes, e, exc_info=True)
+        raise
+
+    METRICS.inc("messages_produced_total", count)
+    METRICS.inc("bytes_produced_total", total + count * len(key))
+    logger.info("Published %s bytes to topic '%s' as %s chunks.", total, topic, count, extra=HOT_PATH)
+    return {
+        "message_id": message_id,
+        "topic": topic,
+        "partition": results[0].partition,
+        "first_offset": results[0].offset,
+        "last_offset": results[-1].offset,
+        "chunks": count,
+        "bytes": total,
+        "sha256": digest.hexdigest(),
+    }
+
+
+class _Assembly:
+    """A payload whose chunks are being collected, into memory or a partial file."""
+
+    def __init__(self, message_id: str, msg: Any, headers: Dict[str, bytes], path: Optional[str]):
+        self.message_id = message_id
+        self.partition = msg.partition
+        self.first_offset = msg.offset
+        self.last_offset = msg.offset
+        self.key = msg.key
+        self.timestamp = msg.timestamp
+        self.count = int(headers[HEADER_COUNT])
+        self.size = int(headers[HEADER_SIZE])
+        self.name = headers[HEADER_NAME].decode('utf-8') if HEADER_NAME in headers else None
+        self.headers = {k: str(v, 'utf-8', 'replace') for k, v in headers.items() if k not in CHUNK_HEADERS}
+        self.next_index = 0
+        self.received = 0
+        self.digest = hashlib.sha256()
+        self.parts: List[bytes] = []
+        # Whether the payload is kept in memory; only its metadata is reported otherwise
+        self.buffered = False
+        self.path = path
+        # The partial file, opened by ChunkAssembler.add when path is set
+        self.file: Optional[BinaryIO] = None
+
+    async def discard(self) -> None:
+        """Closes and deletes the partial file, if the payload has one."""
+        if self.path is not None:
+            await asyncio.to_thread(self._remove_partial)
+
+    def _remove_partial(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        try:
+            os.remove(self.path + ".part")
+        except OSError:
+            pass
+
+
+class ChunkAssembler:
+    """Reassembles chunked payloads from records read in offset order.
+
+    Payloads are buffered in memory up to max_pending_bytes in total, or
+    streamed into files under output_dir; the oldest incomplete buffered
+    payload is dropped when the memory limit would be exceeded. Payloads larger than
+    max_inline_bytes (or max_pending_bytes) are only reported, not
+    buffered, unless written to a file. Records that are not chunks, payloads whose first chunk was not
+    read, and payloads listed in skip_message_ids are skipped.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, max_inline_bytes: int = 1048576,
+                 max_pending_bytes: int = 67108864, message_id: Optional[str] = None,
+                 skip_message_ids: Optional[List[str]] = None):
+        self.output_dir = output_dir
+        self.max_inline_bytes = max_inline_bytes
+        self.max_pending_bytes = max_pending_bytes
+        self.message_id = message_id
+        self.pending: "OrderedDict[str, _Assembly]" = OrderedDict()
+        self.pending_bytes = 0
+        # Payloads seen mid-way or dropped; their later chunks are skipped too
+        self.ignored: Set[str] = set(skip_message_ids or ())
+        self.skip_message_ids = set(skip_message_ids or ())
+        # Partition and offset of the first chunk of each skipped payload that was read
+        self.skipped_at: Dict[str, Tuple[int, int]] = {}
+        self.other_records = 0
+        self.incomplete = 0
+        self.dropped = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def _output_path(self, assembly_id: str, name: Optional[str]) -> str:
+        # Only the base name is used, so a header cannot point outside output_dir
+        filename = os.path.basename(name or "") or assembly_id
+        return os.path.join(self.output_dir, f"{assembly_id[:8]}-{filename}")
+
+    async def _fail(self, assembly: _Assembly, error: str) -> None:
+        self.errors.append({"message_id": assembly.message_id, "partition": assembly.partition, "offset": assembly.first_offset, "error": error})
+        await self._drop(assembly)
+
+    async def _drop(self, assembly: _Assembly) -> None:
+        self.pending.pop(assembly.message_id, None)
+        self.ignored.add(assembly.message_id)
+        self.pending_bytes -= sum(len(part) for part in assembly.parts)
+        assembly.parts = []
+        await assembly.discard()
+
+    async def add(self, msg: Any) -> Optional[Dict[str, Any]]:
+        """Takes the next record; returns a payload once its last chunk has arrived."""
+        headers = dict(msg.headers or ())
+        raw_id = headers.get(HEADER_ID)
+        if raw_id is None:
+            self.other_records += 1
+            return None
+        message_id = raw_id.decode('utf-8')
+        if message_id in self.skip_message_ids and headers.get(HEADER_INDEX) == b"0":
+            self.skipped_at.setdefault(message_id, (msg.partition, msg.offset))
+        if message_id in self.ignored or (self.message_id is not None and message_id != self.message_id):
+            return None
+        try:
+            index = int(headers[HEADER_INDEX])
+            assembly = self.pending.get(message_id)
+            if assembly is None:
+                if index != 0:
+                    # Started reading after this payload's first chunk
+                    self.ignored.add(message_id)
+                    self.incomplete += 1
+                    return None
+                path = self._output_path(message_id, headers[HEADER_NAME].decode('utf-8') if HEADER_NAME in headers else None) if self.output_dir else None
+                assembly = _Assembly(message_id, msg, headers, path)
+                if path is not None:
+                    assembly.file = await asyncio.to_thread(open, path + ".part", "wb")
+                assembly.buffered = path is None and assembly.size <= min(self.max_inline_bytes, self.max_pending_bytes)
+                self.pending[message_id] = assembly
+        except (KeyError, ValueError, OSError) as e:
+            self.errors.append({"message_id": message_id, "partition": msg.partition, "offset": msg.offset, "error": f"{type(e).__name__}: {e}"})
+            self.ignored.add(message_id)
+            return None
+
+        if index != assembly.next_index:
+            await self._fail(assembly, f"Expected chunk {assembly.next_index}, got chunk {index} at offset {msg.offset}.")
+            return None
+        chunk = msg.value or b""
+        assembly.next_index += 1
+        assembly.received += len(chunk)
+        assembly.last_offset = msg.offset
+        assembly.digest.update(chunk)
+        if assembly.file is not None:
+            await asyncio.to_thread(assembly.file.write, chunk)
+        elif assembly.buffered:
+            while self.pending_bytes + len(chunk) > self.max_pending_bytes:
+                # Only buffered payloads hold memory; the others cost nothing to keep
+                oldest = next((a for a in self.pending.values() if a.buffered and a is not assembly), None)
+                if oldest is None:
+                    break
+                self.dropped += 1
+                await self._drop(oldest)
+            assembly.parts.append(chunk)
+            self.pending_bytes += len(chunk)
+
+        if assembly.next_index < assembly.count:
+            return None
+        return await self._complete(assembly, headers.get(HEADER_SHA256))
+
+    async def _complete(self, assembly: _Assembly, expected_sha256: Optional[bytes]) -> Dict[str, Any]:
+        self.pending.pop(assembly.message_id, None)
+        self.pending_bytes -= sum(len(part) for part in assembly.parts)
+        sha256 = assembly.digest.hexdigest()
+        result: Dict[str, Any] = {
+            "message_id": assembly.message_id,
+            "partition": assembly.partition,
+            "first_offset": assembly.first_offset,
+            "last_offset": assembly.last_offset,
+            "timestamp": assembly.timestamp,
+            "key": decode_utf8(assembly.key) if assembly.key is not None else None,
+            "headers": assembly.headers,
+            "name": assembly.name,
+            "chunks": assembly.count,
+            "bytes": assembly.received,
+            "sha256": sha256,
+            "complete": assembly.received == assembly.size,
+            "checksum_ok": expected_sha256 is None or expected_sha256.decode('utf-8') == sha256,
+        }
+        if assembly.file is not None:
+            if result["complete"] and result["checksum_ok"]:
+                # Closing flushes the last writes
+                await asyncio.to_thread(assembly.file.close)
+                assembly.file = None
+                await asyncio.to_thread(os.replace, assembly.path + ".part", assembly.path)
+                result["path"] = assembly.path
+            else:
+                await assembly.discard()
+        elif assembly.buffered:
+            result["payload"] = b"".join(assembly.parts)
+        else:
+            result["too_large"] = True
+        assembly.parts = []
+        return result
+
+    async def close(self) -> List[_Assembly]:
+        """Drops every incomplete payload and returns them."""
+        pending = list(self.pending.values())
+        for assembly in pending:
+            await self._drop(assembly)
+        self.incomplete += len(pending)
+        return pending
+
+
+async def handle_consume_chunked(
+    consumer: "AIOKafkaConsumer",
+    topic: str,
+    partitions: List[int],
+    assembler: ChunkAssembler,
+    start: str = "earliest",
+    offsets: Optional[Dict[int, int]] = None,
+    start_timestamp_ms: Optional[int] = None,
+    max_messages: int = 1,
+    timeout_ms: int = 30000,
+    decode_value: Optional[Decoder] = None,
+) -> Dict[str, Any]:
+    """Reads chunk records and returns up to max_messages reassembled payloads.
+
+    Partitions are read up to their end offset when the call started. Each
+    payload's chunks are checked for order and against the SHA-256 sent with
+    the last chunk. The returned next offsets resume before any payload that
+    was still incomplete, so a follow-up call reads it whole. Payloads
+    interleaved with it that were already returned (or skipped) would be read
+    again from there; their ids are returned as skip_message_ids for the
+    assembler of the follow-up call.
+    """
+    from aiokafka.structs import TopicPartition
+    logger.info("Reassembling chunked payloads from topic '%s' partitions %s...", topic, partitions, extra=HOT_PATH)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    tps = [TopicPartition(topic, p) for p in partitions]
+    messages: List[Dict[str, Any]] = []
+    read = 0
+    read_bytes = 0
+
+    try:
+        positions, end_offsets = await asyncio.wait_for(
+            seek_start_positions(consumer, tps, start, offsets, start_timestamp_ms),
+            timeout=timeout_ms / 1000,
+        )
+        stopped = None
+        # A few chunks per fetch keeps buffered-but-unprocessed data small
+        reader = RangeReader(consumer, tps, positions, end_offsets, deadline, max_records=16)
+        async for tp, msg in reader.records():
+            read += 1
+            read_bytes += len(msg.key or b"") + len(msg.value or b"")
+            completed = await assembler.add(msg)
+            if completed is None:
+                continue
+            payload = completed.pop("payload", None)
+            if payload is not None:
+                completed["value"], error = decode_payload(decode_value or decode_utf8, payload)
+                if error:
+                    completed["decode_error"] = error
+            messages.append(completed)
+            if len(messages) >= max_messages:
+                stopped = "max_messages"
+                break
+        if stopped is None:
+            stopped = "timeout" if reader.timed_out else "end"
+
+        # Resume where the earliest unfinished payload of each partition started
+        next_offsets = {tp.partition: positions[tp] for tp in tps}
+        for assembly in await assembler.close():
+            if assembly.partition in next_offsets:
+                next_offsets[assembly.partition] = min(next_offsets[assembly.partition], assembly.first_offset)
+        starts = {m["message_id"]: (m["partition"], m["first_offset"]) for m in messages}
+        starts.update(assembler.skipped_at)
+        # Skipped payloads whose first chunk was not read may still lie ahead
+        skip_message_ids = sorted(
+            message_id for message_id in assembler.skip_message_ids | starts.keys()
+            if message_id not in starts or starts[message_id][1] >= next_offsets[starts[message_id][0]]
+        )
+
+        METRICS.inc("messages_consumed_total", read)
+        METRICS.inc("bytes_consumed_total", read_bytes)
+        logger.info("Reassembled %s payloads from %s records of topic '%s' (%s).", len(messages), read, topic, stopped, extra=HOT_PATH)
+        return {
+            "topic": topic,
+            "messages": messages,
+            "count": len(messages),
+            "records_read": read,
+            "other_records": assembler.other_records,
+            "incomplete": assembler.incomplete,
+            "dropped": assembler.dropped,
+            "errors": assembler.errors,
+            "stopped_reason": stopped,
+            "next_offsets": next_offsets,
+            "skip_message_ids": skip_message_ids,
+        }
+    except Exception as e:
+        await assembler.close()
+        logger.error("Failed to reassemble chunked payloads from topic '%s': %s", topic, e, exc_info=True)
+        raise
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from .cache import MetadataCache
+from .connection import KafkaClientManager, default_transactional_id
+from .snapshot import MetadataSnapshot, SnapshotSync, snapshot_source
+
+logger = logging.getLogger(__name__)
+
+# Cluster config file keys that configure the server rather than the aiokafka clients
+_SERVER_KEYS = ("producer", "consumer", "consumer_pool_size", "transactional_id")
+
+
+class ClusterConfig:
+    """Connection settings of one named cluster."""
+
+    def __init__(
+        self,
+        name: str,
+        kafka_config: dict,
+        producer_config: Optional[dict] = None,
+        consumer_config: Optional[dict] = None,
+        consumer_pool_size: int = 8,
+        transactional_id: Optional[str] = None,
+    ):
+        self.name = name
+        self.kafka_config = kafka_config
+        self.producer_config = producer_config or {}
+        self.consumer_config = consumer_config or {}
+        self.consumer_pool_size = consumer_pool_size
+        # Of the producer behind publish_transaction; unique to the process by default
+        self.transactional_id = transactional_id
+
+    def __repr__(self) -> str:
+        return f"ClusterConfig(name={self.name!r}, bootstrap_servers={self.kafka_config.get('bootstrap_servers')!r})"
+
+
+def load_cluster_configs(
+    path: str,
+    producer_config: Optional[dict] = None,
+    consumer_config: Optional[dict] = None,
+    consumer_pool_size: int = 8,
+    transactional_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Reads a JSON cluster config file.
+
+    The file looks like {"default": "prod", "idle_seconds": 600, "clusters":
+    {"prod": {"bootstrap_servers": "host:9092", "security_protocol": ...,
+    "producer": {...}, "consumer": {...}, "consumer_pool_size": 8,
+    "transactional_id": "orders-agent"}}}. Keys of a cluster other than
+    producer, consumer, consumer_pool_size and transactional_id are passed to
+    the aiokafka clients as is. The given producer and consumer configs are
+    defaults that each cluster's own sections override. Returns the
+    ClusterRegistry keyword arguments: configs, default and idle_seconds.
+    """
+    with open(path, encoding='utf-8') as f:
+        document = json.load(f)
+    clusters = document.get("clusters")
+    if not isinstance(clusters, dict) or not clusters:
+        raise ValueError(f"Cluster config '{path}' must define at least one cluster under 'clusters'.")
+
+    configs = []
+    for name, settings in clusters.items():
+        if not isinstance(settings, dict) or not settings.get("bootstrap_servers"):
+            raise ValueError(f"Cluster '{name}' in '{path}' needs 'bootstrap_servers'.")
+        kafka_config = {k: v for k, v in settings.items() if k not in _SERVER_KEYS and v is not None}
+        if isinstance(kafka_config["bootstrap_servers"], str):
+            kafka_config["bootstrap_servers"] = kafka_config["bootstrap_servers"].split(",")
+        configs.append(ClusterConfig(
+            name,
+            kafka_config,
+            producer_config={**(producer_config or {}), **settings.get("producer", {})},
+            consumer_config={**(consumer_config or {}), **settings.get("consumer", {})},
+            consumer_pool_size=settings.get("consumer_pool_size", consumer_pool_size),
+            transactional_id=settings.get("transactional_id", transactional_id),
+        ))
+    default = document.get("default", configs[0].name)
+    if default not in clusters:
+        raise ValueError(f"Default cluster '{default}' is not defined in '{path}'.")
+    return {"configs": configs, "default": default, "idle_seconds": document.get("idle_seconds")}
+
+
+class Cluster:
+    """A named cluster's shared clients and metadata cache."""
+
+    def __init__(self, config: ClusterConfig, clients: KafkaClientManager, metadata_cache: MetadataCache):
+        self.name = config.name
+        self.config = config
+        self.clients = clients
+        self.metadata_cache = metadata_cache
+        # Persists metadata_cache when the registry has a snapshot file
+        self.snapshot_sync: Optional[SnapshotSync] = None
+
+
+class ClusterRegistry:
+    """Routes tool calls to named clusters, each with its own client set.
+
+    A cluster's KafkaClientManager and MetadataCache are created on the first
+    call that names it, and its clients are started on demand like in the
+    single cluster case. Only the default cluster is warmed up at startup.
+    With idle_seconds set, a background task closes any client, pooled
+    consumers included, that no call has used for that long, so a process
+    serving many clusters only keeps connections to the ones in use.
+    With a MetadataSnapshot, every cluster's cache is seeded from it when the
+    cluster is first used (or at startup) and written back to it.
+    """
+
+    def __init__(
+        self,
+        configs: List[ClusterConfig],
+        default: Optional[str] = None,
+        idle_seconds: Optional[float] = None,
+        cache_factory: Callable[[], MetadataCache] = MetadataCache,
+        snapshot: Optional[MetadataSnapshot] = None,
+    ):
+        if not configs:
+            raise ValueError("At least one cluster is required.")
+        self._configs: Dict[str, ClusterConfig] = {config.name: config for config in configs}
+        self.default = default or configs[0].name
+        if self.default not in self._configs:
+            raise ValueError(f"Unknown default cluster '{self.default}'.")
+        self.idle_seconds = idle_seconds or 0
+        self.cache_factory = cache_factory
+        self._clusters: Dict[str, Cluster] = {}
+        self._evict_task: Optional[asyncio.Task] = None
+        self.snapshot = snapshot
+        # Snapshot entries per cluster name, loaded at start() and handed out on first use
+        self._snapshot_entries: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def single(
+        cls,
+        kafka_config: dict,
+        clients: Optional[KafkaClientManager] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+        name: str = "default",
+        idle_seconds: Optional[float] = None,
+        snapshot: Optional[MetadataSnapshot] = None,
+        **config_kwargs: Any,
+    ) -> "ClusterRegistry":
+        """A registry with one cluster, optionally with pre-built clients and cache."""
+        registry = cls([ClusterConfig(name, kafka_config, **config_kwargs)], idle_seconds=idle_seconds, snapshot=snapshot)
+        if clients is not None or metadata_cache is not None:
+            registry.add(name, clients=clients, metadata_cache=metadata_cache)
+        return registry
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._configs)
+
+    def add(
+        self,
+        name: str,
+        clients: Optional[KafkaClientManager] = None,
+        metadata_cache: Optional[MetadataCache] = None,
+    ) -> Cluster:
+        """Creates a configured cluster's state now, e.g. with injected clients."""
+        config = self._configs[name]
+        cluster = Cluster(
+            config,
+            clients or KafkaClientManager(
+                config.kafka_config,
+                producer_config=config.producer_config,
+                consumer_config=config.consumer_config,
+                consumer_pool_size=config.consumer_pool_size,
+                transactional_id=config.transactional_id or default_transactional_id(name),
+            ),
+            metadata_cache or self.cache_factory(),
+        )
+        self._clusters[name] = cluster
+        return cluster
+
+    def get(self, name: Optional[str] = None) -> Cluster:
+        """Returns the named cluster, or the default one, creating its state on first use."""
+        name = name or self.default
+        cluster = self._clusters.get(name)
+        if cluster is None:
+            if name not in self._configs:
+                raise ValueError(f"Unknown cluster '{name}'. Configured clusters: {', '.join(self._configs)}")
+            logger.info("Setting up clients for cluster '%s'.", name)
+            cluster = self.add(name)
+            if self._snapshot_entries is not None:
+                self._sync_snapshot(cluster)
+        return cluster
+
+    def _sync_snapshot(self, cluster: Cluster) -> None:
+        cluster_id, entries = self._snapshot_entries.pop(cluster.name, (None, {}))
+        cluster.snapshot_sync = SnapshotSync(self.snapshot, cluster, cluster_id, entries)
+        cluster.snapshot_sync.start()
+
+    def started(self) -> List[Cluster]:
+        """Clusters that have been used so far."""
+        return list(self._clusters.values())
+
+    async def __aenter__(self) -> "ClusterRegistry":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Loads the snapshot, warms up the default cluster and starts idle eviction if enabled."""
+        if self.snapshot is not None and self._snapshot_entries is None:
+            sources = {name: snapshot_source(config.kafka_config) for name, config in self._configs.items()}
+            try:
+                self._snapshot_entries = await asyncio.to_thread(self.snapshot.load, sources)
+            except Exception as e:
+                logger.warning("Could not read the metadata snapshot '%s', starting cold: %s", self.snapshot.path, e)
+                self._snapshot_entries = {}
+            for cluster in self.started():
+                self._sync_snapshot(cluster)
+        await self.get().clients.start()
+        if self.idle_seconds > 0 and self._evict_task is None:
+            self._evict_task = asyncio.create_task(self._evict_idle())
+
+    async def _evict_idle(self) -> None:
+        # Checking a few times per idle period bounds how long a client outlives it
+        interval = max(1.0, min(self.idle_seconds / 4, 60.0))
+        while True:
+            await asyncio.sleep(interval)
+            for cluster in self.started():
+                try:
+                    closed = await cluster.clients.close_idle(self.idle_seconds)
+                except Exception as e:
+                    logger.warning("Could not close idle clients of cluster '%s': %s", cluster.name, e)
+                    continue
+                if closed:
+                    logger.info("Closed %s idle clients of cluster '%s'.", closed, cluster.name)
+
+    async def close(self) -> None:
+        """Stops idle eviction and every cluster's clients. Safe to call more than once."""
+        if self._evict_task is not None:
+            self._evict_task.cancel()
+            try:
+                await self._evict_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._evict_task = None
+        clusters = self.started()
+        # Written before the clients close; a reconcile still running is cancelled
+        await asyncio.gather(*(cluster.snapshot_sync.close() for cluster in clusters if cluster.snapshot_sync is not None))
+        await asyncio.gather(*(cluster.clients.close() for cluster in clusters))
+        await asyncio.gather(*(cluster.metadata_cache.close() for cluster in clusters))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "default": self.default,
+            "idle_seconds": self.idle_seconds or None,
+            "clusters": {
+                name: {
+                    "bootstrap_servers": config.kafka_config.get("bootstrap_servers"),
+                    "active": name in self._clusters,
+                    "connected": name in self._clusters and self._clusters[name].clients.connected,
+                    "snapshot": self._clusters[name].snapshot_sync.stats() if name in self._clusters and self._clusters[name].snapshot_sync else None,
+                }
+                for name, config in self._configs.items()
+            },
+        }
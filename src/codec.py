@@ -0,0 +1,272 @@
+import base64
+import io
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib decoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+# fastavro and protobuf are imported when a schema is first loaded, so servers
+# that never use those codecs do not pay for them at startup.
+def _import_fastavro() -> Any:
+    try:
+        import fastavro
+    except ImportError:  # Avro support is optional (pip install mcp-server-kafka[avro])
+        raise ValueError("Avro support requires the 'fastavro' package.")
+    return fastavro
+
+
+def _import_protobuf() -> Any:
+    try:
+        from google import protobuf
+        from google.protobuf import descriptor_pb2, descriptor_pool, json_format, message_factory  # noqa: F401
+    except ImportError:  # Protobuf support is optional (pip install mcp-server-kafka[protobuf])
+        raise ValueError("Protobuf support requires the 'protobuf' package.")
+    return protobuf
+
+Buffer = Union[bytes, bytearray, memoryview]
+Encoder = Callable[[Any], bytes]
+Decoder = Callable[[Buffer], Any]
+
+CODEC_NAMES = ("utf-8", "base64", "json", "avro", "protobuf")
+
+
+class SchemaRegistry:
+    """Schemas stored as files in a local directory.
+
+    Avro schemas are '<subject>.avsc' files referenced by subject name.
+    Protobuf types come from compiled descriptor sets ('*.desc' or '*.pb',
+    produced with 'protoc --include_imports --descriptor_set_out=...') and are
+    referenced by their fully qualified message name. Parsed schemas are kept
+    for the lifetime of the registry; call clear() after changing the files.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = os.path.abspath(directory) if directory else None
+        self._avro: Dict[str, Any] = {}
+        self._proto_pool = None
+        self._proto_classes: Dict[str, Any] = {}
+
+    def _path(self, name: str) -> str:
+        if self.directory is None:
+            raise ValueError("No schema directory configured. Start the server with --schema-dir.")
+        path = os.path.abspath(os.path.join(self.directory, name))
+        if os.path.commonpath([path, self.directory]) != self.directory:
+            raise ValueError(f"Schema '{name}' is outside the schema directory.")
+        return path
+
+    def avro_schema(self, subject: str) -> Any:
+        """Returns the parsed Avro schema of a subject."""
+        schema = self._avro.get(subject)
+        if schema is None:
+            fastavro = _import_fastavro()
+            filename = subject if subject.endswith(".avsc") else f"{subject}.avsc"
+            with open(self._path(filename), encoding='utf-8') as f:
+                schema = fastavro.parse_schema(json.load(f))
+            self._avro[subject] = schema
+            logger.info("Loaded Avro schema '%s'.", subject)
+        return schema
+
+    def protobuf_class(self, message_name: str) -> Any:
+        """Returns the generated message class for a fully qualified Protobuf type."""
+        cls = self._proto_classes.get(message_name)
+        if cls is None:
+            message_factory = _import_protobuf().message_factory
+            if self._proto_pool is None:
+                self._proto_pool = self._load_descriptor_sets()
+            try:
+                descriptor = self._proto_pool.FindMessageTypeByName(message_name)
+            except KeyError:
+                raise ValueError(f"Protobuf message type '{message_name}' not found in the schema directory.")
+            if hasattr(message_factory, "GetMessageClass"):
+                cls = message_factory.GetMessageClass(descriptor)
+            else:  # protobuf < 4.22
+                cls = message_factory.MessageFactory(self._proto_pool).GetPrototype(descriptor)
+            self._proto_classes[message_name] = cls
+        return cls
+
+    def _load_descriptor_sets(self) -> Any:
+        protobuf = _import_protobuf()
+        pool = protobuf.descriptor_pool.DescriptorPool()
+        directory = self._path(".")
+        added = set()
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith((".desc", ".pb")):
+                continue
+            descriptor_set = protobuf.descriptor_pb2.FileDescriptorSet()
+            with open(os.path.join(directory, filename), 'rb') as f:
+                descriptor_set.ParseFromString(f.read())
+            for file_proto in descriptor_set.file:
+                # Sets built with --include_imports repeat shared dependencies
+                if file_proto.name not in added:
+                    pool.Add(file_proto)
+                    added.add(file_proto.name)
+        logger.info("Loaded %s Protobuf files from '%s'.", len(added), directory)
+        return pool
+
+    def clear(self) -> None:
+        self._avro.clear()
+        self._proto_classes.clear()
+        self._proto_pool = None
+
+
+class Codec:
+    """Converts between tool-facing values and Kafka payload bytes.
+
+    encoder() and decoder() are called once per (codec, schema) and return
+    plain functions, so schema lookups happen when compiling, not per record.
+    Decoders receive a memoryview over the record payload and should avoid
+    copying it where the underlying library accepts buffers.
+    """
+
+    name = ""
+    requires_schema = False
+
+    def encoder(self, schema: Optional[str], registry: SchemaRegistry) -> Encoder:
+        raise NotImplementedError
+
+    def decoder(self, schema: Optional[str], registry: SchemaRegistry) -> Decoder:
+        raise NotImplementedError
+
+
+class Utf8Codec(Codec):
+    name = "utf-8"
+
+    def encoder(self, schema, registry):
+        return lambda value: str(value).encode('utf-8')
+
+    def decoder(self, schema, registry):
+        return lambda data: str(data, 'utf-8', 'replace')
+
+
+class Base64Codec(Codec):
+    """Arbitrary binary payloads, exchanged with the tools as base64 text."""
+
+    name = "base64"
+
+    def encoder(self, schema, registry):
+        return lambda value: base64.b64decode(value, validate=True)
+
+    def decoder(self, schema, registry):
+        return lambda data: base64.b64encode(data).decode('ascii')
+
+
+class JsonCodec(Codec):
+    """Any JSON value, serialized compactly."""
+
+    name = "json"
+
+    def encoder(self, schema, registry):
+        if orjson is not None:
+            return lambda value: orjson.dumps(value)
+        return lambda value: json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode('utf-8')
+
+    def decoder(self, schema, registry):
+        if orjson is not None:
+            # orjson parses straight from the buffer
+            return orjson.loads
+        return lambda data: json.loads(bytes(data))
+
+
+class AvroCodec(Codec):
+    """Schemaless Avro binary records; the schema comes from the registry."""
+
+    name = "avro"
+    requires_schema = True
+
+    def encoder(self, schema, registry):
+        parsed = registry.avro_schema(schema)
+        fastavro = _import_fastavro()
+
+        def encode(value: Any) -> bytes:
+            out = io.BytesIO()
+            fastavro.schemaless_writer(out, parsed, value)
+            return out.getvalue()
+        return encode
+
+    def decoder(self, schema, registry):
+        parsed = registry.avro_schema(schema)
+        fastavro = _import_fastavro()
+        return lambda data: fastavro.schemaless_reader(io.BytesIO(data), parsed)
+
+
+class ProtobufCodec(Codec):
+    """Protobuf messages exchanged with the tools as JSON objects."""
+
+    name = "protobuf"
+    requires_schema = True
+
+    def encoder(self, schema, registry):
+        cls = registry.protobuf_class(schema)
+        json_format = _import_protobuf().json_format
+        return lambda value: json_format.ParseDict(value, cls()).SerializeToString()
+
+    def decoder(self, schema, registry):
+        cls = registry.protobuf_class(schema)
+        json_format = _import_protobuf().json_format
+
+        def decode(data: Buffer) -> Any:
+            message = cls()
+            message.ParseFromString(bytes(data) if not isinstance(data, bytes) else data)
+            return json_format.MessageToDict(message, preserving_proto_field_name=True)
+        return decode
+
+
+class CodecRegistry:
+    """Looks up codecs by name and caches their compiled encoders and decoders."""
+
+    def __init__(self, schema_dir: Optional[str] = None, codecs: Optional[List[Codec]] = None):
+        self.schemas = SchemaRegistry(schema_dir)
+        self._codecs: Dict[str, Codec] = {}
+        self._compiled: Dict[Tuple[str, str, Optional[str]], Callable] = {}
+        for codec in codecs or (Utf8Codec(), Base64Codec(), JsonCodec(), AvroCodec(), ProtobufCodec()):
+            self.register(codec)
+
+    def register(self, codec: Codec) -> None:
+        self._codecs[codec.name] = codec
+
+    def _compile(self, kind: str, name: str, schema: Optional[str]) -> Callable:
+        key = (kind, name, schema)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            codec = self._codecs.get(name)
+            if codec is None:
+                raise ValueError(f"Unknown codec '{name}'. Available codecs: {', '.join(self._codecs)}.")
+            if codec.requires_schema and not schema:
+                raise ValueError(f"Codec '{name}' requires a schema.")
+            compiled = codec.encoder(schema, self.schemas) if kind == "encode" else codec.decoder(schema, self.schemas)
+            self._compiled[key] = compiled
+        return compiled
+
+    def encoder(self, name: str = "utf-8", schema: Optional[str] = None) -> Encoder:
+        return self._compile("encode", name, schema)
+
+    def decoder(self, name: str = "utf-8", schema: Optional[str] = None) -> Decoder:
+        return self._compile("decode", name, schema)
+
+    def clear(self) -> None:
+        """Drops compiled codecs and parsed schemas, e.g. after schema files changed."""
+        self._compiled.clear()
+        self.schemas.clear()
+
+
+def decode_payload(decoder: Decoder, data: Optional[bytes]) -> Tuple[Any, Optional[str]]:
+    """Decodes a record key or value, returning (value, error).
+
+    Payloads the codec cannot decode are returned as base64 with the error
+    message, so one malformed record does not fail a whole read.
+    """
+    if data is None:
+        return None, None
+    view = memoryview(data)
+    try:
+        return decoder(view), None
+    except Exception as e:
+        return base64.b64encode(view).decode('ascii'), f"{type(e).__name__}: {e}"
@@ -1,69 +1,554 @@
+import asyncio
 import logging
+import os
+import socket
+import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
-from kafka.admin import AIOKafkaAdminClient
-from kafka.producer import AIOKafkaProducer
-from kafka.errors import KafkaConnectionError
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from .metrics import METRICS
+
+if TYPE_CHECKING:
+    from aiokafka import AIOKafkaConsumer
+    from aiokafka.structs import TopicPartition
 
 logger = logging.getLogger(__name__)
 
-@asynccontextmanager
-async def get_kafka_producer(config: dict):
-    """Provides an asynchronous Kafka producer within an async context manager."""
-    producer = AIOKafkaProducer(**config)
-    try:
-        logger.info("Starting Kafka producer...")
-        await producer.start()
-        logger.info("Kafka producer started successfully.")
-        yield producer
-    except KafkaConnectionError as e:
-        logger.error(f"Failed to connect Kafka producer: {e}")
-        raise # Re-raise the specific connection error
-    except Exception as e:
-        logger.error(f"Error during Kafka producer operation: {e}", exc_info=True)
-        raise # Re-raise other exceptions
-    finally:
-        logger.info("Stopping Kafka producer...")
-        await producer.stop()
-        logger.info("Kafka producer stopped.")
-
-@asynccontextmanager
-async def get_kafka_admin_client(config: dict):
-    """Provides an asynchronous Kafka admin client within an async context manager."""
-    admin_client = AIOKafkaAdminClient(**config)
-    try:
-        logger.info("Starting Kafka admin client...")
-        await admin_client.start()
-        logger.info("Kafka admin client started successfully.")
-        yield admin_client
-    except KafkaConnectionError as e:
-        logger.error(f"Failed to connect Kafka admin client: {e}")
-        raise
-    except Exception as e:
-        logger.error(f"Error during Kafka admin client operation: {e}", exc_info=True)
-        raise
-    finally:
-        logger.info("Stopping Kafka admin client...")
-        await admin_client.close()
-        logger.info("Kafka admin client stopped.")
-
-# We might add a consumer context manager later if needed for consume tools
-# @asynccontextmanager
-# async def get_kafka_consumer(config: dict, topics: list[str]):
-#     consumer = AIOKafkaConsumer(*topics, **config)
-#     try:
-#         logger.info(f"Starting Kafka consumer for topics: {topics}...")
-#         await consumer.start()
-#         logger.info("Kafka consumer started successfully.")
-#         yield consumer
-#     except KafkaConnectionError as e:
-#         logger.error(f"Failed to connect Kafka consumer: {e}")
-#         raise
-#     except Exception as e:
-#         logger.error(f"Error during Kafka consumer operation: {e}", exc_info=True)
-#         raise
-#     finally:
-#         logger.info("Stopping Kafka consumer...")
-#         await consumer.stop()
-#         logger.info("Kafka consumer stopped.")
-
-# Removed validate_rabbitmq_name function
+def import_kafka_clients() -> Dict[str, Callable[..., Any]]:
+    """Imports aiokafka and returns its client classes by name.
+
+    aiokafka is the slowest import of the server, so it is deferred until the
+    first client is created instead of slowing down startup and list_tools.
+    """
+    from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+    from aiokafka.admin import AIOKafkaAdminClient
+    return {
+        "producer": AIOKafkaProducer,
+        "admin client": AIOKafkaAdminClient,
+        "consumer": AIOKafkaConsumer,
+    }
+
+def reconnect_errors() -> Tuple[type, ...]:
+    """Errors that mean the underlying connection is unusable.
+
+    A shared client that raises one of these is dropped so the next call
+    reconnects from scratch.
+    """
+    from aiokafka.errors import KafkaConnectionError, KafkaTimeoutError, NodeNotReadyError
+    return (KafkaConnectionError, KafkaTimeoutError, NodeNotReadyError)
+
+def transaction_fatal_errors() -> Tuple[type, ...]:
+    """Errors after which a transactional producer can no longer be used.
+
+    The producer was fenced by a newer instance with the same transactional
+    id, or lost its sequence state; only a fresh producer can continue.
+    """
+    from aiokafka.errors import OutOfOrderSequenceNumber, ProducerFenced, TransactionalIdAuthorizationFailed
+    return (OutOfOrderSequenceNumber, ProducerFenced, TransactionalIdAuthorizationFailed)
+
+def idempotent_producer_config(config: dict) -> dict:
+    """Returns producer settings with idempotence enabled unless they say otherwise.
+
+    An idempotent producer numbers its batches so the broker drops the
+    duplicates a retry after a lost acknowledgement would write. It requires
+    acks=all, so settings asking for acks 0 or 1 are returned unchanged.
+    """
+    if "enable_idempotence" in config or config.get("acks", "all") not in ("all", -1):
+        return dict(config)
+    return {**config, "enable_idempotence": True}
+
+def default_transactional_id(suffix: Optional[str] = None) -> str:
+    """A transactional id unique to this server process.
+
+    MCP hosts start a server per session, so a fixed id would let sessions
+    fence each other's producers.
+    """
+    parts = ["mcp-server-kafka", socket.gethostname(), str(os.getpid())]
+    if suffix:
+        parts.append(suffix)
+    return "-".join(parts)
+
+class ManagedClient:
+    """A lazily started, long-lived Kafka client shared across tool calls."""
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        start: Callable[[Any], Awaitable[None]],
+        stop: Callable[[Any], Awaitable[None]],
+    ):
+        self.name = name
+        self._factory = factory
+        self._start = start
+        self._stop = stop
+        self._client: Optional[Any] = None
+        self._lock = asyncio.Lock()
+        self.started_at: Optional[float] = None
+        self.last_used_at: Optional[float] = None
+        # Calls currently holding the client; a leased client is never closed as idle
+        self.leases = 0
+        self.uses = 0
+        self.starts = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._client is not None
+
+    async def acquire(self) -> Any:
+        """Returns the shared client, starting it first if needed."""
+        client = self._client
+        if client is None:
+            async with self._lock:
+                # Another caller may have connected while we waited for the lock
+                if self._client is None:
+                    self._client = await self._connect()
+                client = self._client
+        self.uses += 1
+        self.last_used_at = time.monotonic()
+        return client
+
+    def release(self) -> None:
+        """Ends a lease taken right after acquire(); idle time counts from here."""
+        self.leases -= 1
+        self.last_used_at = time.monotonic()
+
+    async def close_if_idle(self, idle_seconds: float) -> bool:
+        """Stops the client if no call holds it and it has not been used for idle_seconds."""
+        async with self._lock:
+            client = self._client
+            if client is None or self.leases or time.monotonic() - (self.last_used_at or 0) < idle_seconds:
+                return False
+            self._client = None
+            self.started_at = None
+        logger.info("Closing shared Kafka %s after %ss idle.", self.name, idle_seconds)
+        try:
+            await self._stop(client)
+        except Exception as e:
+            logger.warning("Error while stopping shared Kafka %s: %s", self.name, e)
+        return True
+
+    async def _connect(self) -> Any:
+        client = self._factory()
+        logger.info("Starting shared Kafka %s...", self.name)
+        try:
+            await self._start(client)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.error("Failed to start shared Kafka %s: %s", self.name, e)
+            try:
+                await self._stop(client)
+            except Exception:
+                logger.debug("Ignoring error while cleaning up failed %s", self.name, exc_info=True)
+            raise
+        self.starts += 1
+        self.started_at = time.monotonic()
+        logger.info("Shared Kafka %s started successfully.", self.name)
+        return client
+
+    async def reset(self, reason: Optional[BaseException] = None) -> None:
+        """Stops and drops the shared client so the next acquire reconnects."""
+        async with self._lock:
+            client, self._client = self._client, None
+            self.started_at = None
+            if reason is not None:
+                self.failures += 1
+                self.last_error = f"{type(reason).__name__}: {reason}"
+            if client is None:
+                return
+            logger.info("Stopping shared Kafka %s...", self.name)
+            try:
+                await self._stop(client)
+            except Exception as e:
+                logger.warning("Error while stopping shared Kafka %s: %s", self.name, e)
+            logger.info("Shared Kafka %s stopped.", self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "connected": self.connected,
+            "age_seconds": round(now - self.started_at, 3) if self.started_at else None,
+            "idle_seconds": round(now - self.last_used_at, 3) if self.last_used_at else None,
+            "uses": self.uses,
+            "starts": self.starts,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class KafkaClientManager:
+    """Owns the producer, admin client and consumer pool shared by every tool call in serve().
+
+    Clients are started on first use (or by the background warm-up in start())
+    and kept open for the lifetime of the server. A client that fails with a
+    connection-level error is discarded and transparently reconnected by the
+    next call that needs it.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        producer_config: Optional[dict] = None,
+        consumer_config: Optional[dict] = None,
+        consumer_pool_size: int = 8,
+        producer_class: Optional[Callable[..., Any]] = None,
+        admin_client_class: Optional[Callable[..., Any]] = None,
+        consumer_class: Optional[Callable[..., Any]] = None,
+        transactional_id: Optional[str] = None,
+    ):
+        # The *_class arguments let tests and benchmarks substitute in-process
+        # stand-ins for the real clients. They default to the aiokafka clients,
+        # which are imported when the first client is created.
+        self.config = config
+        # Producer-only tuning (linger, batching, compression, acks, idempotence).
+        # The producer is idempotent unless configured otherwise.
+        self.producer_config = idempotent_producer_config(producer_config or {})
+        self._producer = ManagedClient(
+            "producer",
+            factory=lambda: (producer_class or import_kafka_clients()["producer"])(**self.config, **self.producer_config),
+            start=lambda client: client.start(),
+            stop=lambda client: client.stop(),
+        )
+        # Started on the first publish_transaction call and kept for the server
+        # lifetime. Transactions imply idempotence and acks=all, so those two
+        # settings are left to the client.
+        self.transactional_id = transactional_id or default_transactional_id()
+        self._transactional_producer = ManagedClient(
+            "transactional producer",
+            factory=lambda: (producer_class or import_kafka_clients()["producer"])(
+                **self.config,
+                **{k: v for k, v in self.producer_config.items() if k not in ("acks", "enable_idempotence")},
+                transactional_id=self.transactional_id,
+            ),
+            start=lambda client: client.start(),
+            stop=lambda client: client.stop(),
+        )
+        # A producer has at most one open transaction
+        self._transaction_lock = asyncio.Lock()
+        self._admin_client = ManagedClient(
+            "admin client",
+            factory=lambda: (admin_client_class or import_kafka_clients()["admin client"])(**self.config),
+            start=lambda client: client.start(),
+            stop=lambda client: client.close(),
+        )
+        self._consumers = ConsumerPool(config, consumer_config, max_size=consumer_pool_size, consumer_class=consumer_class)
+        # Unassigned consumer used only for ListOffsets lookups across any topics
+        self._offsets_consumer = ManagedClient(
+            "offsets consumer",
+            factory=lambda: (consumer_class or import_kafka_clients()["consumer"])(**self.config, group_id=None, enable_auto_commit=False),
+            start=lambda client: client.start(),
+            stop=lambda client: client.stop(),
+        )
+        self._created_at = time.monotonic()
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "KafkaClientManager":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self, warm: bool = True) -> None:
+        """Starts the manager, optionally warming the clients in the background.
+
+        Warm-up failures are only logged so the MCP server can come up even
+        while the brokers are unreachable; the clients reconnect on demand.
+        """
+        if warm and self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self._warm_up())
+
+    async def _warm_up(self) -> None:
+        # Import aiokafka on a worker thread so the event loop keeps answering
+        # initialize and list_tools while it loads
+        try:
+            await asyncio.to_thread(import_kafka_clients)
+        except ImportError as e:
+            logger.warning("Could not import aiokafka: %s", e)
+            return
+        for managed in (self._admin_client, self._producer):
+            try:
+                await managed.acquire()
+            except Exception as e:
+                logger.warning("Could not warm up Kafka %s, will retry on first use: %s", managed.name, e)
+
+    async def close(self) -> None:
+        """Stops all shared clients. Safe to call more than once."""
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            try:
+                await self._warmup_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._warmup_task = None
+        await asyncio.gather(
+            self._producer.reset(),
+            self._transactional_producer.reset(),
+            self._admin_client.reset(),
+            self._offsets_consumer.reset(),
+            self._consumers.close(),
+        )
+
+    @asynccontextmanager
+    async def _lease(self, managed: ManagedClient):
+        with METRICS.time_phase("client_acquire"):
+            client = await managed.acquire()
+        managed.leases += 1
+        try:
+            # Time spent holding the client is dominated by broker round trips
+            with METRICS.time_phase("broker_call"):
+                yield client
+        except reconnect_errors() as e:
+            logger.warning("Kafka %s hit a connection error, it will be reconnected: %s", managed.name, e)
+            await managed.reset(reason=e)
+            raise
+        finally:
+            managed.release()
+
+    def producer(self):
+        """Async context manager yielding the shared AIOKafkaProducer."""
+        return self._lease(self._producer)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Yields the shared transactional producer inside an open transaction.
+
+        Everything sent in the block commits atomically when it exits and is
+        aborted if it raises. Transactions run one at a time. A producer that
+        was fenced or lost its sequence state is replaced for the next call.
+        """
+        with METRICS.time_phase("client_acquire"):
+            await self._transaction_lock.acquire()
+        try:
+            async with self._lease(self._transactional_producer) as producer:
+                try:
+                    async with producer.transaction():
+                        yield producer
+                except transaction_fatal_errors() as e:
+                    logger.warning("Kafka transactional producer '%s' is unusable and will be recreated: %s", self.transactional_id, e)
+                    await self._transactional_producer.reset(reason=e)
+                    raise
+        finally:
+            self._transaction_lock.release()
+
+    def admin_client(self):
+        """Async context manager yielding the shared AIOKafkaAdminClient."""
+        return self._lease(self._admin_client)
+
+    def offsets_consumer(self):
+        """Async context manager yielding the shared consumer used for offset lookups."""
+        return self._lease(self._offsets_consumer)
+
+    def consumer(self, topic: str, partitions: List[int], isolation_level: str = "read_uncommitted"):
+        """Async context manager yielding a pooled consumer assigned to the given partitions.
+
+        With isolation_level="read_committed" records of aborted and still open
+        transactions are not returned.
+        """
+        return self._consumers.lease(topic, partitions, isolation_level)
+
+    @asynccontextmanager
+    async def dedicated_consumer(self, topic: str, partitions: List[int]):
+        """Yields a started consumer assigned to the given partitions and owned by the caller alone.
+
+        For long-running readers such as tail_topic and copy_messages, which
+        would otherwise hold a pooled consumer for minutes. It is stopped on exit.
+        """
+        from aiokafka.structs import TopicPartition
+        consumer = self._consumers.new_consumer()
+        try:
+            # Stopped in finally even if start() fails part way, to release its connections
+            with METRICS.time_phase("client_acquire"):
+                await consumer.start()
+            consumer.assign([TopicPartition(topic, p) for p in partitions])
+            yield consumer
+        finally:
+            await consumer.stop()
+
+    async def close_idle(self, idle_seconds: float) -> int:
+        """Stops every client, pooled consumers included, unused for idle_seconds.
+
+        Closed clients are started again by the next call that needs them.
+        Returns the number of clients closed.
+        """
+        closed = 0
+        for managed in (self._producer, self._transactional_producer, self._admin_client, self._offsets_consumer):
+            if await managed.close_if_idle(idle_seconds):
+                closed += 1
+        return closed + await self._consumers.close_idle(idle_seconds)
+
+    @property
+    def connected(self) -> bool:
+        """Whether any client, pooled consumers included, is currently started."""
+        return any(
+            managed.connected for managed in (self._producer, self._transactional_producer, self._admin_client, self._offsets_consumer)
+        ) or bool(self._consumers.size)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns health and age information for the shared clients."""
+        return {
+            "bootstrap_servers": self.config.get("bootstrap_servers"),
+            "uptime_seconds": round(time.monotonic() - self._created_at, 3),
+            "producer": self._producer.stats(),
+            "transactional_producer": {"transactional_id": self.transactional_id, **self._transactional_producer.stats()},
+            "admin_client": self._admin_client.stats(),
+            "offsets_consumer": self._offsets_consumer.stats(),
+            "consumer_pool": self._consumers.stats(),
+        }
+
+
+class _PooledConsumer:
+    """A pool entry: one assigned consumer plus the lock that serializes its readers."""
+
+    def __init__(self, managed: ManagedClient):
+        self.managed = managed
+        self.lock = asyncio.Lock()
+        self.evicted = False
+
+
+class ConsumerPool:
+    """Keeps warm, manually assigned consumers keyed by (topic, partitions, isolation level).
+
+    Pooled consumers have no group_id, so reusing one never triggers a group
+    join or rebalance. Partitions are paused between reads so an idle consumer
+    does not keep prefetching in the background. The least recently used idle
+    consumer is closed once the pool grows beyond max_size.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        consumer_config: Optional[dict] = None,
+        max_size: int = 8,
+        consumer_class: Optional[Callable[..., Any]] = None,
+    ):
+        self.config = config
+        # Consumer-only tuning (fetch sizes, max poll records)
+        self.consumer_config = consumer_config or {}
+        self.max_size = max_size
+        self.consumer_class = consumer_class
+        self._entries: "OrderedDict[Tuple[str, Tuple[int, ...], str], _PooledConsumer]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def new_consumer(self, isolation_level: str = "read_uncommitted") -> "AIOKafkaConsumer":
+        consumer_class = self.consumer_class or import_kafka_clients()["consumer"]
+        return consumer_class(
+            **self.config,
+            **self.consumer_config,
+            group_id=None,
+            enable_auto_commit=False,
+            auto_offset_reset="earliest",
+            isolation_level=isolation_level,
+        )
+
+    @staticmethod
+    async def _start_assigned(consumer: "AIOKafkaConsumer", partitions: List["TopicPartition"]) -> None:
+        await consumer.start()
+        consumer.assign(partitions)
+        consumer.pause(*partitions)
+
+    async def _checkout(self, key: Tuple[str, Tuple[int, ...], str]) -> _PooledConsumer:
+        from aiokafka.structs import TopicPartition
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            topic, partition_ids, isolation_level = key
+            assignment = [TopicPartition(topic, p) for p in partition_ids]
+            entry = _PooledConsumer(ManagedClient(
+                f"consumer for {topic}{list(partition_ids)}" + (f" ({isolation_level})" if isolation_level != "read_uncommitted" else ""),
+                factory=lambda: self.new_consumer(isolation_level),
+                start=lambda client: self._start_assigned(client, assignment),
+                stop=lambda client: client.stop(),
+            ))
+            self._entries[key] = entry
+            evicted = self._evict_idle()
+        for old in evicted:
+            await old.managed.reset()
+        return entry
+
+    def _evict_idle(self) -> List[_PooledConsumer]:
+        evicted = []
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_size:
+                break
+            entry = self._entries[key]
+            if not entry.lock.locked():
+                entry.evicted = True
+                evicted.append(self._entries.pop(key))
+        return evicted
+
+    @asynccontextmanager
+    async def lease(self, topic: str, partitions: List[int], isolation_level: str = "read_uncommitted"):
+        """Yields the pooled consumer assigned to exactly these partitions, for exclusive use."""
+        key = (topic, tuple(sorted(set(partitions))), isolation_level)
+        # Waiting for a busy consumer counts as acquisition, like connecting one
+        with METRICS.time_phase("client_acquire"):
+            while True:
+                entry = await self._checkout(key)
+                await entry.lock.acquire()
+                if not entry.evicted:
+                    break
+                # Evicted between checkout and lock; fetch a fresh entry instead
+                entry.lock.release()
+            try:
+                consumer = await entry.managed.acquire()
+            except BaseException:
+                entry.lock.release()
+                raise
+        entry.managed.leases += 1
+        try:
+            try:
+                with METRICS.time_phase("broker_call"):
+                    yield consumer
+            except reconnect_errors() as e:
+                logger.warning("Kafka %s hit a connection error, it will be reconnected: %s", entry.managed.name, e)
+                await entry.managed.reset(reason=e)
+                raise
+            finally:
+                # Stop background prefetching until the next lease resumes the partitions
+                if entry.managed.connected:
+                    consumer.pause(*consumer.assignment())
+        finally:
+            entry.managed.release()
+            entry.lock.release()
+
+    async def close_idle(self, idle_seconds: float) -> int:
+        """Closes and drops pooled consumers not leased for idle_seconds."""
+        now = time.monotonic()
+        async with self._lock:
+            idle = []
+            for key, entry in list(self._entries.items()):
+                last_used = entry.managed.last_used_at or 0
+                if not entry.lock.locked() and now - last_used >= idle_seconds:
+                    # A lease that checked this entry out but has not locked it yet retries
+                    entry.evicted = True
+                    idle.append(self._entries.pop(key))
+        for entry in idle:
+            await entry.managed.reset()
+        if idle:
+            logger.info("Closed %s pooled consumers after %ss idle.", len(idle), idle_seconds)
+        return len(idle)
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    async def close(self) -> None:
+        async with self._lock:
+            entries, self._entries = list(self._entries.values()), OrderedDict()
+        await asyncio.gather(*(entry.managed.reset() for entry in entries))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "consumers": {
+                f"{topic}:{','.join(map(str, partitions))}" + (f":{isolation_level}" if isolation_level != "read_uncommitted" else ""): entry.managed.stats()
+                for (topic, partitions, isolation_level), entry in self._entries.items()
+            },
+        }
@@ -0,0 +1,308 @@
+import asyncio
+import logging
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import anyio
+from mcp import types
+from mcp.server import Server, request_ctx
+from mcp.server.session import ServerSession
+from mcp.shared.context import RequestContext
+from mcp.shared.exceptions import McpError
+from mcp.shared.session import RequestResponder
+
+logger = logging.getLogger(__name__)
+
+ToolHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class ToolBusyError(Exception):
+    """Raised instead of queueing a call when a tool is saturated."""
+
+
+class ToolTimeoutError(Exception):
+    """Raised when a call exceeds its deadline; the tool's work is cancelled."""
+
+
+class ToolRateLimitError(Exception):
+    """Raised instead of running a call when its session exceeds its SessionLimits."""
+
+
+class ToolLimits:
+    """Admission limits of one tool.
+
+    At most max_concurrency calls run at once and at most max_queue more wait
+    for a slot; further calls fail fast with ToolBusyError. Each call,
+    including its time in the queue, is cancelled after timeout_seconds.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 32, timeout_seconds: float = 60.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout_seconds = timeout_seconds
+
+    def __repr__(self) -> str:
+        return f"ToolLimits(max_concurrency={self.max_concurrency}, max_queue={self.max_queue}, timeout_seconds={self.timeout_seconds})"
+
+
+def parse_tool_limit(spec: str, default: ToolLimits) -> "tuple[str, ToolLimits]":
+    """Parses 'NAME=CONCURRENCY[:QUEUE[:TIMEOUT_SECONDS]]' from the command line."""
+    name, _, values = spec.partition("=")
+    parts = values.split(":") if values else []
+    if not name or not parts or len(parts) > 3:
+        raise ValueError(f"Invalid tool limit '{spec}', expected NAME=CONCURRENCY[:QUEUE[:TIMEOUT_SECONDS]]")
+    return name, ToolLimits(
+        max_concurrency=int(parts[0]),
+        max_queue=int(parts[1]) if len(parts) > 1 else default.max_queue,
+        timeout_seconds=float(parts[2]) if len(parts) > 2 else default.timeout_seconds,
+    )
+
+
+class SessionLimits:
+    """Admission limits of one client session, for a server shared by many clients.
+
+    A session may start rate_per_second calls per second on average and up to
+    burst calls at once after being idle (a token bucket), and may have at
+    most max_concurrency calls running or queued. None disables a limit.
+    """
+
+    def __init__(self, rate_per_second: Optional[float] = None, burst: Optional[int] = None,
+                 max_concurrency: Optional[int] = None):
+        self.rate_per_second = rate_per_second
+        self.burst = burst if burst is not None else max(1, int(rate_per_second or 1))
+        self.max_concurrency = max_concurrency
+
+    def __repr__(self) -> str:
+        return f"SessionLimits(rate_per_second={self.rate_per_second}, burst={self.burst}, max_concurrency={self.max_concurrency})"
+
+
+class _SessionState:
+    __slots__ = ("tokens", "updated", "in_flight", "calls", "rejected")
+
+    def __init__(self, tokens: float):
+        self.tokens = tokens
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.calls = 0
+        self.rejected = 0
+
+
+class SessionLimiter:
+    """Applies SessionLimits to every session separately.
+
+    Sessions are tracked weakly, so a disconnected client's state goes away
+    with its session object. Over stdio there is a single session and the
+    limits apply to the whole server.
+    """
+
+    def __init__(self, limits: Optional[SessionLimits] = None):
+        self.limits = limits or SessionLimits()
+        self._sessions: "weakref.WeakKeyDictionary[Any, _SessionState]" = weakref.WeakKeyDictionary()
+        self.rejected = 0
+
+    def _state(self, session: Any) -> _SessionState:
+        state = self._sessions.get(session)
+        if state is None:
+            state = self._sessions[session] = _SessionState(float(self.limits.burst))
+        return state
+
+    @contextmanager
+    def admit(self, session: Any) -> Iterator[None]:
+        """Holds one of the session's call slots for the duration of a call, or raises ToolRateLimitError."""
+        limits = self.limits
+        state = self._state(session)
+        if limits.max_concurrency is not None and state.in_flight >= limits.max_concurrency:
+            state.rejected += 1
+            self.rejected += 1
+            raise ToolRateLimitError(
+                f"This session already has {state.in_flight} calls in flight (limit {limits.max_concurrency}). Retry later."
+            )
+        if limits.rate_per_second is not None:
+            now = time.monotonic()
+            state.tokens = min(float(limits.burst), state.tokens + (now - state.updated) * limits.rate_per_second)
+            state.updated = now
+            if state.tokens < 1:
+                state.rejected += 1
+                self.rejected += 1
+                wait = (1 - state.tokens) / limits.rate_per_second
+                raise ToolRateLimitError(
+                    f"This session is limited to {limits.rate_per_second:g} calls per second. Retry in {wait:.2f}s."
+                )
+            state.tokens -= 1
+        state.calls += 1
+        state.in_flight += 1
+        try:
+            yield
+        finally:
+            state.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        states = list(self._sessions.values())
+        return {
+            "sessions": len(states),
+            "in_flight": sum(state.in_flight for state in states),
+            "rejected_rate_limited": self.rejected,
+            "rate_per_second": self.limits.rate_per_second,
+            "burst": self.limits.burst,
+            "max_concurrency": self.limits.max_concurrency,
+        }
+
+
+class _ToolSlot:
+    __slots__ = ("name", "handler", "limits", "semaphore", "running", "waiting", "calls", "rejected", "timed_out")
+
+    def __init__(self, name: str, handler: ToolHandler, limits: ToolLimits):
+        self.name = name
+        self.handler = handler
+        self.limits = limits
+        self.semaphore = asyncio.Semaphore(limits.max_concurrency)
+        self.running = 0
+        self.waiting = 0
+        self.calls = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+
+class ToolDispatcher:
+    """Registry mapping tool names to handlers with per-tool admission control.
+
+    Cheap tools and slow ones get separate semaphores, so a burst of describes
+    or deletes cannot occupy the slots that keep list and get calls fast.
+    """
+
+    def __init__(self, default_limits: Optional[ToolLimits] = None, overrides: Optional[Dict[str, ToolLimits]] = None):
+        self.default_limits = default_limits or ToolLimits()
+        # Limits given here (e.g. from the command line) win over register() defaults
+        self.overrides = overrides or {}
+        self._tools: Dict[str, _ToolSlot] = {}
+
+    def register(self, name: str, handler: ToolHandler, limits: Optional[ToolLimits] = None) -> None:
+        limits = self.overrides.get(name) or limits or self.default_limits
+        self._tools[name] = _ToolSlot(name, handler, limits)
+
+    def tool(self, name: str, max_concurrency: Optional[int] = None, max_queue: Optional[int] = None,
+             timeout_seconds: Optional[float] = None):
+        """Decorator registering a handler, with limits defaulting to default_limits."""
+        defaults = self.default_limits
+        limits = ToolLimits(
+            max_concurrency=max_concurrency if max_concurrency is not None else defaults.max_concurrency,
+            max_queue=max_queue if max_queue is not None else defaults.max_queue,
+            timeout_seconds=timeout_seconds if timeout_seconds is not None else defaults.timeout_seconds,
+        )
+
+        def decorator(handler: ToolHandler) -> ToolHandler:
+            self.register(name, handler, limits)
+            return handler
+        return decorator
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._tools
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    async def dispatch(self, name: str, arguments: Dict[str, Any]) -> Any:
+        slot = self._tools.get(name)
+        if slot is None:
+            raise ValueError(f"Tool not found: {name}")
+        limits = slot.limits
+        if slot.semaphore.locked() and slot.waiting >= limits.max_queue:
+            slot.rejected += 1
+            raise ToolBusyError(
+                f"Tool '{name}' is busy ({slot.running} running, {slot.waiting} queued). Retry later."
+            )
+
+        # Tools with their own wait budget (e.g. consume timeout_ms) get at least that plus a grace period
+        timeout = limits.timeout_seconds
+        requested_ms = arguments.get("timeout_ms") if isinstance(arguments, dict) else None
+        if isinstance(requested_ms, (int, float)) and requested_ms > 0:
+            timeout = max(timeout, requested_ms / 1000 + 5)
+
+        slot.calls += 1
+        try:
+            return await asyncio.wait_for(self._run(slot, arguments), timeout=timeout)
+        except asyncio.TimeoutError:
+            slot.timed_out += 1
+            raise ToolTimeoutError(f"Tool '{name}' did not finish within {timeout:g}s and was cancelled.")
+
+    async def _run(self, slot: _ToolSlot, arguments: Dict[str, Any]) -> Any:
+        slot.waiting += 1
+        try:
+            await slot.semaphore.acquire()
+        finally:
+            slot.waiting -= 1
+        slot.running += 1
+        try:
+            return await slot.handler(arguments)
+        finally:
+            slot.running -= 1
+            slot.semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "running": slot.running,
+                "queued": slot.waiting,
+                "calls": slot.calls,
+                "rejected_busy": slot.rejected,
+                "timed_out": slot.timed_out,
+                "max_concurrency": slot.limits.max_concurrency,
+                "max_queue": slot.limits.max_queue,
+                "timeout_seconds": slot.limits.timeout_seconds,
+            }
+            for name, slot in self._tools.items()
+        }
+
+
+async def run_server_concurrently(
+    server: Server,
+    read_stream: Any,
+    write_stream: Any,
+    initialization_options: Any,
+    raise_exceptions: bool = False,
+) -> None:
+    """Like Server.run, but handles each request in its own task.
+
+    Server.run awaits every handler before reading the next message, so one
+    slow tool call blocks all others. Here requests run concurrently and
+    admission control is left to the ToolDispatcher. This mirrors Server.run
+    of mcp 1.1 (request_ctx, RequestContext), which is why pyproject pins mcp
+    below 1.2; check it again before raising that bound.
+    """
+    async def handle_request(message: RequestResponder, req: Any, session: ServerSession) -> None:
+        handler = server.request_handlers[type(req)]
+        token = request_ctx.set(RequestContext(message.request_id, message.request_meta, session))
+        try:
+            response = await handler(req)
+        except McpError as err:
+            response = err.error
+        except Exception as err:
+            if raise_exceptions:
+                raise
+            response = types.ErrorData(code=0, message=str(err), data=None)
+        finally:
+            request_ctx.reset(token)
+        await message.respond(response)
+
+    async def handle_notification(notify: Any) -> None:
+        try:
+            await server.notification_handlers[type(notify)](notify)
+        except Exception as err:
+            logger.error("Uncaught exception in notification handler: %s", err)
+
+    async with ServerSession(read_stream, write_stream, initialization_options) as session:
+        async with anyio.create_task_group() as tg:
+            async for message in session.incoming_messages:
+                if isinstance(message, RequestResponder):
+                    req = message.request.root
+                    if type(req) in server.request_handlers:
+                        tg.start_soon(handle_request, message, req, session)
+                    else:
+                        await message.respond(types.ErrorData(code=types.METHOD_NOT_FOUND, message="Method not found"))
+                elif isinstance(message, types.ClientNotification):
+                    if type(message.root) in server.notification_handlers:
+                        tg.start_soon(handle_notification, message.root)
+            # The client closed the stream; let in-flight calls finish and respond
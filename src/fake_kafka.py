@@ -0,0 +1,478 @@
+"""In-process stand-in for a Kafka cluster.
+
+Implements the subset of the producer, admin client and consumer APIs used by
+the handlers, with an optional simulated network round-trip per request, so
+the server can be exercised end to end without a broker (see benchmark.py).
+"""
+import asyncio
+import time
+import types
+import zlib
+from collections import defaultdict, namedtuple
+from typing import Any, Dict, List, Optional
+from aiokafka.coordinator.protocol import ConsumerProtocolMemberAssignment
+from aiokafka.errors import IllegalOperation, UnknownTopicOrPartitionError
+from aiokafka.protocol.admin import DeleteGroupsRequest, DeleteGroupsRequest_v0, DeleteGroupsResponse_v0, DescribeGroupsResponse_v0
+from aiokafka.protocol.commit import OffsetCommitRequest, OffsetCommitRequest_v2, OffsetCommitResponse_v2
+from aiokafka.structs import OffsetAndMetadata, OffsetAndTimestamp, TopicPartition
+
+RecordMetadata = namedtuple(
+    "RecordMetadata",
+    ["topic", "partition", "topic_partition", "offset", "timestamp", "timestamp_type", "log_start_offset"],
+)
+ConsumerRecord = namedtuple(
+    "ConsumerRecord",
+    ["topic", "partition", "offset", "timestamp", "timestamp_type", "key", "value",
+     "checksum", "serialized_key_size", "serialized_value_size", "headers"],
+)
+
+# Kafka protocol error codes returned by the fake broker
+_UNKNOWN_TOPIC = 3
+_NOT_COORDINATOR = 16
+_UNKNOWN_MEMBER_ID = 25
+_TOPIC_ALREADY_EXISTS = 36
+_NON_EMPTY_GROUP = 68
+_GROUP_ID_NOT_FOUND = 69
+
+
+class FakeKafkaCluster:
+    """Shared in-memory state: topics, partition logs and committed group offsets.
+
+    latency_ms is added to every simulated broker request and connect_ms to
+    every client start(), which makes connection reuse and request batching
+    visible in benchmarks. Consumer groups are spread over brokers coordinators
+    by a hash of their id.
+
+    Like a real broker, a transaction ends with a control marker in each of
+    its partitions: it takes an offset but is never returned to consumers.
+    Aborted records are returned only to read_uncommitted consumers, and
+    read_committed consumers see a partition end at its last stable offset.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, connect_ms: float = 0.0, brokers: int = 1):
+        self.latency = latency_ms / 1000
+        self.connect = connect_ms / 1000
+        self.brokers = brokers
+        self.topics: Dict[str, Dict[str, Any]] = {}
+        self.logs: Dict[TopicPartition, List[ConsumerRecord]] = defaultdict(list)
+        # Offsets of transaction markers, and of records of aborted transactions
+        self.markers: Dict[TopicPartition, set] = defaultdict(set)
+        self.aborted: Dict[TopicPartition, set] = defaultdict(set)
+        # First offset of each partition's ongoing transaction
+        self.open_transactions: Dict[TopicPartition, int] = {}
+        self.group_offsets: Dict[str, Dict[TopicPartition, int]] = defaultdict(dict)
+        # group id -> active members as {"member_id", "client_id", "client_host", "assignment": {topic: [partitions]}}
+        self.group_members: Dict[str, List[Dict[str, Any]]] = {}
+        self.cluster_id = "fake-cluster"
+        self.requests = 0
+        self.connections = 0
+        self._next_partition = 0
+        self._new_data = asyncio.Event()
+
+    def coordinator(self, group_id: str) -> int:
+        return zlib.crc32(group_id.encode('utf-8')) % self.brokers
+
+    def group_state(self, group_id: str) -> str:
+        if self.group_members.get(group_id):
+            return "Stable"
+        return "Empty" if group_id in self.group_offsets else "Dead"
+
+    def create_topic(self, name: str, num_partitions: int = 1, configs: Optional[Dict[str, str]] = None) -> None:
+        self.topics[name] = {"partitions": num_partitions, "configs": dict(configs or {})}
+
+    def append(self, topic: str, value: Optional[bytes], key: Optional[bytes] = None,
+               partition: Optional[int] = None, headers: Optional[List] = None,
+               timestamp_ms: Optional[int] = None) -> RecordMetadata:
+        if topic not in self.topics:
+            raise UnknownTopicOrPartitionError(f"Topic '{topic}' not found.")
+        num_partitions = self.topics[topic]["partitions"]
+        if partition is None:
+            if key is not None:
+                partition = zlib.crc32(key) % num_partitions
+            else:
+                partition = self._next_partition % num_partitions
+                self._next_partition += 1
+        tp = TopicPartition(topic, partition)
+        log = self.logs[tp]
+        timestamp = timestamp_ms if timestamp_ms is not None else int(time.time() * 1000)
+        log.append(ConsumerRecord(
+            topic, partition, len(log), timestamp, 0, key, value, None,
+            len(key) if key is not None else -1, len(value) if value is not None else -1, list(headers or []),
+        ))
+        self._new_data.set()
+        return RecordMetadata(topic, partition, tp, len(log) - 1, timestamp, 0, 0)
+
+    def end_transaction(self, offsets: Dict[TopicPartition, List[int]], commit: bool) -> None:
+        """Writes the commit or abort marker after a transaction's records."""
+        for tp, sent in offsets.items():
+            self.open_transactions.pop(tp, None)
+            if not commit:
+                self.aborted[tp].update(sent)
+            self.markers[tp].add(len(self.logs[tp]))
+            self.logs[tp].append(ConsumerRecord(tp.topic, tp.partition, len(self.logs[tp]), int(time.time() * 1000), 0,
+                                                None, None, None, -1, -1, []))
+        self._new_data.set()
+
+    def stable_end(self, tp: TopicPartition) -> int:
+        """The last stable offset: the end, or the start of the ongoing transaction."""
+        return self.open_transactions.get(tp, len(self.logs.get(tp, ())))
+
+    async def round_trip(self) -> None:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def wait_for_data(self, timeout: float) -> None:
+        self._new_data.clear()
+        try:
+            await asyncio.wait_for(self._new_data.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def partitions(self, topic: str) -> List[TopicPartition]:
+        return [TopicPartition(topic, p) for p in range(self.topics[topic]["partitions"])]
+
+    def client_classes(self) -> Dict[str, Any]:
+        """Keyword arguments for KafkaClientManager that route it to this cluster."""
+        cluster = self
+        return {
+            "producer_class": lambda **config: FakeProducer(cluster, **config),
+            "admin_client_class": lambda **config: FakeAdminClient(cluster, **config),
+            "consumer_class": lambda **config: FakeConsumer(cluster, **config),
+        }
+
+
+class _FakeClient:
+    def __init__(self, cluster: FakeKafkaCluster, **config):
+        self.cluster = cluster
+        self.config = config
+
+    async def start(self) -> None:
+        self.cluster.connections += 1
+        if self.cluster.connect:
+            await asyncio.sleep(self.cluster.connect)
+
+    async def stop(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeProducer(_FakeClient):
+    """Accumulates sends and acknowledges them in one simulated request per flush/linger."""
+
+    def __init__(self, cluster: FakeKafkaCluster, **config):
+        super().__init__(cluster, **config)
+        self._pending: List[asyncio.Future] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        # Offsets sent by the ongoing transaction, per partition
+        self._transaction: Optional[Dict[TopicPartition, List[int]]] = None
+
+    async def send(self, topic, value=None, key=None, partition=None, timestamp_ms=None, headers=None):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            metadata = self.cluster.append(topic, value, key, partition, headers, timestamp_ms)
+        except Exception as e:
+            future.set_exception(e)
+            return future
+        future.metadata = metadata
+        if self._transaction is not None:
+            self._transaction.setdefault(metadata.topic_partition, []).append(metadata.offset)
+            self.cluster.open_transactions.setdefault(metadata.topic_partition, metadata.offset)
+        self._pending.append(future)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._deliver())
+        return future
+
+    async def send_and_wait(self, topic, value=None, key=None, partition=None, timestamp_ms=None, headers=None):
+        future = await self.send(topic, value, key, partition, timestamp_ms, headers)
+        return await future
+
+    async def _deliver(self) -> None:
+        linger = self.config.get("linger_ms", 0) / 1000
+        if linger:
+            await asyncio.sleep(linger)
+        await self.cluster.round_trip()
+        pending, self._pending = self._pending, []
+        self._flush_task = None
+        for future in pending:
+            if not future.done():
+                future.set_result(future.metadata)
+
+    async def flush(self) -> None:
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+
+    def transaction(self) -> "_FakeTransaction":
+        if not self.config.get("transactional_id"):
+            raise IllegalOperation("You need to configure transaction_id to use transactions")
+        return _FakeTransaction(self)
+
+
+class _FakeTransaction:
+    """Begin/commit/abort round trips of a transaction. Records are appended as
+    they are sent and followed by a marker when the transaction ends."""
+
+    def __init__(self, producer: FakeProducer):
+        self.producer = producer
+
+    async def __aenter__(self) -> "_FakeTransaction":
+        await self.producer.cluster.round_trip()
+        self.producer._transaction = {}
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        offsets, self.producer._transaction = self.producer._transaction, None
+        if exc_type is None:
+            await self.producer.flush()
+        # EndTxn, committing or aborting
+        await self.producer.cluster.round_trip()
+        self.producer.cluster.end_transaction(offsets, commit=exc_type is None)
+
+
+class FakeAdminClient(_FakeClient):
+
+    async def describe_cluster(self) -> Dict[str, Any]:
+        await self.cluster.round_trip()
+        return {"cluster_id": self.cluster.cluster_id, "controller_id": 0, "brokers": [{"node_id": node, "host": "fake", "port": 9092, "rack": None} for node in range(self.cluster.brokers)]}
+
+    async def list_topics(self) -> List[str]:
+        await self.cluster.round_trip()
+        return list(self.cluster.topics)
+
+    async def describe_topics(self, topics: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        await self.cluster.round_trip()
+        result = []
+        for name in (topics if topics is not None else list(self.cluster.topics)):
+            topic = self.cluster.topics.get(name)
+            if topic is None:
+                result.append({"error_code": _UNKNOWN_TOPIC, "topic": name, "is_internal": False, "partitions": []})
+                continue
+            result.append({
+                "error_code": 0,
+                "topic": name,
+                "is_internal": name.startswith("__"),
+                "partitions": [
+                    {"error_code": 0, "partition": p, "leader": 0, "replicas": [0], "isr": [0], "offline_replicas": []}
+                    for p in range(topic["partitions"])
+                ],
+            })
+        return result
+
+    async def describe_configs(self, config_resources, include_synonyms: bool = False):
+        await self.cluster.round_trip()
+        resources = []
+        for resource in config_resources:
+            topic = self.cluster.topics.get(resource.name)
+            if topic is None:
+                resources.append((_UNKNOWN_TOPIC, "Unknown topic", resource.resource_type, resource.name, []))
+            else:
+                entries = [(name, value, False, False, False) for name, value in topic["configs"].items()]
+                resources.append((0, None, resource.resource_type, resource.name, entries))
+        return [types.SimpleNamespace(resources=resources)]
+
+    async def create_topics(self, new_topics, timeout_ms: Optional[int] = None, validate_only: bool = False):
+        await self.cluster.round_trip()
+        topic_errors = []
+        for new_topic in new_topics:
+            if new_topic.name in self.cluster.topics:
+                topic_errors.append((new_topic.name, _TOPIC_ALREADY_EXISTS, f"Topic '{new_topic.name}' already exists."))
+                continue
+            if not validate_only:
+                self.cluster.create_topic(new_topic.name, new_topic.num_partitions, new_topic.topic_configs)
+            topic_errors.append((new_topic.name, 0, None))
+        return types.SimpleNamespace(topic_errors=topic_errors)
+
+    async def alter_configs(self, config_resources):
+        await self.cluster.round_trip()
+        resources = []
+        for resource in config_resources:
+            topic = self.cluster.topics.get(resource.name)
+            if topic is None:
+                resources.append((_UNKNOWN_TOPIC, "Unknown topic", resource.resource_type, resource.name))
+            else:
+                # AlterConfigs replaces the whole set of overrides
+                topic["configs"] = dict(resource.configs or {})
+                resources.append((0, None, resource.resource_type, resource.name))
+        return [types.SimpleNamespace(resources=resources)]
+
+    async def delete_topics(self, topics: List[str], timeout_ms: Optional[int] = None):
+        await self.cluster.round_trip()
+        for name in topics:
+            if self.cluster.topics.pop(name, None) is None:
+                raise UnknownTopicOrPartitionError(f"Topic '{name}' not found.")
+            for tp in [tp for tp in self.cluster.logs if tp.topic == name]:
+                del self.cluster.logs[tp]
+                self.cluster.markers.pop(tp, None)
+                self.cluster.aborted.pop(tp, None)
+        return types.SimpleNamespace(topic_error_codes=[(name, 0) for name in topics])
+
+    async def list_consumer_groups(self, broker_ids=None):
+        # Like aiokafka: one ListGroups request per broker, one after the other
+        for _ in (broker_ids if broker_ids is not None else range(self.cluster.brokers)):
+            await self.cluster.round_trip()
+        return [
+            (group_id, "consumer") for group_id in {**self.cluster.group_offsets, **self.cluster.group_members}
+            if broker_ids is None or self.cluster.coordinator(group_id) in broker_ids
+        ]
+
+    async def find_coordinator(self, group_id: str, coordinator_type: int = 0) -> int:
+        await self.cluster.round_trip()
+        return self.cluster.coordinator(group_id)
+
+    async def describe_consumer_groups(self, group_ids: List[str], group_coordinator_id: Optional[int] = None,
+                                       include_authorized_operations: bool = False):
+        # Like aiokafka: one coordinator lookup per group unless given, then one request per coordinator
+        nodes: Dict[int, List[str]] = defaultdict(list)
+        for group_id in group_ids:
+            node = group_coordinator_id if group_coordinator_id is not None else await self.find_coordinator(group_id)
+            nodes[node].append(group_id)
+        responses = []
+        for node, groups in nodes.items():
+            await self.cluster.round_trip()
+            described = []
+            for group_id in groups:
+                if self.cluster.coordinator(group_id) != node:
+                    described.append((_NOT_COORDINATOR, group_id, "", "", "", []))
+                    continue
+                members = [
+                    (member["member_id"], member["client_id"], member["client_host"], b"",
+                     ConsumerProtocolMemberAssignment(0, sorted(member["assignment"].items()), b"").encode())
+                    for member in self.cluster.group_members.get(group_id, [])
+                ]
+                state = self.cluster.group_state(group_id)
+                described.append((0, group_id, state, "consumer" if state != "Dead" else "", "range" if members else "", members))
+            responses.append(DescribeGroupsResponse_v0(groups=described))
+        return responses
+
+    async def _send_request(self, request, node_id: Optional[int] = None):
+        # Group requests aiokafka's admin client has no method for
+        await self.cluster.round_trip()
+        if isinstance(request, OffsetCommitRequest):
+            struct = request.build(OffsetCommitRequest_v2)
+            group_id = struct.consumer_group
+            if self.cluster.coordinator(group_id) != node_id:
+                error = _NOT_COORDINATOR
+            elif self.cluster.group_members.get(group_id):
+                # Only members of an active group may commit
+                error = _UNKNOWN_MEMBER_ID
+            else:
+                error = 0
+                for topic, partitions in struct.topics:
+                    for partition, offset, _ in partitions:
+                        self.cluster.group_offsets[group_id][TopicPartition(topic, partition)] = offset
+            return OffsetCommitResponse_v2(topics=[
+                (topic, [(partition, error) for partition, _, _ in partitions]) for topic, partitions in struct.topics
+            ])
+        if isinstance(request, DeleteGroupsRequest):
+            results = []
+            for group_id in request.build(DeleteGroupsRequest_v0).groups_names:
+                if self.cluster.coordinator(group_id) != node_id:
+                    results.append((group_id, _NOT_COORDINATOR))
+                elif self.cluster.group_members.get(group_id):
+                    results.append((group_id, _NON_EMPTY_GROUP))
+                elif group_id not in self.cluster.group_offsets:
+                    results.append((group_id, _GROUP_ID_NOT_FOUND))
+                else:
+                    del self.cluster.group_offsets[group_id]
+                    results.append((group_id, 0))
+            return DeleteGroupsResponse_v0(throttle_time_ms=0, results=results)
+        raise NotImplementedError(f"The fake cluster does not handle {type(request).__name__}.")
+
+    async def list_consumer_group_offsets(self, group_id: str, group_coordinator_id=None, partitions=None):
+        if group_coordinator_id is None:
+            await self.find_coordinator(group_id)
+        await self.cluster.round_trip()
+        offsets = self.cluster.group_offsets.get(group_id, {})
+        return {
+            tp: OffsetAndMetadata(offset, "")
+            for tp, offset in offsets.items()
+            if partitions is None or tp in partitions
+        }
+
+
+class FakeConsumer(_FakeClient):
+    """Group-less consumer supporting manual assignment, seeking and bounded fetches."""
+
+    def __init__(self, cluster: FakeKafkaCluster, **config):
+        super().__init__(cluster, **config)
+        self._assignment: List[TopicPartition] = []
+        self._positions: Dict[TopicPartition, int] = {}
+        self._paused: set = set()
+        self._read_committed = config.get("isolation_level") == "read_committed"
+
+    def _end(self, tp: TopicPartition) -> int:
+        return self.cluster.stable_end(tp) if self._read_committed else len(self.cluster.logs.get(tp, ()))
+
+    def _visible(self, tp: TopicPartition, offset: int) -> bool:
+        if offset in self.cluster.markers.get(tp, ()):
+            return False
+        return not (self._read_committed and offset in self.cluster.aborted.get(tp, ()))
+
+    def assign(self, partitions: List[TopicPartition]) -> None:
+        self._assignment = list(partitions)
+        self._positions = {tp: 0 for tp in partitions}
+
+    def assignment(self) -> set:
+        return set(self._assignment)
+
+    def pause(self, *partitions: TopicPartition) -> None:
+        self._paused.update(partitions)
+
+    def resume(self, *partitions: TopicPartition) -> None:
+        self._paused.difference_update(partitions)
+
+    def seek(self, partition: TopicPartition, offset: int) -> None:
+        self._positions[partition] = offset
+
+    async def position(self, partition: TopicPartition) -> int:
+        return self._positions[partition]
+
+    async def beginning_offsets(self, partitions: List[TopicPartition]) -> Dict[TopicPartition, int]:
+        await self.cluster.round_trip()
+        return {tp: 0 for tp in partitions}
+
+    async def end_offsets(self, partitions: List[TopicPartition]) -> Dict[TopicPartition, int]:
+        await self.cluster.round_trip()
+        return {tp: self._end(tp) for tp in partitions}
+
+    async def offsets_for_times(self, timestamps: Dict[TopicPartition, int]) -> Dict[TopicPartition, Optional[OffsetAndTimestamp]]:
+        await self.cluster.round_trip()
+        result = {}
+        for tp, timestamp in timestamps.items():
+            match = next((r for r in self.cluster.logs.get(tp, ())
+                          if r.timestamp >= timestamp and self._visible(tp, r.offset)), None)
+            result[tp] = OffsetAndTimestamp(match.offset, match.timestamp) if match else None
+        return result
+
+    async def getmany(self, *partitions: TopicPartition, timeout_ms: int = 0, max_records: Optional[int] = None):
+        partitions = [tp for tp in (partitions or self._assignment) if tp not in self._paused]
+        limit = max_records or self.config.get("max_poll_records") or 500
+        deadline = asyncio.get_running_loop().time() + timeout_ms / 1000
+        while True:
+            result: Dict[TopicPartition, List[ConsumerRecord]] = {}
+            remaining = limit
+            for tp in partitions:
+                position = self._positions.get(tp, 0)
+                log = self.cluster.logs.get(tp, [])
+                end = self._end(tp)
+                records = []
+                # Markers and hidden aborted records are skipped, but still move the position
+                while position < end and len(records) < remaining:
+                    if self._visible(tp, position):
+                        records.append(log[position])
+                    position += 1
+                self._positions[tp] = position
+                if records:
+                    result[tp] = records
+                    remaining -= len(records)
+                if not remaining:
+                    break
+            if result:
+                await self.cluster.round_trip()
+                return result
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                return {}
+            await self.cluster.wait_for_data(timeout)
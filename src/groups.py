@@ -0,0 +1,416 @@
+import asyncio
+import fnmatch
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .logging_setup import HOT_PATH
+
+# Imported on first call like in admin.py, to keep aiokafka out of startup
+if TYPE_CHECKING:
+    from aiokafka import AIOKafkaConsumer
+    from aiokafka.admin import AIOKafkaAdminClient
+
+logger = logging.getLogger(__name__)
+
+# Groups whose committed offsets may be changed or which may be deleted: no
+# member is consuming. "Dead" is a group that does not exist yet or any more.
+INACTIVE_STATES = ("Empty", "Dead")
+
+
+def _error_name(error: Any) -> str:
+    return f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+
+
+async def find_coordinators(
+    admin_client: "AIOKafkaAdminClient",
+    group_ids: List[str],
+    max_concurrency: int = 16,
+) -> Tuple[Dict[int, List[str]], Dict[str, str]]:
+    """Looks up every group's coordinator concurrently.
+
+    aiokafka's describe_consumer_groups looks coordinators up one group at a
+    time; here the lookups overlap, bounded by max_concurrency. Returns the
+    groups of each coordinator and the lookup error of every group that failed.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def lookup(group_id: str) -> int:
+        async with semaphore:
+            return await admin_client.find_coordinator(group_id)
+
+    found = await asyncio.gather(*(lookup(group_id) for group_id in group_ids), return_exceptions=True)
+    by_node: Dict[int, List[str]] = defaultdict(list)
+    errors: Dict[str, str] = {}
+    for group_id, node in zip(group_ids, found):
+        if isinstance(node, Exception):
+            errors[group_id] = _error_name(node)
+        else:
+            by_node[node].append(group_id)
+    return dict(by_node), errors
+
+
+def _format_group(group: Dict[str, Any], coordinator: int) -> Dict[str, Any]:
+    from aiokafka.coordinator.protocol import ConsumerProtocolMemberAssignment
+    members = []
+    for member in group["members"]:
+        assignment: Optional[Dict[str, List[int]]] = None
+        if group["protocol_type"] == "consumer" and member["member_assignment"]:
+            try:
+                decoded = ConsumerProtocolMemberAssignment.decode(member["member_assignment"])
+                assignment = {topic: sorted(partitions) for topic, partitions in decoded.assignment}
+            except Exception as e:
+                logger.debug("Could not decode assignment of member '%s' of group '%s': %s", member["member_id"], group["group"], e)
+        members.append({
+            "member_id": member["member_id"],
+            "client_id": member["client_id"],
+            "client_host": member["client_host"],
+            "assignment": assignment,
+        })
+    return {
+        "group_id": group["group"],
+        "state": group["state"],
+        "protocol_type": group["protocol_type"],
+        "assignor": group["protocol"] or None,
+        "coordinator": coordinator,
+        "members": members,
+    }
+
+
+async def describe_groups(
+    admin_client: "AIOKafkaAdminClient",
+    group_ids: List[str],
+    max_concurrency: int = 16,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """Describes groups with one DescribeGroups request per coordinator, all coordinators concurrently.
+
+    Returns the description of every group that could be described and the
+    error of every other group.
+    """
+    from aiokafka.errors import for_code
+    by_node, errors = await find_coordinators(admin_client, group_ids, max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def describe(node: int, groups: List[str]) -> List[Any]:
+        async with semaphore:
+            return await admin_client.describe_consumer_groups(groups, group_coordinator_id=node)
+
+    nodes = list(by_node)
+    responses = await asyncio.gather(*(describe(node, by_node[node]) for node in nodes), return_exceptions=True)
+    described: Dict[str, Dict[str, Any]] = {}
+    for node, node_responses in zip(nodes, responses):
+        if isinstance(node_responses, Exception):
+            for group_id in by_node[node]:
+                errors[group_id] = _error_name(node_responses)
+            continue
+        for response in node_responses:
+            for group in response.to_object()["groups"]:
+                if group["error_code"]:
+                    errors[group["group"]] = for_code(group["error_code"]).__name__
+                else:
+                    described[group["group"]] = _format_group(group, node)
+    return described, errors
+
+
+async def list_groups(admin_client: "AIOKafkaAdminClient") -> List[Tuple[str, str, int]]:
+    """Lists the (group id, protocol type, coordinator) of every group, asking all brokers at once.
+
+    aiokafka's list_consumer_groups asks the brokers one after the other. A
+    broker lists the groups it coordinates, so no coordinator lookups are needed.
+    """
+    brokers = [broker["node_id"] for broker in (await admin_client.describe_cluster())["brokers"]]
+    per_broker = await asyncio.gather(*(admin_client.list_consumer_groups(broker_ids=[node]) for node in brokers))
+    return sorted({(group_id, protocol_type, node) for node, groups in zip(brokers, per_broker) for group_id, protocol_type in groups})
+
+
+async def handle_list_consumer_groups(
+    admin_client: "AIOKafkaAdminClient",
+    prefix: Optional[str] = None,
+    pattern: Optional[str] = None,
+    include_state: bool = False,
+    states: Optional[List[str]] = None,
+    max_concurrency: int = 16,
+) -> Dict[str, Any]:
+    """Lists consumer groups, optionally with their state from batched, concurrent describes."""
+    logger.info("Listing consumer groups...", extra=HOT_PATH)
+    try:
+        listed = await list_groups(admin_client)
+        groups = [
+            {"group_id": group_id, "protocol_type": protocol_type or None}
+            for group_id, protocol_type, _ in listed
+            if (not prefix or group_id.startswith(prefix)) and (not pattern or fnmatch.fnmatchcase(group_id, pattern))
+        ]
+        errors: Dict[str, str] = {}
+        if include_state or states:
+            described, errors = await describe_groups(admin_client, [g["group_id"] for g in groups], max_concurrency)
+            for group in groups:
+                description = described.get(group["group_id"])
+                group["state"] = description["state"] if description else None
+                group["members"] = len(description["members"]) if description else None
+            if states:
+                groups = [group for group in groups if group["state"] in states]
+        logger.info("Listed %s consumer groups.", len(groups), extra=HOT_PATH)
+        result: Dict[str, Any] = {"count": len(groups), "groups": groups}
+        if errors:
+            result["errors"] = [{"group_id": group_id, "error": error} for group_id, error in sorted(errors.items())]
+        return result
+    except Exception as e:
+        logger.error("Failed to list consumer groups: %s", e, exc_info=True)
+        raise
+
+
+async def fetch_committed(
+    admin_client: "AIOKafkaAdminClient",
+    coordinators: Dict[str, int],
+    max_concurrency: int,
+) -> Dict[str, Any]:
+    """Committed offsets of every group from its known coordinator, concurrently; failures are returned as exceptions."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(group_id: str):
+        async with semaphore:
+            return await admin_client.list_consumer_group_offsets(group_id, group_coordinator_id=coordinators[group_id])
+
+    group_ids = list(coordinators)
+    fetched = await asyncio.gather(*(fetch(group_id) for group_id in group_ids), return_exceptions=True)
+    return dict(zip(group_ids, fetched))
+
+
+async def handle_describe_consumer_groups(
+    admin_client: "AIOKafkaAdminClient",
+    consumer: "AIOKafkaConsumer",
+    group_ids: List[str],
+    include_offsets: bool = True,
+    max_concurrency: int = 16,
+) -> Dict[str, Any]:
+    """Describes consumer groups: state, members and their assignments, and committed offsets with lag.
+
+    Descriptions cost one DescribeGroups request per coordinator. Committed
+    offsets are fetched per group concurrently from the coordinator found
+    while describing, and the end offsets of every partition of every group
+    with one lookup, which the consumer batches per partition leader.
+    """
+    logger.info("Describing %s consumer groups...", len(group_ids), extra=HOT_PATH)
+    try:
+        described, errors = await describe_groups(admin_client, group_ids, max_concurrency)
+        if include_offsets and described:
+            committed = await fetch_committed(admin_client, {g: d["coordinator"] for g, d in described.items()}, max_concurrency)
+            tps = sorted({tp for offsets in committed.values() if not isinstance(offsets, Exception) for tp in offsets})
+            end_offsets = await consumer.end_offsets(tps) if tps else {}
+            for group_id, offsets in committed.items():
+                group = described[group_id]
+                if isinstance(offsets, Exception):
+                    group["offsets_error"] = _error_name(offsets)
+                    continue
+                owners = {
+                    (topic, partition): member["client_id"]
+                    for member in group["members"]
+                    for topic, partitions in (member["assignment"] or {}).items()
+                    for partition in partitions
+                }
+                topics: Dict[str, Any] = {}
+                for tp, meta in sorted(offsets.items()):
+                    if meta.offset < 0:
+                        continue
+                    lag = max(end_offsets[tp] - meta.offset, 0)
+                    entry = topics.setdefault(tp.topic, {"lag": 0, "partitions": []})
+                    entry["lag"] += lag
+                    entry["partitions"].append({
+                        "partition": tp.partition,
+                        "committed_offset": meta.offset,
+                        "end_offset": end_offsets[tp],
+                        "lag": lag,
+                        "owner": owners.get((tp.topic, tp.partition)),
+                    })
+                group["total_lag"] = sum(t["lag"] for t in topics.values())
+                group["topics"] = topics
+
+        groups = [described[group_id] for group_id in group_ids if group_id in described]
+        logger.info("Described %s consumer groups (%s errors).", len(groups), len(errors), extra=HOT_PATH)
+        return {
+            "count": len(groups),
+            "groups": groups,
+            "errors": [{"group_id": group_id, "error": error} for group_id, error in sorted(errors.items())],
+        }
+    except Exception as e:
+        logger.error("Failed to describe consumer groups: %s", e, exc_info=True)
+        raise
+
+
+async def resolve_reset_offsets(
+    consumer: "AIOKafkaConsumer",
+    topic_partitions: Dict[str, List[int]],
+    to: str,
+    timestamp_ms: Optional[int] = None,
+    offsets: Optional[Dict[str, Dict[int, int]]] = None,
+) -> Dict[Any, int]:
+    """The offset every partition is reset to, looked up once for all groups.
+
+    'earliest' and 'latest' are the partition's beginning and end offsets,
+    'timestamp' the first offset at or after timestamp_ms (the end offset if
+    there is none), and 'offsets' the explicit offsets, clamped to the range
+    that still exists.
+    """
+    from aiokafka.structs import TopicPartition
+    tps = [TopicPartition(topic, p) for topic, partitions in topic_partitions.items() for p in partitions]
+    beginning_offsets, end_offsets = await asyncio.gather(consumer.beginning_offsets(tps), consumer.end_offsets(tps))
+    if to == "earliest":
+        return dict(beginning_offsets)
+    if to == "latest":
+        return dict(end_offsets)
+    if to == "timestamp":
+        if timestamp_ms is None:
+            raise ValueError("Resetting to a timestamp requires 'timestamp_ms'.")
+        found = await consumer.offsets_for_times({tp: timestamp_ms for tp in tps})
+        return {tp: found[tp].offset if found.get(tp) else end_offsets[tp] for tp in tps}
+    if to == "offsets":
+        targets = {}
+        for tp in tps:
+            offset = (offsets or {}).get(tp.topic, {}).get(tp.partition)
+            if offset is not None:
+                targets[tp] = min(max(offset, beginning_offsets[tp]), end_offsets[tp])
+        if not targets:
+            raise ValueError("Resetting to explicit offsets requires 'offsets' for at least one partition.")
+        return targets
+    raise ValueError(f"Unknown reset target '{to}'.")
+
+
+async def handle_reset_consumer_group_offsets(
+    admin_client: "AIOKafkaAdminClient",
+    consumer: "AIOKafkaConsumer",
+    group_ids: List[str],
+    topic_partitions: Dict[str, List[int]],
+    to: str,
+    timestamp_ms: Optional[int] = None,
+    offsets: Optional[Dict[str, Dict[int, int]]] = None,
+    dry_run: bool = False,
+    max_concurrency: int = 16,
+) -> Dict[str, Any]:
+    """Resets the committed offsets of many consumer groups on the given partitions.
+
+    Groups are described first (one request per coordinator) and only groups
+    without active members are reset, as the broker would reject the rest.
+    Target offsets are resolved once for all groups. Each group then gets a
+    single OffsetCommit request with all of its new offsets, sent to its
+    coordinator, with up to max_concurrency groups committing at a time.
+    With dry_run the new offsets are only reported.
+    """
+    from aiokafka.errors import for_code
+    from aiokafka.protocol.commit import OffsetCommitRequest
+    logger.info("Resetting offsets of %s consumer groups to %s%s...", len(group_ids), to, " (dry run)" if dry_run else "", extra=HOT_PATH)
+    try:
+        described, errors = await describe_groups(admin_client, group_ids, max_concurrency)
+        eligible = {}
+        for group_id, group in described.items():
+            if group["state"] in INACTIVE_STATES:
+                eligible[group_id] = group["coordinator"]
+            else:
+                errors[group_id] = f"Group is {group['state']} with {len(group['members'])} members; stop its consumers first."
+        targets = await resolve_reset_offsets(consumer, topic_partitions, to, timestamp_ms, offsets)
+        committed = await fetch_committed(admin_client, eligible, max_concurrency)
+
+        by_topic: Dict[str, List[Tuple[int, int, str]]] = defaultdict(list)
+        for tp, offset in sorted(targets.items()):
+            by_topic[tp.topic].append((tp.partition, offset, ""))
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def commit(group_id: str) -> List[str]:
+            # aiokafka's admin client has no AlterConsumerGroupOffsets; a
+            # group-less OffsetCommit (generation -1) to the coordinator is what
+            # kafka-consumer-groups.sh --reset-offsets sends for inactive groups
+            request = OffsetCommitRequest(
+                group_id,
+                OffsetCommitRequest.DEFAULT_GENERATION_ID,
+                "",
+                OffsetCommitRequest.DEFAULT_RETENTION_TIME,
+                list(by_topic.items()),
+            )
+            async with semaphore:
+                response = await admin_client._send_request(request, eligible[group_id])
+            return [
+                f"{topic}[{partition}]: {for_code(error_code).__name__}"
+                for topic, partitions in response.topics
+                for partition, error_code in partitions
+                if error_code
+            ]
+
+        group_list = [group_id for group_id in group_ids if group_id in eligible]
+        if dry_run:
+            outcomes: List[Any] = [[] for _ in group_list]
+        else:
+            outcomes = await asyncio.gather(*(commit(group_id) for group_id in group_list), return_exceptions=True)
+
+        groups = []
+        for group_id, outcome in zip(group_list, outcomes):
+            if isinstance(outcome, Exception) or outcome:
+                errors[group_id] = _error_name(outcome) if isinstance(outcome, Exception) else "; ".join(outcome)
+                continue
+            previous = committed.get(group_id)
+            previous = previous if isinstance(previous, dict) else {}
+            topics: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for tp, offset in sorted(targets.items()):
+                meta = previous.get(tp)
+                topics[tp.topic].append({
+                    "partition": tp.partition,
+                    "previous_offset": meta.offset if meta is not None and meta.offset >= 0 else None,
+                    "new_offset": offset,
+                })
+            groups.append({"group_id": group_id, "state": described[group_id]["state"], "topics": dict(topics)})
+
+        logger.info("Reset offsets of %s consumer groups (%s errors).", len(groups), len(errors), extra=HOT_PATH)
+        return {
+            "dry_run": dry_run,
+            "to": to,
+            "count": len(groups),
+            "groups": groups,
+            "errors": [{"group_id": group_id, "error": error} for group_id, error in sorted(errors.items())],
+        }
+    except Exception as e:
+        logger.error("Failed to reset consumer group offsets: %s", e, exc_info=True)
+        raise
+
+
+async def handle_delete_consumer_groups(
+    admin_client: "AIOKafkaAdminClient",
+    group_ids: List[str],
+    max_concurrency: int = 16,
+) -> Dict[str, Any]:
+    """Deletes consumer groups with one DeleteGroups request per coordinator, all coordinators concurrently.
+
+    The broker only deletes groups without active members; the others are
+    reported as NonEmptyGroup errors.
+    """
+    from aiokafka.errors import for_code
+    from aiokafka.protocol.admin import DeleteGroupsRequest
+    logger.info("Deleting %s consumer groups...", len(group_ids), extra=HOT_PATH)
+    try:
+        by_node, errors = await find_coordinators(admin_client, group_ids, max_concurrency)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def delete(node: int, groups: List[str]):
+            async with semaphore:
+                # Not exposed by aiokafka's admin client either
+                return await admin_client._send_request(DeleteGroupsRequest(groups), node)
+
+        nodes = list(by_node)
+        responses = await asyncio.gather(*(delete(node, by_node[node]) for node in nodes), return_exceptions=True)
+        deleted = []
+        for node, response in zip(nodes, responses):
+            if isinstance(response, Exception):
+                for group_id in by_node[node]:
+                    errors[group_id] = _error_name(response)
+                continue
+            for group_id, error_code in response.results:
+                if error_code:
+                    errors[group_id] = for_code(error_code).__name__
+                else:
+                    deleted.append(group_id)
+        logger.info("Deleted %s consumer groups (%s errors).", len(deleted), len(errors), extra=HOT_PATH)
+        return {
+            "deleted": sorted(deleted),
+            "count": len(deleted),
+            "errors": [{"group_id": group_id, "error": error} for group_id, error in sorted(errors.items())],
+        }
+    except Exception as e:
+        logger.error("Failed to delete consumer groups: %s", e, exc_info=True)
+        raise
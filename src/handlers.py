@@ -1,94 +1,585 @@
-from .connection import RabbitMQConnection
-from .admin import RabbitMQAdmin
-from typing import List, Optional, Any
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Any, Callable, Dict, Set, Tuple
+import asyncio
+import json
 import logging
-from kafka.producer import AIOKafkaProducer
-from kafka.admin import AIOKafkaAdminClient
+import re
+from .models import PublishRecord, TransactionRecord
+from .cache import TopicIndex
+from .serialization import decode_cursor, encode_cursor
+from .metrics import METRICS
+from .logging_setup import HOT_PATH
+from .codec import Decoder, Encoder, decode_payload
+
+# aiokafka is imported on first use; see admin.py
+if TYPE_CHECKING:
+    from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+    from aiokafka.admin import AIOKafkaAdminClient
+    from aiokafka.structs import TopicPartition
 
 logger = logging.getLogger(__name__)
 
-def handle_enqueue(rabbitmq: RabbitMQConnection, queue: str, message: str):
-    connection, channel = rabbitmq.get_channel()
-    channel.queue_declare(queue)
-    channel.basic_publish(exchange="", routing_key=queue, body=message)
-    connection.close()
+def encode_utf8(value: Any) -> bytes:
+    return value.encode('utf-8')
 
-def handle_fanout(rabbitmq: RabbitMQConnection, exchange: str, message: str):
-    connection, channel = rabbitmq.get_channel()
-    channel.exchange_declare(exchange=exchange, exchange_type="fanout")
-    channel.basic_publish(exchange=exchange, routing_key="", body=message)
-    connection.close()
+def decode_utf8(data: Any) -> str:
+    return str(data, 'utf-8', 'replace')
 
-def handle_list_queues(rabbitmq_admin: RabbitMQAdmin) -> List[str]:
-    result = rabbitmq_admin.list_queues()
-    return [queue['name'] for queue in result]
+async def handle_publish_message(
+    producer: "AIOKafkaProducer",
+    topic: str,
+    message: Any,
+    key: Optional[Any] = None,
+    encode_value: Optional[Encoder] = None,
+    encode_key: Optional[Encoder] = None,
+):
+    """Publishes a message to a Kafka topic."""
+    logger.info("Publishing message to topic '%s'...", topic, extra=HOT_PATH)
+    try:
+        # Encode message and key (if provided) to bytes with the caller's codecs (UTF-8 by default)
+        message_bytes = (encode_value or encode_utf8)(message)
+        key_bytes = (encode_key or encode_utf8)(key) if key is not None else None
 
-def handle_list_exchanges(rabbitmq_admin: RabbitMQAdmin) -> List[str]:
-    result = rabbitmq_admin.list_exchanges()
-    return [exchange['name'] for exchange in result]
+        await producer.send_and_wait(topic, value=message_bytes, key=key_bytes)
+        METRICS.inc("messages_produced_total")
+        METRICS.inc("bytes_produced_total", len(message_bytes) + len(key_bytes or b""))
+        logger.info("Message successfully published to topic '%s'.", topic, extra=HOT_PATH)
+    except Exception as e:
+        logger.error("Failed to publish message to topic '%s': %s", topic, e, exc_info=True)
+        raise # Re-raise the exception to be caught in server.py
 
-def handle_get_queue_info(rabbitmq_admin: RabbitMQAdmin, queue: str, vhost: str = "/") -> dict:
-    return rabbitmq_admin.get_queue_info(queue, vhost)
+async def handle_publish_messages(
+    producer: "AIOKafkaProducer",
+    topic: str,
+    records: List[PublishRecord],
+    encode_value: Optional[Encoder] = None,
+    encode_key: Optional[Encoder] = None,
+) -> Dict[str, Any]:
+    """Publishes a batch of messages to a Kafka topic with pipelined sends.
 
-def handle_delete_queue(rabbitmq_admin: RabbitMQAdmin, queue: str, vhost: str = "/") -> None:
-    rabbitmq_admin.delete_queue(queue, vhost)
+    Every record is handed to the producer with send() so the client can
+    accumulate them into broker batches, then a single flush() waits for the
+    whole batch. Failures are reported per record instead of aborting the batch.
+    """
+    logger.info("Publishing %s messages to topic '%s'...", len(records), topic, extra=HOT_PATH)
+    encode_value = encode_value or encode_utf8
+    encode_key = encode_key or encode_utf8
+    pending: List[Any] = []
+    sizes: List[int] = []
+    for record in records:
+        try:
+            headers = [(name, value.encode('utf-8')) for name, value in record.headers.items()] if record.headers else None
+            value_bytes = encode_value(record.value)
+            key_bytes = encode_key(record.key) if record.key is not None else None
+            future = await producer.send(
+                topic,
+                value=value_bytes,
+                key=key_bytes,
+                partition=record.partition,
+                headers=headers,
+            )
+            pending.append(future)
+            sizes.append(len(value_bytes) + len(key_bytes or b""))
+        except Exception as e:
+            # Codec, serialization or buffer errors surface here, before the record is queued
+            pending.append(e)
+            sizes.append(0)
 
-def handle_purge_queue(rabbitmq_admin: RabbitMQAdmin, queue: str, vhost: str = "/") -> None:
-    rabbitmq_admin.purge_queue(queue, vhost)
+    await producer.flush()
+    outcomes = await asyncio.gather(
+        *(item for item in pending if not isinstance(item, Exception)),
+        return_exceptions=True,
+    )
 
-def handle_delete_exchange(rabbitmq_admin: RabbitMQAdmin, exchange: str, vhost: str = "/") -> None:
-    rabbitmq_admin.delete_exchange(exchange, vhost)
+    results = []
+    published_bytes = 0
+    outcome_iter = iter(outcomes)
+    for index, item in enumerate(pending):
+        outcome = item if isinstance(item, Exception) else next(outcome_iter)
+        if isinstance(outcome, BaseException):
+            results.append({"index": index, "error": f"{type(outcome).__name__}: {outcome}"})
+        else:
+            results.append({"index": index, "partition": outcome.partition, "offset": outcome.offset})
+            published_bytes += sizes[index]
 
-def handle_get_exchange_info(rabbitmq_admin: RabbitMQAdmin, exchange: str, vhost: str = "/") -> dict:
-    return rabbitmq_admin.get_exchange_info(exchange, vhost)
+    failed = sum(1 for r in results if "error" in r)
+    METRICS.inc("messages_produced_total", len(records) - failed)
+    METRICS.inc("bytes_produced_total", published_bytes)
+    if failed:
+        logger.warning("%s of %s messages failed to publish to topic '%s'.", failed, len(records), topic)
+    logger.info("Published %s messages to topic '%s'.", len(records) - failed, topic, extra=HOT_PATH)
+    return {"topic": topic, "published": len(records) - failed, "failed": failed, "results": results}
 
-async def handle_publish_message(producer: AIOKafkaProducer, topic: str, message: str, key: Optional[str] = None):
-    """Publishes a message to a Kafka topic."""
-    logger.info(f"Publishing message to topic '{topic}'...")
-    try:
-        # Encode message and key (if provided) to bytes
-        message_bytes = message.encode('utf-8')
-        key_bytes = key.encode('utf-8') if key else None
+async def handle_publish_transaction(
+    producer: "AIOKafkaProducer",
+    records: List[TransactionRecord],
+    encode_value: Optional[Encoder] = None,
+    encode_key: Optional[Encoder] = None,
+) -> Dict[str, Any]:
+    """Publishes records to any topics inside the producer's open transaction.
 
-        await producer.send_and_wait(topic, value=message_bytes, key=key_bytes)
-        logger.info(f"Message successfully published to topic '{topic}'.")
+    Every record is encoded before the first send, so a codec error fails the
+    call with nothing written. The sends are then pipelined and awaited
+    together; any failure is raised so the caller's transaction aborts the
+    whole batch. Committing is left to the caller.
+    """
+    topics = sorted({record.topic for record in records})
+    logger.info("Publishing %s messages to topics %s in a transaction...", len(records), topics, extra=HOT_PATH)
+    encode_value = encode_value or encode_utf8
+    encode_key = encode_key or encode_utf8
+    encoded = []
+    for index, record in enumerate(records):
+        try:
+            encoded.append((
+                record,
+                encode_value(record.value),
+                encode_key(record.key) if record.key is not None else None,
+                [(name, value.encode('utf-8')) for name, value in record.headers.items()] if record.headers else None,
+            ))
+        except Exception as e:
+            raise ValueError(f"Record {index} could not be encoded, nothing was published: {e}") from e
+
+    try:
+        futures = []
+        for record, value_bytes, key_bytes, headers in encoded:
+            futures.append(await producer.send(
+                record.topic,
+                value=value_bytes,
+                key=key_bytes,
+                partition=record.partition,
+                headers=headers,
+            ))
+        outcomes = await asyncio.gather(*futures, return_exceptions=True)
     except Exception as e:
-        logger.error(f"Failed to publish message to topic '{topic}': {e}", exc_info=True)
-        raise # Re-raise the exception to be caught in server.py
+        logger.error("Transactional send failed, the transaction will be aborted: %s", e, exc_info=True)
+        raise
+    failures = [(index, outcome) for index, outcome in enumerate(outcomes) if isinstance(outcome, BaseException)]
+    if failures:
+        index, error = failures[0]
+        logger.error("%s of %s transactional sends failed (first: record %s, %s), the transaction will be aborted.", len(failures), len(records), index, error)
+        raise error
 
-async def handle_list_topics(admin_client: AIOKafkaAdminClient) -> List[str]:
-    """Lists all available topics in the Kafka cluster."""
+    METRICS.inc("messages_produced_total", len(records))
+    METRICS.inc("bytes_produced_total", sum(len(value_bytes) + len(key_bytes or b"") for _, value_bytes, key_bytes, _ in encoded))
+    logger.info("Sent %s messages to topics %s in a transaction.", len(records), topics, extra=HOT_PATH)
+    return {
+        "published": len(records),
+        "topics": {topic: sum(1 for record in records if record.topic == topic) for topic in topics},
+        "results": [
+            {"index": index, "topic": outcome.topic, "partition": outcome.partition, "offset": outcome.offset}
+            for index, outcome in enumerate(outcomes)
+        ],
+    }
+
+async def fetch_topic_index(admin_client: "AIOKafkaAdminClient") -> TopicIndex:
+    """Builds a sorted index of all topics in the Kafka cluster from one metadata request."""
     logger.info("Fetching list of Kafka topics...")
     try:
-        topics = await admin_client.list_topics()
-        logger.info(f"Successfully fetched {len(topics)} topics.")
-        return topics
+        # describe_topics() without names costs the same single Metadata
+        # request as list_topics() but also tells us which topics are internal
+        topics = await admin_client.describe_topics()
+        index = TopicIndex(
+            (meta['topic'] for meta in topics),
+            internal=(meta['topic'] for meta in topics if meta['is_internal']),
+        )
+        logger.info("Successfully fetched %s topics.", len(index), extra=HOT_PATH)
+        return index
     except Exception as e:
-        logger.error(f"Failed to list Kafka topics: {e}", exc_info=True)
+        logger.error("Failed to list Kafka topics: %s", e, exc_info=True)
         raise
 
-# Placeholder for other handlers (like consume, describe topic, etc.)
-# We will need corresponding admin functions in admin.py for some of these
-
-# Example:
-# async def handle_consume_messages(consumer: AIOKafkaConsumer, max_messages: int = 10, timeout_ms: int = 1000):
-#     """Consumes messages from the subscribed topics."""
-#     logger.info(f"Consuming messages...")
-#     messages = []
-#     try:
-#         async for msg in consumer:
-#             messages.append({
-#                 "topic": msg.topic,
-#                 "partition": msg.partition,
-#                 "offset": msg.offset,
-#                 "key": msg.key.decode('utf-8') if msg.key else None,
-#                 "value": msg.value.decode('utf-8') # Assuming utf-8 encoded messages
-#             })
-#             if len(messages) >= max_messages:
-#                 break
-#         # Potentially add a timeout mechanism if no messages arrive
-#         logger.info(f"Consumed {len(messages)} messages.")
-#         return messages
-#     except Exception as e:
-#         logger.error(f"Failed to consume messages: {e}", exc_info=True)
-#         raise
+def handle_list_topics(
+    index: TopicIndex,
+    prefix: Optional[str] = None,
+    pattern: Optional[str] = None,
+    include_internal: bool = False,
+    sort: str = "asc",
+    limit: int = 1000,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Returns one page of topic names from the topic index.
+
+    The cursor carries the last name of the previous page, so paging stays
+    consistent even if the index is refreshed between calls.
+    """
+    after = None
+    if cursor:
+        after_key, _ = decode_cursor(cursor)
+        if after_key is None:
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        after = after_key
+    names, has_more = index.page(
+        prefix=prefix or "",
+        pattern=pattern,
+        include_internal=include_internal,
+        descending=sort == "desc",
+        after=after,
+        limit=limit,
+    )
+    result: Dict[str, Any] = {"count": len(names), "topics": names}
+    if has_more:
+        result["next_cursor"] = encode_cursor(names[-1], 0)
+    return result
+
+async def seek_start_positions(
+    consumer: "AIOKafkaConsumer",
+    partitions: List["TopicPartition"],
+    start: str = "earliest",
+    offsets: Optional[Dict[int, int]] = None,
+    start_timestamp_ms: Optional[int] = None,
+    from_end: Optional[int] = None,
+) -> Tuple[Dict["TopicPartition", int], Dict["TopicPartition", int]]:
+    """Seeks an assigned consumer to its start positions.
+
+    Offsets are resolved up front with batched ListOffsets lookups (one request
+    per partition leader) so the returned positions are exact. Returns the
+    start position and the current end offset of every partition.
+    """
+    end_offsets = await consumer.end_offsets(partitions)
+    beginning_offsets = {}
+    if start == "earliest" or from_end is not None:
+        beginning_offsets = await consumer.beginning_offsets(partitions)
+
+    if start_timestamp_ms is not None:
+        found = await consumer.offsets_for_times({tp: start_timestamp_ms for tp in partitions})
+        # No message at or after the timestamp means there is nothing to read yet
+        positions = {tp: found[tp].offset if found.get(tp) else end_offsets[tp] for tp in partitions}
+    elif from_end is not None:
+        positions = {tp: max(beginning_offsets[tp], end_offsets[tp] - from_end) for tp in partitions}
+    elif start == "latest":
+        positions = dict(end_offsets)
+    else:
+        positions = dict(beginning_offsets)
+
+    for tp in partitions:
+        if offsets and tp.partition in offsets:
+            positions[tp] = offsets[tp.partition]
+        consumer.seek(tp, positions[tp])
+    return positions, end_offsets
+
+# Longest wait of one fetch in a read bounded by end offsets. A fetch that finds
+# only transaction markers returns nothing until its timeout, so such reads
+# poll in slices and check the consumer's position in between.
+CATCH_UP_POLL_MS = 200
+
+class RangeReader:
+    """Reads assigned partitions from their positions up to end offsets, within a deadline.
+
+    records() yields (partition, record) pairs and moves positions past each
+    record as it is yielded. A record at or past its partition's end offset was
+    written after the call started and ends that partition. Offsets have gaps:
+    transaction markers, aborted transactions (for read_committed consumers)
+    and compacted records are never returned, so after every fully processed
+    batch positions also move up to the consumer's fetch position, capped at
+    the end offsets. With end_offsets=None the partitions are read until the
+    deadline, waiting for new records.
+
+    Callers stop reading by leaving the loop, and stop reading one partition
+    with finish(). A record they do not take goes back with unread(), which
+    leaves its partition's position at that record.
+    """
+
+    def __init__(
+        self,
+        consumer: "AIOKafkaConsumer",
+        partitions: List["TopicPartition"],
+        positions: Dict["TopicPartition", int],
+        end_offsets: Optional[Dict["TopicPartition", int]],
+        deadline: float,
+        max_records: Optional[int] = None,
+    ):
+        self.consumer = consumer
+        self.partitions = partitions
+        self.positions = positions
+        self.end_offsets = end_offsets
+        self.deadline = deadline
+        self.max_records = max_records
+        self.finished: Set["TopicPartition"] = set()
+        self.timed_out = False
+        # Partitions whose records in the current batch were not all taken
+        self._held: Set["TopicPartition"] = set()
+
+    def finish(self, tp: "TopicPartition") -> None:
+        """Stops reading a partition; its position stays where it is."""
+        self.finished.add(tp)
+        self.consumer.pause(tp)
+
+    def unread(self, tp: "TopicPartition", msg: Any) -> None:
+        """Hands back the record just yielded; the rest of its batch is not read."""
+        self.positions[tp] = msg.offset
+        self._held.add(tp)
+
+    async def records(self) -> AsyncIterator[Tuple["TopicPartition", Any]]:
+        loop = asyncio.get_running_loop()
+        bounded = self.end_offsets is not None
+        self.consumer.resume(*self.partitions)
+        while True:
+            active = [
+                tp for tp in self.partitions
+                if tp not in self.finished and (not bounded or self.positions[tp] < self.end_offsets[tp])
+            ]
+            if not active:
+                return
+            remaining_ms = int((self.deadline - loop.time()) * 1000)
+            if remaining_ms <= 0:
+                self.timed_out = True
+                return
+            batch = await self.consumer.getmany(
+                *active,
+                timeout_ms=min(remaining_ms, CATCH_UP_POLL_MS) if bounded else remaining_ms,
+                max_records=self.max_records,
+            )
+            self._held.clear()
+            for tp, records in batch.items():
+                for msg in records:
+                    if bounded and msg.offset >= self.end_offsets[tp]:
+                        # Written after the call started; the gap before it held no records
+                        self.positions[tp] = max(self.positions[tp], self.end_offsets[tp])
+                        break
+                    self.positions[tp] = msg.offset + 1
+                    yield tp, msg
+                    if tp in self._held or tp in self.finished:
+                        break
+            if bounded:
+                for tp in active:
+                    if tp not in self._held and tp not in self.finished:
+                        position = await self.consumer.position(tp)
+                        self.positions[tp] = max(self.positions[tp], min(position, self.end_offsets[tp]))
+
+def record_to_dict(msg: Any, decode_key: Optional[Decoder] = None, decode_value: Optional[Decoder] = None) -> Dict[str, Any]:
+    """Converts a consumed record into a JSON-friendly dict, decoding key and value with the given codecs (UTF-8 by default)."""
+    key, key_error = decode_payload(decode_key or decode_utf8, msg.key)
+    value, value_error = decode_payload(decode_value or decode_utf8, msg.value)
+    record = {
+        "partition": msg.partition,
+        "offset": msg.offset,
+        "timestamp": msg.timestamp,
+        "key": key,
+        "value": value,
+        "headers": {name: decode_utf8(value) for name, value in msg.headers} if msg.headers else None,
+    }
+    # Undecodable payloads are returned as base64 alongside the codec error
+    if key_error:
+        record["key_error"] = key_error
+    if value_error:
+        record["value_error"] = value_error
+    return record
+
+async def handle_consume_messages(
+    consumer: "AIOKafkaConsumer",
+    topic: str,
+    partitions: List[int],
+    start: str = "earliest",
+    offsets: Optional[Dict[int, int]] = None,
+    start_timestamp_ms: Optional[int] = None,
+    from_end: Optional[int] = None,
+    max_messages: int = 10,
+    max_bytes: int = 1048576,
+    timeout_ms: int = 5000,
+    decode_key: Optional[Decoder] = None,
+    decode_value: Optional[Decoder] = None,
+) -> Dict[str, Any]:
+    """Reads a bounded range of messages from an assigned consumer.
+
+    Reading stops at max_messages, max_bytes or the timeout_ms deadline. Unless
+    the caller starts at "latest" to wait for new data, it also stops as soon as
+    every partition has caught up with its end offset at the start of the call.
+    """
+    from aiokafka.structs import TopicPartition
+    logger.info("Consuming up to %s messages from topic '%s' partitions %s...", max_messages, topic, partitions, extra=HOT_PATH)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    tps = [TopicPartition(topic, p) for p in partitions]
+    wait_for_new = start == "latest" and not offsets and start_timestamp_ms is None and from_end is None
+
+    try:
+        positions, end_offsets = await asyncio.wait_for(
+            seek_start_positions(consumer, tps, start, offsets, start_timestamp_ms, from_end),
+            timeout=timeout_ms / 1000,
+        )
+
+        messages: List[Dict[str, Any]] = []
+        total_bytes = 0
+        reader = RangeReader(consumer, tps, positions, None if wait_for_new else end_offsets, deadline, max_records=max_messages)
+        async for tp, msg in reader.records():
+            size = len(msg.key or b"") + len(msg.value or b"")
+            # Always return at least one message, even if it alone exceeds max_bytes
+            if messages and total_bytes + size > max_bytes:
+                reader.unread(tp, msg)
+                break
+            messages.append(record_to_dict(msg, decode_key, decode_value))
+            total_bytes += size
+            if len(messages) >= max_messages:
+                break
+
+        METRICS.inc("messages_consumed_total", len(messages))
+        METRICS.inc("bytes_consumed_total", total_bytes)
+        logger.info("Consumed %s messages (%s bytes) from topic '%s'.", len(messages), total_bytes, topic, extra=HOT_PATH)
+        return {
+            "topic": topic,
+            "count": len(messages),
+            "bytes": total_bytes,
+            "messages": messages,
+            "next_offsets": {tp.partition: positions[tp] for tp in tps},
+            "end_offsets": {tp.partition: end_offsets[tp] for tp in tps},
+            "reached_end": all(positions[tp] >= end_offsets[tp] for tp in tps),
+        }
+    except Exception as e:
+        logger.error("Failed to consume messages from topic '%s': %s", topic, e, exc_info=True)
+        raise
+
+# Returned by resolve_json_path when the path does not exist
+MISSING = object()
+
+def parse_json_path(path: str) -> List[Any]:
+    """Splits a JSON path like '$.order.items[0].sku' or 'order.items.0.sku' into keys and indices."""
+    path = path.strip()
+    if path.startswith("$"):
+        path = path[1:]
+    steps: List[Any] = []
+    for part in re.split(r"\.|\[(\d+)\]", path):
+        if part:
+            steps.append(int(part) if part.isdigit() else part)
+    return steps
+
+def resolve_json_path(document: Any, steps: List[Any]) -> Any:
+    """Returns the node at the parsed path in a JSON document, or MISSING."""
+    node = document
+    for step in steps:
+        if isinstance(node, dict) and not isinstance(step, int) and step in node:
+            node = node[step]
+        elif isinstance(node, dict) and str(step) in node:
+            node = node[str(step)]
+        elif isinstance(node, list) and isinstance(step, int) and step < len(node):
+            node = node[step]
+        else:
+            return MISSING
+    return node
+
+def build_message_filter(
+    key: Optional[Any] = None,
+    headers: Optional[Dict[str, str]] = None,
+    contains: Optional[str] = None,
+    regex: Optional[str] = None,
+    json_path: Optional[str] = None,
+    json_value: Any = None,
+    ignore_case: bool = False,
+) -> Callable[[Any], bool]:
+    """Compiles the search criteria into one predicate over raw consumer records.
+
+    All given criteria must match. Keys, headers and payloads are compared as
+    bytes so non-matching records are never decoded; only the JSON-path
+    criterion parses the value, and only after the cheaper checks pass.
+    """
+    # Keys may arrive pre-encoded by the caller's key codec
+    key_bytes = key if isinstance(key, bytes) or key is None else key.encode('utf-8')
+    header_bytes = [(name, value.encode('utf-8')) for name, value in headers.items()] if headers else []
+    needle = contains.encode('utf-8') if contains else None
+    if needle is not None and ignore_case:
+        needle = needle.lower()
+    pattern = re.compile(regex.encode('utf-8'), re.IGNORECASE if ignore_case else 0) if regex else None
+    steps = parse_json_path(json_path) if json_path else None
+
+    def matches(msg: Any) -> bool:
+        if key_bytes is not None and msg.key != key_bytes:
+            return False
+        if header_bytes:
+            msg_headers = msg.headers or ()
+            for name, value in header_bytes:
+                if (name, value) not in msg_headers:
+                    return False
+        value = msg.value
+        if needle is not None or pattern is not None or steps is not None:
+            if value is None:
+                return False
+        if needle is not None and needle not in (value.lower() if ignore_case else value):
+            return False
+        if pattern is not None and not pattern.search(value):
+            return False
+        if steps is not None:
+            try:
+                document = json.loads(value)
+            except ValueError:
+                return False
+            found = resolve_json_path(document, steps)
+            if found is MISSING:
+                return False
+            # Without json_value the path only has to exist
+            if json_value is not None and found != json_value:
+                return False
+        return True
+
+    return matches
+
+async def handle_search_messages(
+    consumer: "AIOKafkaConsumer",
+    topic: str,
+    partitions: List[int],
+    matches: Callable[[Any], bool],
+    start_timestamp_ms: Optional[int] = None,
+    end_timestamp_ms: Optional[int] = None,
+    max_matches: int = 10,
+    max_scan_bytes: int = 67108864,
+    timeout_ms: int = 10000,
+    decode_key: Optional[Decoder] = None,
+    decode_value: Optional[Decoder] = None,
+) -> Dict[str, Any]:
+    """Scans partitions from a timestamp and returns only the records that match.
+
+    Every partition is seeked by timestamp with one batched ListOffsets lookup
+    and then read through one assigned consumer, whose fetcher requests all
+    partition leaders in parallel. A partition is done once it reaches its end
+    offset at the start of the call or passes end_timestamp_ms. The scan stops
+    at max_matches, after max_scan_bytes of keys and values, or at timeout_ms.
+    """
+    from aiokafka.structs import TopicPartition
+    logger.info("Searching topic '%s' partitions %s from timestamp %s...", topic, partitions, start_timestamp_ms, extra=HOT_PATH)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    tps = [TopicPartition(topic, p) for p in partitions]
+
+    try:
+        positions, end_offsets = await asyncio.wait_for(
+            seek_start_positions(consumer, tps, "earliest", start_timestamp_ms=start_timestamp_ms),
+            timeout=timeout_ms / 1000,
+        )
+
+        found: List[Dict[str, Any]] = []
+        scanned = 0
+        scanned_bytes = 0
+        stopped = None
+        reader = RangeReader(consumer, tps, positions, end_offsets, deadline)
+        async for tp, msg in reader.records():
+            if end_timestamp_ms is not None and msg.timestamp > end_timestamp_ms:
+                # Records are roughly time-ordered per partition; stop reading this one
+                reader.unread(tp, msg)
+                reader.finish(tp)
+                continue
+            scanned += 1
+            scanned_bytes += len(msg.key or b"") + len(msg.value or b"")
+            if matches(msg):
+                found.append(record_to_dict(msg, decode_key, decode_value))
+                if len(found) >= max_matches:
+                    stopped = "max_matches"
+                    break
+            if scanned_bytes >= max_scan_bytes:
+                stopped = "max_scan_bytes"
+                break
+        if stopped is None:
+            stopped = "timeout" if reader.timed_out else "end"
+
+        METRICS.inc("messages_consumed_total", scanned)
+        METRICS.inc("bytes_consumed_total", scanned_bytes)
+        logger.info("Scanned %s messages (%s bytes) of topic '%s', %s matched.", scanned, scanned_bytes, topic, len(found), extra=HOT_PATH)
+        return {
+            "topic": topic,
+            "match_count": len(found),
+            "matches": found,
+            "scanned_messages": scanned,
+            "scanned_bytes": scanned_bytes,
+            "stopped_reason": stopped,
+            "next_offsets": {tp.partition: positions[tp] for tp in tps},
+            "end_offsets": {tp.partition: end_offsets[tp] for tp in tps},
+        }
+    except Exception as e:
+        logger.error("Failed to search messages in topic '%s': %s", topic, e, exc_info=True)
+        raise
@@ -0,0 +1,140 @@
+"""HTTP transport: one server process shared by many MCP clients.
+
+Clients open a Server-Sent Events stream with GET /sse and post their
+messages to the endpoint announced on it. Every stream is its own MCP
+session, run with the same Server instance, so all sessions share the
+cluster registry's Kafka clients, consumer pools and metadata caches
+instead of each spawning a process with its own connections. Per-session
+call limits are applied by the tool call handler (see SessionLimiter).
+"""
+import logging
+from typing import Any, Dict
+
+import anyio
+from mcp.server import Server
+from mcp.server.sse import SseServerTransport
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from .dispatch import run_server_concurrently
+from .metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+SSE_PATH = "/sse"
+MESSAGES_PATH = "/messages/"
+
+
+class SseSessions:
+    """ASGI application serving MCP sessions over SSE, at most max_sessions at a time.
+
+    mcp's SseServerTransport neither notices a client going away nor forgets
+    its session, so the session would keep its tasks and stream forever.
+    Here a session is cancelled when its stream disconnects and its entry
+    is dropped from the transport's private _read_stream_writers, as laid
+    out in mcp 1.1 (pyproject pins mcp below 1.2).
+    """
+
+    def __init__(self, server: Server, initialization_options: Any, max_sessions: int = 100):
+        self.server = server
+        self.initialization_options = initialization_options
+        self.max_sessions = max_sessions
+        self.transport = SseServerTransport(MESSAGES_PATH)
+        self.active = 0
+        self.opened = 0
+        self.rejected = 0
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            return
+        path, method = scope["path"], scope["method"]
+        if path == SSE_PATH and method == "GET":
+            await self._session(scope, receive, send)
+        elif path == MESSAGES_PATH and method == "POST":
+            await self.transport.handle_post_message(scope, receive, send)
+        elif path == "/health" and method == "GET":
+            await JSONResponse({"status": "ok", **self.stats()})(scope, receive, send)
+        else:
+            await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+
+    async def _session(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if self.active >= self.max_sessions:
+            self.rejected += 1
+            METRICS.inc("http_sessions_rejected_total")
+            logger.warning("Rejected an SSE session: %s sessions already open.", self.active)
+            await PlainTextResponse("Too many sessions", status_code=503)(scope, receive, send)
+            return
+
+        disconnected = anyio.Event()
+
+        async def watch_receive() -> Dict[str, Any]:
+            # The SSE response waits for http.disconnect; pass it on to end the session
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+            return message
+
+        known = set(self.transport._read_stream_writers)
+        self.active += 1
+        self.opened += 1
+        METRICS.inc("http_sessions_total")
+        client = scope.get("client")
+        logger.info("SSE session opened from %s (%s active).", client[0] if client else "unknown", self.active)
+        try:
+            async with self.transport.connect_sse(scope, watch_receive, send) as (read_stream, write_stream):
+                # The session id registered by connect_sse, to forget it afterwards
+                session_ids = set(self.transport._read_stream_writers) - known
+                try:
+                    async with anyio.create_task_group() as tg:
+                        async def run() -> None:
+                            await run_server_concurrently(self.server, read_stream, write_stream, self.initialization_options, raise_exceptions=False)
+                            tg.cancel_scope.cancel()
+
+                        tg.start_soon(run)
+                        await disconnected.wait()
+                        tg.cancel_scope.cancel()
+                finally:
+                    for session_id in session_ids:
+                        self.transport._read_stream_writers.pop(session_id, None)
+        finally:
+            self.active -= 1
+            logger.info("SSE session closed (%s active).", self.active)
+
+    def collect_gauges(self):
+        yield "http_sessions_active", {}, self.active
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active_sessions": self.active,
+            "opened_sessions": self.opened,
+            "rejected_sessions": self.rejected,
+            "max_sessions": self.max_sessions,
+        }
+
+
+async def serve_sse(
+    server: Server,
+    initialization_options: Any,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    max_sessions: int = 100,
+) -> None:
+    """Runs the SSE application with uvicorn until the process is interrupted."""
+    # Optional dependency (pip install mcp-server-kafka[http]), only needed for this transport
+    import uvicorn
+    sessions = SseSessions(server, initialization_options, max_sessions=max_sessions)
+    config = uvicorn.Config(
+        sessions,
+        host=host,
+        port=port,
+        lifespan="off",
+        # Logging is configured by the server; open SSE streams are cut after this many seconds on shutdown
+        log_config=None,
+        access_log=False,
+        timeout_graceful_shutdown=5,
+    )
+    METRICS.add_collector(sessions.collect_gauges)
+    logger.info("Serving MCP over SSE on http://%s:%s%s", host, port, SSE_PATH)
+    try:
+        await uvicorn.Server(config).serve()
+    finally:
+        METRICS.remove_collector(sessions.collect_gauges)
@@ -0,0 +1,116 @@
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Pass as extra= on per-call info logs so a burst of tool calls is rate limited
+# instead of queueing one record per message.
+HOT_PATH = {"hot_path": True}
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock handler formats the message (and any traceback) in prepare(),
+    i.e. on the event loop. Records are only handed to an in-process queue, so
+    they can be enqueued as is and formatted by the writer thread. Log
+    arguments must therefore not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class HotPathRateLimiter(logging.Filter):
+    """Token bucket per message template for records marked with HOT_PATH.
+
+    Up to rate_per_second records of each template pass (bursts of up to
+    burst); the rest are dropped and counted. The next record that passes
+    reports how many similar records were suppressed. Records at WARNING and
+    above, and unmarked records, always pass.
+    """
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None):
+        super().__init__()
+        self.rate = rate_per_second
+        self.burst = burst if burst is not None else max(1.0, rate_per_second)
+        # (logger name, template) -> [tokens, last refill, suppressed count]
+        self._buckets: Dict[Tuple[str, str], List[float]] = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno >= logging.WARNING or not getattr(record, "hot_path", False):
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                self.suppressed += 1
+                return False
+            bucket[0] = tokens - 1
+            dropped, bucket[2] = int(bucket[2]), 0
+        if dropped and isinstance(record.args, tuple):
+            record.msg = f"{record.msg} (%d similar messages suppressed)"
+            record.args = record.args + (dropped,)
+        return True
+
+
+def configure_logging(
+    level: str = "INFO",
+    log_file: Optional[str] = "server.log",
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    rotate_when: Optional[str] = None,
+    hot_path_rate: float = 10.0,
+    console: bool = True,
+) -> logging.handlers.QueueListener:
+    """Routes all logging through a queue to a background writer thread.
+
+    The file is rotated by size, or by time when rotate_when is set (e.g.
+    'midnight' or 'H'). Returns the started listener; stop() it on shutdown
+    to flush pending records.
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers: List[logging.Handler] = []
+    if log_file:
+        if rotate_when:
+            file_handler: logging.Handler = logging.handlers.TimedRotatingFileHandler(
+                log_file, when=rotate_when, backupCount=backup_count, encoding='utf-8', delay=True,
+            )
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True,
+            )
+        handlers.append(file_handler)
+    if console:
+        # stderr, since stdout carries the MCP stdio transport
+        handlers.append(logging.StreamHandler(sys.stderr))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(HotPathRateLimiter(hot_path_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level.upper()))
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,221 @@
+import asyncio
+import bisect
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "mcp_kafka_"
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow admin calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# The tool currently executing, so lower layers (client leases, handlers) can
+# attribute their timings and counters without threading the name through.
+current_tool: contextvars.ContextVar[str] = contextvars.ContextVar("current_tool", default="none")
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escaped = (f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for name, value in key)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus style."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimates a quantile as the upper bound of the bucket that contains it.
+
+        Returns None if there are no observations or the quantile lies above
+        the largest bucket.
+        """
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
+
+
+class MetricsRegistry:
+    """In-process counters and histograms with Prometheus text and JSON views."""
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]] = []
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        series = self._counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        series = self._histograms.setdefault(name, {})
+        key = _label_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str):
+        """Observes the wall time of the block, whether or not it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def time_phase(self, phase: str):
+        """Times a phase of the current tool call into tool_phase_seconds."""
+        return self.timer("tool_phase_seconds", tool=current_tool.get(), phase=phase)
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]) -> None:
+        """Registers a callback producing (name, labels, value) gauge samples at scrape time."""
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def _gauges(self) -> Dict[str, Dict[LabelKey, float]]:
+        gauges: Dict[str, Dict[LabelKey, float]] = {}
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    gauges.setdefault(name, {})[_label_key(labels)] = value
+            except Exception as e:
+                logger.warning("Metrics collector failed: %s", e)
+        return gauges
+
+    def render_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+
+        def header(name: str, kind: str) -> None:
+            if name in self._help:
+                lines.append(f"# HELP {PREFIX}{name} {self._help[name]}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for name, series in sorted(self._counters.items()):
+            header(name, "counter")
+            for key, value in series.items():
+                lines.append(f"{PREFIX}{name}{_format_labels(key)} {value}")
+        for name, series in sorted(self._gauges().items()):
+            header(name, "gauge")
+            for key, value in series.items():
+                lines.append(f"{PREFIX}{name}{_format_labels(key)} {value}")
+        for name, series in sorted(self._histograms.items()):
+            header(name, "histogram")
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f"{PREFIX}{name}_bucket{_format_labels(key + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(key)} {histogram.sum}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summarizes all metrics as JSON-friendly data with estimated quantiles."""
+        def labels_of(key: LabelKey) -> Dict[str, str]:
+            return dict(key)
+
+        return {
+            "counters": {
+                name: [{"labels": labels_of(key), "value": value} for key, value in series.items()]
+                for name, series in sorted(self._counters.items())
+            },
+            "gauges": {
+                name: [{"labels": labels_of(key), "value": value} for key, value in series.items()]
+                for name, series in sorted(self._gauges().items())
+            },
+            "histograms": {
+                name: [
+                    {
+                        "labels": labels_of(key),
+                        "count": histogram.count,
+                        "sum_seconds": round(histogram.sum, 6),
+                        "p50_seconds": histogram.quantile(0.5),
+                        "p99_seconds": histogram.quantile(0.99),
+                    }
+                    for key, histogram in series.items()
+                ]
+                for name, series in sorted(self._histograms.items())
+            },
+        }
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("tool_calls_total", "Tool calls by tool and outcome.")
+METRICS.describe("tool_errors_total", "Failed tool calls by tool and exception type.")
+METRICS.describe("tool_duration_seconds", "End-to-end tool call latency.")
+METRICS.describe("tool_phase_seconds", "Tool call latency by phase: client_acquire, broker_call or encode.")
+METRICS.describe("messages_produced_total", "Records successfully published.")
+METRICS.describe("bytes_produced_total", "Key and value bytes successfully published.")
+METRICS.describe("messages_consumed_total", "Records read by consume and search tools.")
+METRICS.describe("bytes_consumed_total", "Key and value bytes read by consume and search tools.")
+
+
+async def start_metrics_server(host: str, port: int, registry: MetricsRegistry = METRICS) -> asyncio.AbstractServer:
+    """Serves the registry in Prometheus text format over plain HTTP on GET /metrics."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain the request headers; the body is ignored
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", registry.render_prometheus().encode('utf-8')
+            else:
+                status, body = "404 Not Found", b"Not Found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug("Metrics request failed: %s", e)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info("Serving Prometheus metrics on http://%s:%s/metrics", host, port)
+    return server
@@ -1,67 +1,291 @@
-from typing import Annotated, Optional, Dict
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, Optional, Dict, List, Literal
+from pydantic import BaseModel, Field, model_validator
 
 # Models for Kafka MCP Tools
 
-class PublishMessage(BaseModel):
+class ClusterOption(BaseModel):
+    # Shared by every tool that talks to a cluster
+    cluster: Optional[str] = Field(None, description="Name of the cluster to use, from the server's cluster config. Defaults to the server's default cluster.")
+
+class ResultOptions(BaseModel):
+    # Shared by every tool that returns structured data
+    fields: Optional[List[str]] = Field(None, description="Only return these fields. Use dotted paths for nested fields, e.g. ['topics.topic_name'] or ['partitions'].")
+    pretty: Optional[bool] = Field(None, description="Indent the JSON output. Defaults to the server's output format.")
+
+class OutputOptions(ResultOptions):
+    # Tools that can be called again with the same arguments to read the next page
+    max_result_bytes: Optional[int] = Field(None, description="Cut the result's main list to fit this many bytes and return a 'next_cursor'. Defaults to the server limit; 0 disables the limit.", ge=0)
+    cursor: Optional[str] = Field(None, description="The 'next_cursor' from a previous truncated result. Repeat the same call with it to get the next page.")
+
+class SummaryOutputOptions(ResultOptions):
+    # Tools that write or read new data: calling them again for a next page would repeat that
+    max_result_bytes: Optional[int] = Field(None, description="Cut the result's main list to fit this many bytes; 'omitted' then counts the items left out. Defaults to the server limit; 0 disables the limit.", ge=0)
+
+    @model_validator(mode="before")
+    @classmethod
+    def reject_cursor(cls, data: Any) -> Any:
+        if isinstance(data, dict) and data.get("cursor"):
+            raise ValueError("This tool takes no cursor: calling it again would repeat its writes or reads, not return a next page.")
+        return data
+
+class PayloadCodecs(BaseModel):
+    # Shared by every tool that writes or reads message keys and values
+    value_codec: Literal["utf-8", "base64", "json", "avro", "protobuf"] = Field("utf-8", description="How message values are converted: 'utf-8' text, 'base64' for arbitrary binary data, 'json' values, or 'avro'/'protobuf' records given as JSON objects (requires 'value_schema').")
+    value_schema: Optional[str] = Field(None, description="Schema for 'avro' (subject name of a .avsc file) or 'protobuf' (fully qualified message type) values, from the server's schema directory.")
+    key_codec: Literal["utf-8", "base64", "json", "avro", "protobuf"] = Field("utf-8", description="How message keys are converted. Same choices as 'value_codec'.")
+    key_schema: Optional[str] = Field(None, description="Schema for 'avro' or 'protobuf' keys.")
+
+class PublishMessage(ClusterOption, PayloadCodecs):
     topic: str = Field(..., description="The Kafka topic to publish the message to.")
-    message: str = Field(..., description="The message content to publish.")
-    key: Optional[str] = Field(None, description="Optional message key for partitioning.")
+    message: Any = Field(..., description="The message content to publish: a string, or any JSON value with the 'json', 'avro' and 'protobuf' codecs.")
+    key: Optional[Any] = Field(None, description="Optional message key for partitioning.")
 
-class ListTopics(BaseModel):
-    # No arguments needed for listing topics
-    pass
+class PublishRecord(BaseModel):
+    value: Any = Field(..., description="The message content to publish: a string, or any JSON value with the 'json', 'avro' and 'protobuf' codecs.")
+    key: Optional[Any] = Field(None, description="Optional message key for partitioning.")
+    headers: Optional[Dict[str, str]] = Field(None, description="Optional message headers.")
+    partition: Optional[int] = Field(None, description="Optional explicit partition. If omitted, the key (or the default partitioner) decides.", ge=0)
+
+class PublishMessages(ClusterOption, SummaryOutputOptions, PayloadCodecs):
+    topic: str = Field(..., description="The Kafka topic to publish the messages to.")
+    records: List[PublishRecord] = Field(..., description="The records to publish. They are sent as one pipelined batch.", min_length=1)
 
-class GetTopicInfo(BaseModel):
+class TransactionRecord(PublishRecord):
+    topic: str = Field(..., description="The Kafka topic to publish this record to.")
+
+class PublishTransaction(ClusterOption, SummaryOutputOptions, PayloadCodecs):
+    records: List[TransactionRecord] = Field(..., description="The records to publish, to any topics. Either all of them are committed or none.", min_length=1, max_length=10000)
+
+class PublishLargeMessage(ClusterOption, SummaryOutputOptions):
+    topic: str = Field(..., description="The Kafka topic to publish the payload to.")
+    message: Optional[str] = Field(None, description="The payload as text, or as base64 with value_codec 'base64'. Give either this or 'file_path'.")
+    file_path: Optional[str] = Field(None, description="A file to publish, relative to the server's file directory (--file-dir). It is streamed without being loaded into memory.")
+    value_codec: Literal["utf-8", "base64"] = Field("utf-8", description="How 'message' is converted to bytes.")
+    key: Optional[str] = Field(None, description="Key of every chunk. Defaults to the payload's id, which keeps all chunks on one partition.")
+    partition: Optional[int] = Field(None, description="Optional explicit partition for every chunk.", ge=0)
+    headers: Optional[Dict[str, str]] = Field(None, description="Headers added to every chunk.")
+    name: Optional[str] = Field(None, description="A name for the payload, e.g. a file name, sent in the chunk headers. Defaults to the file's name.")
+    chunk_bytes: int = Field(524288, description="Maximum payload bytes per chunk record. Keep it below the topic's max.message.bytes.", ge=1024, le=16777216)
+    max_in_flight: int = Field(4, description="Maximum chunks sent but not yet acknowledged.", gt=0, le=64)
+    transactional: bool = Field(False, description="Publish all chunks in one transaction, so read_committed consumers, consume_large_messages included, never see a partial or aborted payload.")
+
+class ListTopics(ClusterOption, OutputOptions):
+    prefix: Optional[str] = Field(None, description="Only list topics whose name starts with this prefix.")
+    pattern: Optional[str] = Field(None, description="Only list topics whose name matches this regular expression (searched anywhere in the name).")
+    include_internal: bool = Field(False, description="Include internal topics such as __consumer_offsets.")
+    sort: Literal["asc", "desc"] = Field("asc", description="Sort order of topic names.")
+    limit: int = Field(1000, description="Maximum number of topic names per page. Use the returned 'next_cursor' as 'cursor' to get the next page.", gt=0, le=10000)
+    bypass_cache: bool = Field(False, description="Query the cluster even if a cached topic list is available, and refresh the cache.")
+
+class GetTopicInfo(ClusterOption, OutputOptions):
     topic: str = Field(..., description="The name of the Kafka topic to get information about.")
+    bypass_cache: bool = Field(False, description="Query the cluster even if cached topic information is available, and refresh the cache.")
+
+class DescribeTopics(ClusterOption, OutputOptions):
+    topics: Optional[List[str]] = Field(None, description="Explicit topic names to describe.")
+    pattern: Optional[str] = Field(None, description="Describe every topic whose name matches this pattern.")
+    pattern_type: Literal["glob", "regex"] = Field("glob", description="How to interpret 'pattern': a shell-style glob (e.g. 'orders.*') or a regular expression matched against the whole name.")
+    include_configs: bool = Field(True, description="Also fetch topic configurations.")
+    batch_size: int = Field(50, description="Topics per metadata/config request.", gt=0, le=1000)
+    max_concurrency: int = Field(4, description="Maximum number of batches in flight at once.", gt=0, le=32)
+    bypass_cache: bool = Field(False, description="Query the cluster even for topics with cached information.")
+
+    @model_validator(mode="after")
+    def check_selection(self) -> "DescribeTopics":
+        if not self.topics and not self.pattern:
+            raise ValueError("Either 'topics' or 'pattern' must be provided.")
+        return self
+
+class GetTopicOffsets(ClusterOption, OutputOptions):
+    topics: List[str] = Field(..., description="Topics to report offsets for.", min_length=1)
+    group_ids: Optional[List[str]] = Field(None, description="Consumer groups to report lag for. If omitted, every group with committed offsets on these topics is reported.")
+    include_lag: bool = Field(True, description="Fetch committed offsets and compute consumer group lag.")
+    max_concurrency: int = Field(16, description="Maximum number of consumer group offset fetches in flight at once.", gt=0, le=128)
 
-class DeleteTopic(BaseModel):
+class TopicStats(ClusterOption, OutputOptions):
+    topic: str = Field(..., description="The Kafka topic to summarize.")
+    partitions: Optional[List[int]] = Field(None, description="Partitions to include. Defaults to all partitions of the topic.")
+    sample_per_partition: int = Field(1000, description="Read at most this many of the most recent records of each partition.", gt=0, le=100000)
+    window_ms: int = Field(5000, description="Measure message rates from end offset growth over this many milliseconds. 0 estimates rates from the sampled records' timestamps instead.", ge=0, le=60000)
+    top_keys: int = Field(5, description="Number of most frequent keys to return.", ge=0, le=50)
+    timeout_ms: int = Field(30000, description="Maximum time in milliseconds to sample. Stats cover what was read by then.", gt=0, le=120000)
+
+class ListConsumerGroups(ClusterOption, OutputOptions):
+    prefix: Optional[str] = Field(None, description="Only list groups whose id starts with this prefix.")
+    pattern: Optional[str] = Field(None, description="Only list groups whose id matches this shell-style glob, e.g. 'billing-*'.")
+    include_state: bool = Field(False, description="Also report each group's state and member count.")
+    states: Optional[List[Literal["Stable", "Empty", "Dead", "PreparingRebalance", "CompletingRebalance"]]] = Field(None, description="Only list groups in one of these states. Implies 'include_state'.")
+    max_concurrency: int = Field(16, description="Maximum number of coordinator requests in flight at once.", gt=0, le=128)
+
+class DescribeConsumerGroups(ClusterOption, OutputOptions):
+    group_ids: List[str] = Field(..., description="The consumer groups to describe. They are described with one request per coordinator broker.", min_length=1, max_length=10000)
+    include_offsets: bool = Field(True, description="Also fetch committed offsets and compute lag per partition.")
+    max_concurrency: int = Field(16, description="Maximum number of coordinator requests in flight at once.", gt=0, le=128)
+
+class ResetConsumerGroupOffsets(ClusterOption, SummaryOutputOptions):
+    group_ids: List[str] = Field(..., description="The consumer groups to reset. Groups with active members are skipped and reported as errors.", min_length=1, max_length=10000)
+    topics: List[str] = Field(..., description="Topics whose committed offsets are reset.", min_length=1)
+    partitions: Optional[List[int]] = Field(None, description="Only reset these partitions of every topic. Defaults to all partitions.")
+    to: Literal["earliest", "latest", "timestamp", "offsets"] = Field(..., description="Reset to the start or end of each partition, to the first message at or after 'timestamp_ms', or to explicit 'offsets'.")
+    timestamp_ms: Optional[int] = Field(None, description="Epoch time in milliseconds to reset to, with to='timestamp'. Partitions without newer messages are reset to their end.", ge=0)
+    offsets: Optional[Dict[str, Dict[int, int]]] = Field(None, description="Offsets per topic and partition with to='offsets', e.g. {\"orders\": {\"0\": 1200}}. Partitions not given are left alone; offsets outside the partition's range are clamped.")
+    dry_run: bool = Field(False, description="Only report the offsets each group would be reset to.")
+    max_concurrency: int = Field(16, description="Maximum number of groups committing at once.", gt=0, le=128)
+
+    @model_validator(mode="after")
+    def check_target(self) -> "ResetConsumerGroupOffsets":
+        if self.to == "timestamp" and self.timestamp_ms is None:
+            raise ValueError("to='timestamp' requires 'timestamp_ms'.")
+        if self.to == "offsets" and not self.offsets:
+            raise ValueError("to='offsets' requires 'offsets'.")
+        return self
+
+class DeleteConsumerGroups(ClusterOption, SummaryOutputOptions):
+    group_ids: List[str] = Field(..., description="The consumer groups to delete, with their committed offsets. Groups with active members are not deleted.", min_length=1, max_length=10000)
+    max_concurrency: int = Field(16, description="Maximum number of coordinator requests in flight at once.", gt=0, le=128)
+
+class DeleteTopic(ClusterOption):
     topic: str = Field(..., description="The name of the Kafka topic to delete.")
 
-class CreateTopic(BaseModel):
+class CreateTopic(ClusterOption):
     topic: str = Field(..., description="The name of the new Kafka topic to create.")
     num_partitions: int = Field(1, description="Number of partitions for the new topic.", gt=0)
     replication_factor: int = Field(1, description="Replication factor for the new topic.", gt=0)
     config: Optional[Dict[str, str]] = Field(None, description="Optional topic-level configurations (e.g., 'retention.ms').")
 
-# Add models for other tools like ConsumeMessages if implemented
-# class ConsumeMessages(BaseModel):
-#     topic: str = Field(..., description="The Kafka topic to consume messages from.")
-#     group_id: Optional[str] = Field(None, description="Consumer group ID. If None, a random group ID might be used.")
-#     max_messages: int = Field(10, description="Maximum number of messages to consume.", gt=0)
-#     timeout_ms: int = Field(5000, description="Time in milliseconds to wait for messages.")
+class TopicSpec(BaseModel):
+    topic: str = Field(..., description="The name of the topic.")
+    num_partitions: int = Field(1, description="Number of partitions for the new topic.", gt=0)
+    replication_factor: int = Field(1, description="Replication factor for the new topic.", gt=0)
+    config: Optional[Dict[str, Optional[str]]] = Field(None, description="Topic-level configurations (e.g., 'retention.ms'). With if_exists='update_configs', a null value removes the override from an existing topic.")
+
+class CreateTopics(ClusterOption, SummaryOutputOptions):
+    topics: List[TopicSpec] = Field(..., description="The topics to create. All are sent in one CreateTopics request.", min_length=1, max_length=10000)
+    validate_only: bool = Field(False, description="Dry run: the broker validates the request without creating anything, and config updates are only reported.")
+    if_exists: Literal["error", "skip", "update_configs"] = Field("error", description="What to do with topics that already exist: report an error, skip them, or apply their 'config' to the existing topic.")
+    timeout_ms: int = Field(30000, description="How long the controller may take to create the topics before answering.", gt=0, le=300000)
+
+    @model_validator(mode="after")
+    def check_unique(self) -> "CreateTopics":
+        names = [spec.topic for spec in self.topics]
+        if len(names) != len(set(names)):
+            raise ValueError("Topic names must be unique.")
+        return self
+
+class GetConnectionStats(ClusterOption, OutputOptions):
+    # No arguments needed for connection stats beyond the cluster and output options
+    pass
+
+class GetServerMetrics(OutputOptions):
+    format: Literal["json", "prometheus"] = Field("json", description="'json' summarizes counters, gauges and latency histograms with estimated p50/p99; 'prometheus' returns the Prometheus text exposition format.")
+
+class FlushMetadataCache(ClusterOption):
+    topic: Optional[str] = Field(None, description="Only drop cached metadata for this topic. If omitted, the whole cache is flushed.")
+
+class ConsumeMessages(ClusterOption, OutputOptions, PayloadCodecs):
+    topic: str = Field(..., description="The Kafka topic to consume messages from.")
+    partitions: Optional[List[int]] = Field(None, description="Partitions to read. Defaults to all partitions of the topic.")
+    start: Literal["earliest", "latest"] = Field("earliest", description="Where to start reading when no offset or timestamp is given for a partition.")
+    offsets: Optional[Dict[int, int]] = Field(None, description="Explicit start offset per partition, e.g. {\"0\": 1200}. Overrides 'start' and 'start_timestamp_ms'.")
+    start_timestamp_ms: Optional[int] = Field(None, description="Start at the first message with a timestamp at or after this epoch time in milliseconds.", ge=0)
+    from_end: Optional[int] = Field(None, description="Start this many messages before the end of each partition (read the most recent messages).", gt=0)
+    max_messages: int = Field(10, description="Maximum number of messages to return.", gt=0, le=10000)
+    max_bytes: int = Field(1048576, description="Stop once the returned keys and values reach this many bytes.", gt=0)
+    timeout_ms: int = Field(5000, description="Maximum time in milliseconds to wait for messages. The call never blocks longer than this.", gt=0, le=120000)
 
-# Remove original RabbitMQ models
-# class Enqueue(BaseModel):
-#     queue: str
-#     message: str
+    @property
+    def reads_new_data(self) -> bool:
+        # Only new messages are read, so a repeated call returns different ones
+        return self.start == "latest" and not self.offsets and self.start_timestamp_ms is None and self.from_end is None
 
-# class Fanout(BaseModel):
-#     exchange: str
-#     message: str
+    @model_validator(mode="after")
+    def check_cursor(self) -> "ConsumeMessages":
+        if self.cursor and self.reads_new_data:
+            raise ValueError("A cursor cannot page a start='latest' read; continue from 'next_offsets' with 'offsets' instead.")
+        return self
 
-# class ListQueues(BaseModel):
-#     pass
+class ConsumeLargeMessages(ClusterOption, OutputOptions):
+    topic: str = Field(..., description="The Kafka topic to read chunked payloads from.")
+    partitions: Optional[List[int]] = Field(None, description="Partitions to read. Defaults to all partitions of the topic.")
+    start: Literal["earliest", "latest"] = Field("earliest", description="Where to start reading when no offset or timestamp is given for a partition.")
+    offsets: Optional[Dict[int, int]] = Field(None, description="Explicit start offset per partition, e.g. the 'first_offset' returned by publish_large_message. Overrides 'start' and 'start_timestamp_ms'.")
+    start_timestamp_ms: Optional[int] = Field(None, description="Start at the first message with a timestamp at or after this epoch time in milliseconds.", ge=0)
+    message_id: Optional[str] = Field(None, description="Only reassemble the payload with this id.")
+    skip_message_ids: Optional[List[str]] = Field(None, description="Ids of payloads not to return again. Pass the 'skip_message_ids' of the previous result together with its 'next_offsets' as 'offsets'.")
+    max_messages: int = Field(1, description="Stop after reassembling this many payloads.", gt=0, le=1000)
+    value_codec: Literal["utf-8", "base64"] = Field("utf-8", description="How returned payloads are converted to text.")
+    output_dir: Optional[str] = Field(None, description="Write payloads as files into this directory, relative to the server's file directory (--file-dir), instead of returning them. Memory use is then one chunk at a time.")
+    max_inline_bytes: int = Field(1048576, description="Largest payload returned in the result. Larger ones are only described unless written to output_dir.", gt=0, le=67108864)
+    max_pending_bytes: int = Field(67108864, description="Memory for payloads still being reassembled. When exceeded, the oldest incomplete payload is dropped.", gt=0, le=1073741824)
+    timeout_ms: int = Field(30000, description="Maximum time in milliseconds to read.", gt=0, le=300000)
 
-# class ListExchanges(BaseModel):
-#     pass
+    @property
+    def reads_new_data(self) -> bool:
+        # Only new messages are read, so a repeated call returns different ones
+        return self.start == "latest" and not self.offsets and self.start_timestamp_ms is None
 
-# class GetQueueInfo(BaseModel):
-#     queue: str
-#     vhost: Optional[str] = "/"
+    @model_validator(mode="after")
+    def check_cursor(self) -> "ConsumeLargeMessages":
+        if self.cursor and self.reads_new_data:
+            raise ValueError("A cursor cannot page a start='latest' read; continue from 'next_offsets' with 'offsets' instead.")
+        return self
 
-# class DeleteQueue(BaseModel):
-#     queue: str
-#     vhost: Optional[str] = "/"
+class CopyMessages(ClusterOption, SummaryOutputOptions):
+    source_topic: str = Field(..., description="The Kafka topic to copy messages from.")
+    target_topic: str = Field(..., description="The Kafka topic to copy messages into. It must already exist.")
+    target_cluster: Optional[str] = Field(None, description="Cluster of the target topic. Defaults to the source cluster.")
+    partitions: Optional[List[int]] = Field(None, description="Source partitions to copy. Defaults to all partitions of the topic.")
+    start: Literal["earliest", "latest"] = Field("earliest", description="Where to start copying when no offset or timestamp is given for a partition.")
+    start_offsets: Optional[Dict[int, int]] = Field(None, description="First offset to copy per partition, e.g. {\"0\": 1200}. Overrides 'start' and 'start_timestamp_ms'.")
+    start_timestamp_ms: Optional[int] = Field(None, description="Start at the first message with a timestamp at or after this epoch time in milliseconds.", ge=0)
+    end_offsets: Optional[Dict[int, int]] = Field(None, description="Offset per partition to stop before (exclusive). Defaults to the end of each partition when the call starts.")
+    end_timestamp_ms: Optional[int] = Field(None, description="Stop copying a partition at the first message newer than this epoch time in milliseconds.", ge=0)
+    key: Optional[str] = Field(None, description="Only copy messages with exactly this key.")
+    headers: Optional[Dict[str, str]] = Field(None, description="Only copy messages carrying all of these header values.")
+    contains: Optional[str] = Field(None, description="Only copy messages whose value contains this substring.")
+    regex: Optional[str] = Field(None, description="Only copy messages whose value matches this regular expression.")
+    ignore_case: bool = Field(False, description="Make 'contains' and 'regex' case-insensitive (ASCII only for 'contains').")
+    rekey_json_path: Optional[str] = Field(None, description="Replace each message's key with the value at this JSON path in its value, e.g. '$.order.customer_id'. Without it keys are copied unchanged.")
+    preserve_partitions: bool = Field(False, description="Write each message to the same partition number it was read from. Otherwise the target's partitioner places it by key.")
+    preserve_timestamps: bool = Field(True, description="Keep each message's original timestamp.")
+    max_messages: Optional[int] = Field(None, description="Stop after copying this many messages.", gt=0)
+    max_messages_per_second: Optional[float] = Field(None, description="Copy at most this many messages per second. Unlimited by default.", gt=0)
+    max_in_flight: int = Field(1000, description="Maximum messages sent but not yet acknowledged by the target.", gt=0, le=100000)
+    stop_on_error: bool = Field(True, description="Stop at the first message the target rejects. Otherwise failures are counted and copying continues.")
+    timeout_ms: int = Field(300000, description="Maximum time in milliseconds to copy. Where each partition stopped is returned.", gt=0, le=3600000)
 
-# class PurgeQueue(BaseModel):
-#     queue: str
-#     vhost: Optional[str] = "/"
+class TailTopic(ClusterOption, SummaryOutputOptions, PayloadCodecs):
+    topic: str = Field(..., description="The Kafka topic to watch.")
+    partitions: Optional[List[int]] = Field(None, description="Partitions to watch. Defaults to all partitions of the topic.")
+    timeout_ms: int = Field(30000, description="How long to watch the topic in milliseconds.", gt=0, le=600000)
+    max_records: int = Field(1000, description="Stop after delivering this many records.", gt=0, le=100000)
+    max_records_per_second: float = Field(100.0, description="Deliver at most this many records per second; faster traffic is buffered.", gt=0, le=10000)
+    max_notification_bytes: int = Field(65536, description="Maximum bytes of keys and values per notification. A larger single record is sent on its own.", gt=0)
+    max_buffered: int = Field(10000, description="Records kept waiting for delivery. When the topic outpaces max_records_per_second, the oldest are dropped and counted.", gt=0, le=100000)
 
-# class DeleteExchange(BaseModel):
-#     exchange: str
-#     vhost: Optional[str] = "/"
+class SearchMessages(ClusterOption, OutputOptions, PayloadCodecs):
+    topic: str = Field(..., description="The Kafka topic to search.")
+    partitions: Optional[List[int]] = Field(None, description="Partitions to search. Defaults to all partitions of the topic.")
+    since_ms: Optional[int] = Field(None, description="Search messages from the last this many milliseconds, e.g. 3600000 for the last hour.", gt=0)
+    start_timestamp_ms: Optional[int] = Field(None, description="Search messages with a timestamp at or after this epoch time in milliseconds. Defaults to the beginning of each partition.", ge=0)
+    end_timestamp_ms: Optional[int] = Field(None, description="Stop reading a partition at the first message newer than this epoch time in milliseconds.", ge=0)
+    key: Optional[str] = Field(None, description="Only match messages with exactly this key.")
+    headers: Optional[Dict[str, str]] = Field(None, description="Only match messages carrying all of these header values.")
+    contains: Optional[str] = Field(None, description="Only match messages whose value contains this substring.")
+    regex: Optional[str] = Field(None, description="Only match messages whose value matches this regular expression (searched anywhere in the value).")
+    json_path: Optional[str] = Field(None, description="Only match JSON messages that have this path, e.g. '$.order.customer_id' or 'items[0].sku'.")
+    json_value: Optional[Any] = Field(None, description="With json_path: only match when the value at the path equals this JSON value.")
+    ignore_case: bool = Field(False, description="Make 'contains' and 'regex' case-insensitive (ASCII only for 'contains').")
+    max_matches: int = Field(10, description="Stop after this many matching messages.", gt=0, le=1000)
+    max_scan_bytes: int = Field(67108864, description="Stop after scanning this many bytes of keys and values.", gt=0)
+    timeout_ms: int = Field(10000, description="Maximum time in milliseconds to search. Results found so far are returned.", gt=0, le=120000)
 
-# class GetExchangeInfo(BaseModel):
-#     exchange: str
-#     vhost: Optional[str] = "/"
+    @model_validator(mode="after")
+    def check_criteria(self) -> "SearchMessages":
+        if self.since_ms is not None and self.start_timestamp_ms is not None:
+            raise ValueError("Only one of 'since_ms' and 'start_timestamp_ms' may be provided.")
+        if self.json_value is not None and not self.json_path:
+            raise ValueError("'json_value' requires 'json_path'.")
+        if not any((self.key is not None, self.headers, self.contains, self.regex, self.json_path)):
+            raise ValueError("At least one of 'key', 'headers', 'contains', 'regex' or 'json_path' must be provided. Use consume_messages to read without filtering.")
+        return self
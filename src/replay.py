@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .handlers import MISSING, RangeReader, parse_json_path, resolve_json_path, seek_start_positions
+from .logging_setup import HOT_PATH
+from .metrics import METRICS
+
+if TYPE_CHECKING:
+    from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+
+logger = logging.getLogger(__name__)
+
+# Awaited with (records copied so far, records in the requested range)
+Progress = Callable[[int, int], Awaitable[None]]
+
+# Minimum seconds between progress notifications
+PROGRESS_INTERVAL = 0.5
+# Delivery errors listed in the result; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def build_rekey(json_path: str) -> Callable[[Any], Optional[bytes]]:
+    """Compiles a function deriving a record's new key from a JSON path into its value.
+
+    Strings become the UTF-8 key as is and other JSON values their JSON text.
+    Records that are not JSON or lack the path get no key.
+    """
+    steps = parse_json_path(json_path)
+
+    def rekey(msg: Any) -> Optional[bytes]:
+        if msg.value is None:
+            return None
+        try:
+            found = resolve_json_path(json.loads(msg.value), steps)
+        except ValueError:
+            return None
+        if found is MISSING or found is None:
+            return None
+        return (found if isinstance(found, str) else json.dumps(found, separators=(",", ":"))).encode('utf-8')
+
+    return rekey
+
+
+async def handle_copy_messages(
+    consumer: "AIOKafkaConsumer",
+    producer: "AIOKafkaProducer",
+    source_topic: str,
+    partitions: List[int],
+    target_topic: str,
+    start: str = "earliest",
+    start_offsets: Optional[Dict[int, int]] = None,
+    start_timestamp_ms: Optional[int] = None,
+    end_offsets: Optional[Dict[int, int]] = None,
+    end_timestamp_ms: Optional[int] = None,
+    matches: Optional[Callable[[Any], bool]] = None,
+    rekey: Optional[Callable[[Any], Optional[bytes]]] = None,
+    preserve_partitions: bool = False,
+    preserve_timestamps: bool = True,
+    max_messages: Optional[int] = None,
+    max_messages_per_second: Optional[float] = None,
+    max_in_flight: int = 1000,
+    stop_on_error: bool = True,
+    timeout_ms: int = 300000,
+    progress: Optional[Progress] = None,
+) -> Dict[str, Any]:
+    """Copies a range of records from one topic into another.
+
+    Fetched batches are handed straight to the producer without decoding:
+    keys, values and headers are passed through as bytes, so the producer can
+    batch and compress them like any other traffic. Only the optional filter
+    and rekey functions look at payloads. At most max_in_flight sends are
+    awaiting acknowledgement at a time, which bounds memory while the fetcher
+    keeps reading ahead, and max_messages_per_second paces sends with a token
+    bucket. Each partition is copied from its start position up to end_offsets
+    (exclusive), end_timestamp_ms, or its end offset when the call started, so
+    copying a topic into itself terminates. The call stops early at
+    max_messages or timeout_ms, or at the first failed delivery with
+    stop_on_error, and reports where each partition stopped.
+    """
+    from aiokafka.structs import TopicPartition
+    logger.info("Copying topic '%s' partitions %s into topic '%s'...", source_topic, partitions, target_topic, extra=HOT_PATH)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    tps = [TopicPartition(source_topic, p) for p in partitions]
+
+    try:
+        positions, current_ends = await asyncio.wait_for(
+            seek_start_positions(consumer, tps, start, start_offsets, start_timestamp_ms),
+            timeout=timeout_ms / 1000,
+        )
+        stop_at = {tp: min(current_ends[tp], end_offsets[tp.partition]) if end_offsets and tp.partition in end_offsets else current_ends[tp] for tp in tps}
+        total = sum(max(0, stop_at[tp] - positions[tp]) for tp in tps)
+        if max_messages is not None:
+            total = min(total, max_messages)
+
+        in_flight: Set[asyncio.Future] = set()
+        # Source partition, offset and size of every send awaiting acknowledgement
+        origins: Dict[asyncio.Future, Any] = {}
+        read = 0
+        read_bytes = 0
+        skipped = 0
+        sent = 0
+        copied = 0
+        copied_bytes = 0
+        failed = 0
+        errors: List[Dict[str, Any]] = []
+        # Lowest failed offset per source partition, where a resumed copy must restart
+        first_failed: Dict[int, int] = {}
+        tokens = max_messages_per_second or 0.0
+        refilled_at = loop.time()
+        reported_at = loop.time()
+        stopped = None
+
+        def fail(partition: int, offset: int, error: BaseException) -> None:
+            nonlocal failed, stopped
+            failed += 1
+            first_failed[partition] = min(offset, first_failed.get(partition, offset))
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"partition": partition, "offset": offset, "error": f"{type(error).__name__}: {error}"})
+            if stop_on_error:
+                stopped = "error"
+
+        def settle(done: Set[asyncio.Future]) -> None:
+            nonlocal copied, copied_bytes
+            for future in done:
+                in_flight.discard(future)
+                partition, offset, size = origins.pop(future)
+                error = future.exception()
+                if error is None:
+                    copied += 1
+                    copied_bytes += size
+                else:
+                    fail(partition, offset, error)
+
+        reader = RangeReader(consumer, tps, positions, stop_at, deadline, max_records=max_in_flight)
+        async for tp, msg in reader.records():
+            if end_timestamp_ms is not None and msg.timestamp > end_timestamp_ms:
+                # Past the requested range; the rest of this partition is not read
+                reader.unread(tp, msg)
+                reader.finish(tp)
+                continue
+            if loop.time() >= deadline:
+                reader.unread(tp, msg)
+                stopped = "timeout"
+                break
+            if matches is not None and not matches(msg):
+                read += 1
+                read_bytes += len(msg.key or b"") + len(msg.value or b"")
+                skipped += 1
+                continue
+            if len(in_flight) >= max_in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                settle(done)
+                if stopped is not None:
+                    reader.unread(tp, msg)
+                    break
+            if max_messages_per_second:
+                now = loop.time()
+                tokens = min(max_messages_per_second, tokens + (now - refilled_at) * max_messages_per_second)
+                refilled_at = now
+                if tokens < 1:
+                    await asyncio.sleep((1 - tokens) / max_messages_per_second)
+                    tokens, refilled_at = 1.0, loop.time()
+                tokens -= 1
+
+            read += 1
+            read_bytes += len(msg.key or b"") + len(msg.value or b"")
+            key = rekey(msg) if rekey is not None else msg.key
+            sent += 1
+            try:
+                future = await producer.send(
+                    target_topic,
+                    value=msg.value,
+                    key=key,
+                    partition=msg.partition if preserve_partitions else None,
+                    timestamp_ms=msg.timestamp if preserve_timestamps else None,
+                    headers=list(msg.headers) if msg.headers else None,
+                )
+            except Exception as e:
+                # Rejected before being queued, e.g. too large or no metadata for the target
+                fail(msg.partition, msg.offset, e)
+            else:
+                in_flight.add(future)
+                origins[future] = (msg.partition, msg.offset, len(key or b"") + len(msg.value or b""))
+                if future.done():
+                    settle({future})
+            if loop.time() - reported_at >= PROGRESS_INTERVAL:
+                # Collect acknowledgements that arrived meanwhile without waiting for more
+                settle({future for future in in_flight if future.done()})
+                if progress is not None:
+                    await progress(copied, total)
+                reported_at = loop.time()
+            if stopped is not None:
+                break
+            if max_messages is not None and sent >= max_messages:
+                stopped = "max_messages"
+                break
+        if stopped is None:
+            stopped = "timeout" if reader.timed_out else "end"
+
+        # Every send is acknowledged (or failed) before reporting
+        if in_flight:
+            done, _ = await asyncio.wait(in_flight)
+            settle(done)
+        if progress is not None:
+            await progress(copied, total)
+
+        METRICS.inc("messages_consumed_total", read)
+        METRICS.inc("bytes_consumed_total", read_bytes)
+        METRICS.inc("messages_produced_total", copied)
+        METRICS.inc("bytes_produced_total", copied_bytes)
+        if failed:
+            logger.warning("%s of %s records failed to copy from topic '%s' to '%s'.", failed, copied + failed, source_topic, target_topic)
+        logger.info("Copied %s records (%s bytes) from topic '%s' to '%s' (%s).", copied, copied_bytes, source_topic, target_topic, stopped, extra=HOT_PATH)
+        return {
+            "source_topic": source_topic,
+            "target_topic": target_topic,
+            "copied": copied,
+            "copied_bytes": copied_bytes,
+            "skipped": skipped,
+            "failed": failed,
+            "errors": errors,
+            "stopped_reason": stopped,
+            # Where a follow-up copy of the same range would continue; after a
+            # stop on error, that is the first failed record of each partition
+            "next_offsets": {
+                tp.partition: min(positions[tp], first_failed.get(tp.partition, positions[tp])) if stop_on_error else positions[tp]
+                for tp in tps
+            },
+            "end_offsets": {tp.partition: stop_at[tp] for tp in tps},
+        }
+    except Exception as e:
+        logger.error("Failed to copy messages from topic '%s' to '%s': %s", source_topic, target_topic, e, exc_info=True)
+        raise
@@ -0,0 +1,154 @@
+import base64
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(obj: Any) -> Any:
+    """Encodes values the JSON encoders do not handle natively."""
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(obj).decode('ascii')
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    if hasattr(obj, "_asdict"):
+        return obj._asdict()
+    return str(obj)
+
+
+def _encode(obj: Any, pretty: bool = False) -> bytes:
+    """Serializes to UTF-8 JSON bytes, as sent to the client."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, default=_default, option=option)
+    return dumps(obj, pretty).encode('utf-8')
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """Serializes a tool result to JSON, compact unless pretty is set."""
+    if orjson is not None:
+        return _encode(obj, pretty).decode('utf-8')
+    if pretty:
+        return json.dumps(obj, default=_default, ensure_ascii=False, indent=2)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def project(obj: Any, fields: List[str]) -> Any:
+    """Keeps only the given dotted field paths of a result.
+
+    Lists are projected element by element, so "topics.topic_name" keeps just
+    the names of every described topic. Unknown fields are ignored.
+    """
+    tree: Dict[str, Any] = {}
+    for field in fields:
+        node = tree
+        for part in field.split("."):
+            node = node.setdefault(part, {})
+    return _project(obj, tree)
+
+
+def _project(obj: Any, tree: Dict[str, Any]) -> Any:
+    if not tree:
+        return obj
+    if isinstance(obj, list):
+        return [_project(item, tree) for item in obj]
+    if isinstance(obj, dict):
+        return {key: _project(obj[key], sub) for key, sub in tree.items() if key in obj}
+    return obj
+
+
+def encode_cursor(key: Optional[str], offset: int) -> str:
+    raw = json.dumps({"k": key, "o": offset}, separators=(",", ":")).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return data["k"], int(data["o"])
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def _page_key(obj: Dict[str, Any]) -> Optional[str]:
+    """Picks the top-level list to paginate: the longest one."""
+    lists = [(len(value), key) for key, value in obj.items() if isinstance(value, list)]
+    return max(lists)[1] if lists else None
+
+
+def render(
+    result: Any,
+    fields: Optional[List[str]] = None,
+    pretty: bool = False,
+    max_bytes: int = 0,
+    cursor: Optional[str] = None,
+    resumable: bool = True,
+) -> str:
+    """Projects, paginates and serializes a tool result.
+
+    When max_bytes is set and the UTF-8 encoded result would exceed it, the
+    result's main list (the result itself, or its longest top-level list) is
+    cut to fit and a "next_cursor" is added. Repeating the same call with that
+    cursor returns the next page. Without resumable, for calls that cannot be
+    repeated, the list is cut the same way but "omitted" counts the items left
+    out instead.
+    """
+    if fields:
+        result = project(result, fields)
+
+    key: Optional[str] = None
+    start = 0
+    if cursor:
+        key, start = decode_cursor(cursor)
+    if isinstance(result, list):
+        items, key = result, None
+    elif isinstance(result, dict):
+        key = key if key in result and isinstance(result[key], list) else _page_key(result)
+        items = result[key] if key is not None else None
+    else:
+        items = None
+
+    if items is None:
+        return dumps(result, pretty)
+
+    def assemble(page: List[Any], next_offset: Optional[int]) -> Any:
+        if key is None:
+            if next_offset is None and start == 0:
+                return page
+            envelope: Dict[str, Any] = {"items": page}
+        else:
+            envelope = dict(result)
+            envelope[key] = page
+        if next_offset is not None:
+            if resumable:
+                envelope["next_cursor"] = encode_cursor(key, next_offset)
+            else:
+                envelope["omitted"] = len(items) - next_offset
+            envelope["truncated"] = True
+        return envelope
+
+    page = items[start:]
+    data = _encode(assemble(page, None), pretty)
+    if not max_bytes or len(data) <= max_bytes:
+        return data.decode('utf-8')
+
+    # Measure the surrounding envelope once, then add items until the budget is spent
+    overhead = len(_encode(assemble([], start), pretty)) + 64
+    budget = max_bytes - overhead
+    used = 0
+    count = 0
+    for item in page:
+        used += len(_encode(item, pretty)) + 1
+        if used > budget and count:
+            break
+        count += 1
+    next_offset = start + count if start + count < len(items) else None
+    if next_offset is not None:
+        logger.debug("Result exceeds %s bytes, returning %s of %s items from offset %s.", max_bytes, count, len(items), start)
+    return dumps(assemble(page[:count], next_offset), pretty)
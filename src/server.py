@@ -4,50 +4,686 @@ from mcp.types import (
     TextContent,
     Tool,
 )
+import asyncio
 import logging
-# Removed RabbitMQ imports
-# from .connection import RabbitMQConnection, validate_rabbitmq_name
-# from .handlers import (
-#     handle_enqueue,
-#     handle_fanout,
-#     handle_list_queues,
-#     handle_list_exchanges,
-#     handle_get_queue_info,
-#     handle_delete_queue,
-#     handle_purge_queue,
-#     handle_delete_exchange,
-#     handle_get_exchange_info
-# )
-# from .admin import RabbitMQAdmin
-
-# Import Kafka handlers and admin (will be created later)
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+# Kafka handlers and admin operations; both import aiokafka only when first called
 from .handlers import (
     handle_publish_message,
-    handle_list_topics
+    handle_publish_messages,
+    handle_publish_transaction,
+    handle_list_topics,
+    fetch_topic_index,
+    handle_consume_messages,
+    handle_search_messages,
+    build_message_filter
     # Add other Kafka handlers here as needed
 )
 from .admin import (
     handle_get_topic_info,
     handle_delete_topic,
+    handle_create_topic,
+    handle_create_topics,
+    get_topic_partitions,
+    handle_describe_topics,
+    match_topics,
+    get_topics_partitions,
+    handle_get_topic_offsets,
     # Add other Kafka admin handlers here
 )
 
-# Import Kafka connection management (will be created later)
-from .connection import get_kafka_producer, get_kafka_admin_client # Assuming these helper functions
+# Shared, long-lived Kafka clients for the lifetime of the server
+from .connection import KafkaClientManager
+from .clusters import Cluster, ClusterRegistry
+from .cache import MetadataCache, TOPICS_KEY, topic_key
+from .serialization import dumps, render
+from .metrics import METRICS, current_tool, start_metrics_server
+from .codec import CodecRegistry
+from .tail import TailManager, handle_tail_topic
+from .replay import build_rekey, handle_copy_messages
+from .topic_stats import handle_topic_stats
+from .chunked import ChunkAssembler, handle_consume_chunked, handle_publish_chunked, resolve_local_path
+from .groups import handle_delete_consumer_groups, handle_describe_consumer_groups, handle_list_consumer_groups, handle_reset_consumer_group_offsets
+from .dispatch import SessionLimiter, SessionLimits, ToolBusyError, ToolDispatcher, ToolLimits, ToolRateLimitError, ToolTimeoutError, run_server_concurrently
 
+from .models import CreateTopic, CreateTopics, DeleteTopic, PublishMessage, PublishMessages, PublishTransaction, PublishLargeMessage, PayloadCodecs, ConsumeMessages, ConsumeLargeMessages, ListTopics, GetTopicInfo, FlushMetadataCache, DescribeTopics, GetTopicOffsets, TopicStats, ListConsumerGroups, DescribeConsumerGroups, ResetConsumerGroupOffsets, DeleteConsumerGroups, GetConnectionStats, GetServerMetrics, SearchMessages, TailTopic, CopyMessages, OutputOptions, ResultOptions
 from .tools import MCP_TOOLS # We will update tools.py later
 
 # Updated function signature to accept kafka_config dictionary
-async def serve(kafka_config: dict) -> None:
+async def serve(
+    kafka_config: Optional[dict] = None,
+    producer_config: Optional[dict] = None,
+    consumer_config: Optional[dict] = None,
+    consumer_pool_size: int = 8,
+    metadata_cache: Optional[MetadataCache] = None,
+    output_pretty: bool = False,
+    max_result_bytes: int = 262144,
+    clients: Optional[KafkaClientManager] = None,
+    streams: Optional[Tuple[Any, Any]] = None,
+    metrics_host: str = "127.0.0.1",
+    metrics_port: Optional[int] = None,
+    codecs: Optional[CodecRegistry] = None,
+    default_tool_limits: Optional[ToolLimits] = None,
+    tool_limits: Optional[Dict[str, ToolLimits]] = None,
+    clusters: Optional[ClusterRegistry] = None,
+    file_dir: Optional[str] = None,
+    transport: str = "stdio",
+    http_host: str = "127.0.0.1",
+    http_port: int = 8000,
+    max_sessions: int = 100,
+    session_limits: Optional[SessionLimits] = None,
+) -> None:
     # Setup server with new name
     server = Server("mcp-kafka")
     # Get logger configured in __init__.py
     logger = logging.getLogger("mcp-kafka")
     # Removed logger setup from here
 
-    # Kafka clients will be created within call_tool as needed,
-    # or potentially managed globally if frequent reuse is expected.
-    # We might need to handle their lifecycle (creation/closing).
+    # Kafka clients are created once per cluster and shared by every tool call.
+    # They are connected lazily, reconnected after broker failures and closed on
+    # exit. Topic metadata is cached per cluster; create/delete invalidate it.
+    # Without a registry the server talks to the one cluster in kafka_config; an
+    # injected manager (e.g. backed by an in-process fake) replaces its clients.
+    if clusters is None:
+        clusters = ClusterRegistry.single(
+            kafka_config or {},
+            clients=clients,
+            metadata_cache=metadata_cache,
+            producer_config=producer_config,
+            consumer_config=consumer_config,
+            consumer_pool_size=consumer_pool_size,
+        )
+    # Long-lived fetch loops behind tail_topic, shared by calls watching the same partitions
+    tails = TailManager()
+    # Payload codecs; compiled encoders/decoders and parsed schemas are cached
+    codecs = codecs or CodecRegistry()
+
+    def encoders(request: PayloadCodecs):
+        """(value encoder, key encoder) for a request's codec options."""
+        return (
+            codecs.encoder(request.value_codec, request.value_schema),
+            codecs.encoder(request.key_codec, request.key_schema),
+        )
+
+    def decoders(request: PayloadCodecs):
+        """(key decoder, value decoder) for a request's codec options."""
+        return (
+            codecs.decoder(request.key_codec, request.key_schema),
+            codecs.decoder(request.value_codec, request.value_schema),
+        )
+
+    # Tool calls run concurrently; the dispatcher bounds each tool's concurrency and queue
+    dispatcher = ToolDispatcher(default_tool_limits, overrides=tool_limits)
+    # Over HTTP many sessions share the dispatcher; each is also held to its own call rate
+    session_limiter = SessionLimiter(session_limits)
+    # Tool names used as metric labels; anything else is counted as "unknown"
+    known_tools = {tool.name for tool in MCP_TOOLS}
+
+    def collect_gauges():
+        """Cache and client state sampled at scrape time."""
+        for cluster in clusters.started():
+            cache_stats = cluster.metadata_cache.stats()
+            for stat in ("entries", "hits", "stale_hits", "misses", "evictions"):
+                yield f"metadata_cache_{stat}", {"cluster": cluster.name}, cache_stats[stat]
+            client_stats = cluster.clients.stats()
+            for client in ("producer", "transactional_producer", "admin_client", "offsets_consumer"):
+                labels = {"cluster": cluster.name, "client": client}
+                yield "client_connected", labels, int(client_stats[client]["connected"])
+                yield "client_starts", labels, client_stats[client]["starts"]
+                yield "client_failures", labels, client_stats[client]["failures"]
+            yield "consumer_pool_size", {"cluster": cluster.name}, client_stats["consumer_pool"]["size"]
+        tail_stats = tails.stats()
+        yield "tail_loops", {}, tail_stats["tails"]
+        yield "tail_subscribers", {}, tail_stats["subscribers"]
+        for tool, tool_stats in dispatcher.stats().items():
+            yield "tool_running", {"tool": tool}, tool_stats["running"]
+            yield "tool_queued", {"tool": tool}, tool_stats["queued"]
+
+    async def load_topics(cluster: Cluster):
+        async with cluster.clients.admin_client() as admin_client:
+            return await fetch_topic_index(admin_client)
+
+    async def load_topic_info(cluster: Cluster, topic: str):
+        async with cluster.clients.admin_client() as admin_client:
+            return await handle_get_topic_info(admin_client, topic)
+
+    async def load_topic_partitions(cluster: Cluster, topic: str):
+        async with cluster.clients.admin_client() as admin_client:
+            return await get_topic_partitions(admin_client, topic)
+
+    async def topic_partitions(cluster: Cluster, topic: str, partitions: Optional[List[int]]) -> List[int]:
+        """The requested partitions, or all partitions of the topic from the cache."""
+        if partitions:
+            return partitions
+        return await cluster.metadata_cache.get_or_load(
+            topic_key("partitions", topic),
+            lambda: load_topic_partitions(cluster, topic),
+        )
+
+    async def resolve_partitions(cluster: Cluster, topics: List[str]) -> Dict[str, List[int]]:
+        """Partition ids per topic, with one metadata request for all cache misses."""
+        metadata_cache = cluster.metadata_cache
+        resolved = {topic: metadata_cache.peek(topic_key("partitions", topic)) for topic in topics}
+        missing = [topic for topic, partitions in resolved.items() if partitions is None]
+        if missing:
+            async with cluster.clients.admin_client() as admin_client:
+                fetched = await get_topics_partitions(admin_client, missing)
+            for topic, partitions in fetched.items():
+                metadata_cache.put(topic_key("partitions", topic), partitions)
+                resolved[topic] = partitions
+        return resolved
+
+    def format_result(result: Any, options: ResultOptions, paginate: bool = True) -> list[TextContent]:
+        """Serializes a structured tool result as JSON, applying the caller's
+        field projection, size limit and pagination cursor. Tools that page
+        natively pass paginate=False. Results of calls that cannot be repeated
+        (writes, and reads of new data) are cut without a cursor."""
+        resumable = isinstance(options, OutputOptions) and not getattr(options, "reads_new_data", False)
+        with METRICS.time_phase("encode"):
+            text = render(
+                result,
+                fields=options.fields,
+                pretty=output_pretty if options.pretty is None else options.pretty,
+                max_bytes=(max_result_bytes if options.max_result_bytes is None else options.max_result_bytes) if paginate else 0,
+                cursor=options.cursor if paginate and resumable else None,
+                resumable=resumable,
+            )
+        return [TextContent(type="text", text=text)]
+
+    def progress_reporter(tool_name: str, require_token: bool = True):
+        """Returns a callback that streams progress and partial results to the
+        client, or None if the client did not ask for progress notifications.
+        With require_token=False, partial results are still sent as log
+        messages when there is no progress token."""
+        ctx = server.request_context
+        token = ctx.meta.progressToken if ctx.meta else None
+        if token is None and require_token:
+            return None
+
+        async def report(progress: float, total: Optional[float] = None, partial: Any = None) -> None:
+            if token is not None:
+                await ctx.session.send_progress_notification(token, progress, total)
+            if partial is not None:
+                await ctx.session.send_log_message(
+                    "info",
+                    {"tool": tool_name, "progress": progress, "total": total, "partial": partial},
+                    logger="mcp-kafka",
+                )
+        return report
+
+    # Tool handlers, each with its own admission limits. Cheap metadata reads get
+    # many slots; heavy scans and topic mutations get few, so they cannot starve them.
+    # Tools borrow the shared Kafka clients instead of connecting per call.
+
+    @dispatcher.tool("publish_message", max_concurrency=32, max_queue=256, timeout_seconds=30)
+    async def publish_message_tool(arguments: dict) -> list[TextContent]:
+        request = PublishMessage(**arguments)
+        cluster = clusters.get(request.cluster)
+        encode_value, encode_key = encoders(request)
+
+        async with cluster.clients.producer() as producer:
+            await handle_publish_message(producer, request.topic, request.message, request.key, encode_value, encode_key)
+        return [TextContent(type="text", text="Message published successfully.")]
+
+    @dispatcher.tool("publish_messages", max_concurrency=8, max_queue=64)
+    async def publish_messages_tool(arguments: dict) -> list[TextContent]:
+        request = PublishMessages(**arguments)
+        cluster = clusters.get(request.cluster)
+        encode_value, encode_key = encoders(request)
+        async with cluster.clients.producer() as producer:
+            result = await handle_publish_messages(producer, request.topic, request.records, encode_value, encode_key)
+        return format_result(result, request)
+
+    # Transactions are serialized on the one transactional producer, so calls mostly queue
+    @dispatcher.tool("publish_transaction", max_concurrency=4, max_queue=32)
+    async def publish_transaction_tool(arguments: dict) -> list[TextContent]:
+        request = PublishTransaction(**arguments)
+        cluster = clusters.get(request.cluster)
+        encode_value, encode_key = encoders(request)
+        async with cluster.clients.transaction() as producer:
+            result = await handle_publish_transaction(producer, request.records, encode_value, encode_key)
+        # Reached only once the transaction has committed
+        return format_result({"committed": True, **result}, request)
+
+    # Large payloads hold a producer for a while; a few at a time, with a longer deadline
+    @dispatcher.tool("publish_large_message", max_concurrency=4, max_queue=16, timeout_seconds=600)
+    async def publish_large_message_tool(arguments: dict) -> list[TextContent]:
+        request = PublishLargeMessage(**arguments)
+        if (request.message is None) == (request.file_path is None):
+            raise ValueError("Give either 'message' or 'file_path'.")
+        cluster = clusters.get(request.cluster)
+        # Transactional chunks are serialized on the transactional producer
+        lease = cluster.clients.transaction() if request.transactional else cluster.clients.producer()
+        options = dict(
+            key=request.key.encode('utf-8') if request.key is not None else None,
+            partition=request.partition,
+            headers=request.headers,
+            chunk_bytes=request.chunk_bytes,
+            max_in_flight=request.max_in_flight,
+        )
+        if request.file_path is not None:
+            path = resolve_local_path(file_dir, request.file_path)
+            # Opened off the event loop like the reads, since the file may be on slow storage
+            f = await asyncio.to_thread(open, path, "rb")
+            try:
+                async with lease as producer:
+                    result = await handle_publish_chunked(
+                        producer, request.topic, file=f, size=os.fstat(f.fileno()).st_size,
+                        name=request.name or os.path.basename(path), **options,
+                    )
+            finally:
+                f.close()
+        else:
+            payload = codecs.encoder(request.value_codec, None)(request.message)
+            async with lease as producer:
+                result = await handle_publish_chunked(producer, request.topic, payload=payload, name=request.name, **options)
+        return format_result(result, request)
+
+    @dispatcher.tool("consume_messages", max_concurrency=8, max_queue=32)
+    async def consume_messages_tool(arguments: dict) -> list[TextContent]:
+        request = ConsumeMessages(**arguments)
+        cluster = clusters.get(request.cluster)
+        decode_key, decode_value = decoders(request)
+        partitions = await topic_partitions(cluster, request.topic, request.partitions)
+        async with cluster.clients.consumer(request.topic, partitions) as consumer:
+            result = await handle_consume_messages(
+                consumer,
+                request.topic,
+                partitions,
+                start=request.start,
+                offsets=request.offsets,
+                start_timestamp_ms=request.start_timestamp_ms,
+                from_end=request.from_end,
+                max_messages=request.max_messages,
+                max_bytes=request.max_bytes,
+                timeout_ms=request.timeout_ms,
+                decode_key=decode_key,
+                decode_value=decode_value,
+            )
+        return format_result(result, request)
+
+    @dispatcher.tool("consume_large_messages", max_concurrency=4, max_queue=16)
+    async def consume_large_messages_tool(arguments: dict) -> list[TextContent]:
+        request = ConsumeLargeMessages(**arguments)
+        cluster = clusters.get(request.cluster)
+        output_dir = None
+        if request.output_dir is not None:
+            output_dir = resolve_local_path(file_dir, request.output_dir)
+            await asyncio.to_thread(os.makedirs, output_dir, exist_ok=True)
+        assembler = ChunkAssembler(
+            output_dir=output_dir,
+            max_inline_bytes=request.max_inline_bytes,
+            max_pending_bytes=request.max_pending_bytes,
+            message_id=request.message_id,
+            skip_message_ids=request.skip_message_ids,
+        )
+        partitions = await topic_partitions(cluster, request.topic, request.partitions)
+        # Chunks of aborted or unfinished transactional publishes are never reassembled
+        async with cluster.clients.consumer(request.topic, partitions, isolation_level="read_committed") as consumer:
+            result = await handle_consume_chunked(
+                consumer,
+                request.topic,
+                partitions,
+                assembler,
+                start=request.start,
+                offsets=request.offsets,
+                start_timestamp_ms=request.start_timestamp_ms,
+                max_messages=request.max_messages,
+                timeout_ms=request.timeout_ms,
+                decode_value=codecs.decoder(request.value_codec, None),
+            )
+        return format_result(result, request)
+
+    @dispatcher.tool("search_messages", max_concurrency=4, max_queue=16)
+    async def search_messages_tool(arguments: dict) -> list[TextContent]:
+        request = SearchMessages(**arguments)
+        cluster = clusters.get(request.cluster)
+        decode_key, decode_value = decoders(request)
+        matches = build_message_filter(
+            # Compare raw key bytes as the key codec would have written them
+            key=codecs.encoder(request.key_codec, request.key_schema)(request.key) if request.key is not None else None,
+            headers=request.headers,
+            contains=request.contains,
+            regex=request.regex,
+            json_path=request.json_path,
+            json_value=request.json_value,
+            ignore_case=request.ignore_case,
+        )
+        start_timestamp_ms = request.start_timestamp_ms
+        if request.since_ms is not None:
+            start_timestamp_ms = int(time.time() * 1000) - request.since_ms
+        partitions = await topic_partitions(cluster, request.topic, request.partitions)
+        async with cluster.clients.consumer(request.topic, partitions) as consumer:
+            result = await handle_search_messages(
+                consumer,
+                request.topic,
+                partitions,
+                matches,
+                start_timestamp_ms=start_timestamp_ms,
+                end_timestamp_ms=request.end_timestamp_ms,
+                max_matches=request.max_matches,
+                max_scan_bytes=request.max_scan_bytes,
+                timeout_ms=request.timeout_ms,
+                decode_key=decode_key,
+                decode_value=decode_value,
+            )
+        return format_result(result, request)
+
+    # Long-running bulk copies; few at a time so they cannot monopolize the shared producer
+    @dispatcher.tool("copy_messages", max_concurrency=2, max_queue=4)
+    async def copy_messages_tool(arguments: dict) -> list[TextContent]:
+        request = CopyMessages(**arguments)
+        source = clusters.get(request.cluster)
+        target = clusters.get(request.target_cluster) if request.target_cluster else source
+        filtered = any((request.key is not None, request.headers, request.contains, request.regex))
+        matches = build_message_filter(
+            key=request.key,
+            headers=request.headers,
+            contains=request.contains,
+            regex=request.regex,
+            ignore_case=request.ignore_case,
+        ) if filtered else None
+        rekey = build_rekey(request.rekey_json_path) if request.rekey_json_path else None
+        partitions = await topic_partitions(source, request.source_topic, request.partitions)
+        report = progress_reporter("copy_messages")
+        # A dedicated consumer, since a copy can read for minutes
+        async with source.clients.dedicated_consumer(request.source_topic, partitions) as consumer, target.clients.producer() as producer:
+            result = await handle_copy_messages(
+                consumer,
+                producer,
+                request.source_topic,
+                partitions,
+                request.target_topic,
+                start=request.start,
+                start_offsets=request.start_offsets,
+                start_timestamp_ms=request.start_timestamp_ms,
+                end_offsets=request.end_offsets,
+                end_timestamp_ms=request.end_timestamp_ms,
+                matches=matches,
+                rekey=rekey,
+                preserve_partitions=request.preserve_partitions,
+                preserve_timestamps=request.preserve_timestamps,
+                max_messages=request.max_messages,
+                max_messages_per_second=request.max_messages_per_second,
+                max_in_flight=request.max_in_flight,
+                stop_on_error=request.stop_on_error,
+                timeout_ms=request.timeout_ms,
+                progress=report,
+            )
+        return format_result(result, request)
+
+    # Each call only waits on its subscription; the fetch loop is shared, so many
+    # concurrent tails are cheap. Calls run up to their timeout_ms.
+    @dispatcher.tool("tail_topic", max_concurrency=16, max_queue=16)
+    async def tail_topic_tool(arguments: dict) -> list[TextContent]:
+        request = TailTopic(**arguments)
+        cluster = clusters.get(request.cluster)
+        decode_key, decode_value = decoders(request)
+        partitions = await topic_partitions(cluster, request.topic, request.partitions)
+        report = progress_reporter("tail_topic", require_token=False)
+
+        async def notify(delivered: int, payload: Dict[str, Any]) -> None:
+            await report(delivered, request.max_records, payload)
+
+        result = await handle_tail_topic(
+            tails,
+            cluster.name,
+            cluster.clients,
+            request.topic,
+            partitions,
+            notify,
+            timeout_ms=request.timeout_ms,
+            max_records=request.max_records,
+            max_records_per_second=request.max_records_per_second,
+            max_notification_bytes=request.max_notification_bytes,
+            max_buffered=request.max_buffered,
+            decode_key=decode_key,
+            decode_value=decode_value,
+        )
+        return format_result(result, request)
+
+    @dispatcher.tool("list_topics", max_concurrency=32, max_queue=128, timeout_seconds=30)
+    async def list_topics_tool(arguments: dict) -> list[TextContent]:
+        request = ListTopics(**arguments)
+        cluster = clusters.get(request.cluster)
+        index = await cluster.metadata_cache.get_or_load(TOPICS_KEY, lambda: load_topics(cluster), bypass=request.bypass_cache)
+        result = handle_list_topics(
+            index,
+            prefix=request.prefix,
+            pattern=request.pattern,
+            include_internal=request.include_internal,
+            sort=request.sort,
+            limit=request.limit,
+            cursor=request.cursor,
+        )
+        # list_topics pages natively by name, so the size limit comes from 'limit'
+        return format_result(result, request, paginate=False)
+
+    @dispatcher.tool("get_topic_info", max_concurrency=32, max_queue=128, timeout_seconds=30)
+    async def get_topic_info_tool(arguments: dict) -> list[TextContent]:
+        request = GetTopicInfo(**arguments)
+        cluster = clusters.get(request.cluster)
+        result = await cluster.metadata_cache.get_or_load(
+            topic_key("topic_info", request.topic),
+            lambda: load_topic_info(cluster, request.topic),
+            bypass=request.bypass_cache,
+        )
+        return format_result(result, request)
+
+    @dispatcher.tool("describe_topics", max_concurrency=4, max_queue=16, timeout_seconds=120)
+    async def describe_topics_tool(arguments: dict) -> list[TextContent]:
+        request = DescribeTopics(**arguments)
+        cluster = clusters.get(request.cluster)
+        metadata_cache = cluster.metadata_cache
+        names = list(dict.fromkeys(request.topics or []))
+        if request.pattern:
+            index = await metadata_cache.get_or_load(TOPICS_KEY, lambda: load_topics(cluster))
+            names += [t for t in match_topics(index.names, request.pattern, request.pattern_type) if t not in names]
+
+        # Serve fully described topics from the cache, describe the rest
+        cached = []
+        if request.include_configs and not request.bypass_cache:
+            for topic in names:
+                info = metadata_cache.peek(topic_key("topic_info", topic))
+                if info is not None:
+                    cached.append(info)
+            cached_names = {info["topic_name"] for info in cached}
+            names = [t for t in names if t not in cached_names]
+
+        report = progress_reporter("describe_topics")
+        total = len(names) + len(cached)
+        done = len(cached)
+
+        async def on_batch(batch_results):
+            nonlocal done
+            if request.include_configs:
+                for info in batch_results:
+                    if "error" not in info:
+                        metadata_cache.put(topic_key("topic_info", info["topic_name"]), info)
+            done += len(batch_results)
+            if report is not None:
+                await report(done, total, batch_results)
+
+        if report is not None and cached:
+            await report(done, total, cached)
+        async with cluster.clients.admin_client() as admin_client:
+            result = await handle_describe_topics(
+                admin_client,
+                names,
+                include_configs=request.include_configs,
+                batch_size=request.batch_size,
+                max_concurrency=request.max_concurrency,
+                on_batch=on_batch,
+            )
+        result["topics"] = cached + result["topics"]
+        result["count"] += len(cached)
+        return format_result(result, request)
+
+    @dispatcher.tool("get_topic_offsets", max_concurrency=8, max_queue=32)
+    async def get_topic_offsets_tool(arguments: dict) -> list[TextContent]:
+        request = GetTopicOffsets(**arguments)
+        cluster = clusters.get(request.cluster)
+        partitions = await resolve_partitions(cluster, list(dict.fromkeys(request.topics)))
+        async with cluster.clients.admin_client() as admin_client, cluster.clients.offsets_consumer() as consumer:
+            result = await handle_get_topic_offsets(
+                admin_client,
+                consumer,
+                partitions,
+                group_ids=request.group_ids,
+                include_lag=request.include_lag,
+                max_concurrency=request.max_concurrency,
+            )
+        return format_result(result, request)
+
+    @dispatcher.tool("topic_stats", max_concurrency=4, max_queue=16)
+    async def topic_stats_tool(arguments: dict) -> list[TextContent]:
+        request = TopicStats(**arguments)
+        cluster = clusters.get(request.cluster)
+        partitions = await topic_partitions(cluster, request.topic, request.partitions)
+        result = await handle_topic_stats(
+            cluster.clients,
+            request.topic,
+            partitions,
+            sample_per_partition=request.sample_per_partition,
+            window_ms=request.window_ms,
+            top_keys=request.top_keys,
+            timeout_ms=request.timeout_ms,
+        )
+        return format_result(result, request)
+
+    @dispatcher.tool("list_consumer_groups", max_concurrency=8, max_queue=32)
+    async def list_consumer_groups_tool(arguments: dict) -> list[TextContent]:
+        request = ListConsumerGroups(**arguments)
+        cluster = clusters.get(request.cluster)
+        async with cluster.clients.admin_client() as admin_client:
+            result = await handle_list_consumer_groups(
+                admin_client,
+                prefix=request.prefix,
+                pattern=request.pattern,
+                include_state=request.include_state,
+                states=request.states,
+                max_concurrency=request.max_concurrency,
+            )
+        return format_result(result, request)
+
+    @dispatcher.tool("describe_consumer_groups", max_concurrency=8, max_queue=32)
+    async def describe_consumer_groups_tool(arguments: dict) -> list[TextContent]:
+        request = DescribeConsumerGroups(**arguments)
+        cluster = clusters.get(request.cluster)
+        async with cluster.clients.admin_client() as admin_client, cluster.clients.offsets_consumer() as consumer:
+            result = await handle_describe_consumer_groups(
+                admin_client,
+                consumer,
+                list(dict.fromkeys(request.group_ids)),
+                include_offsets=request.include_offsets,
+                max_concurrency=request.max_concurrency,
+            )
+        return format_result(result, request)
+
+    @dispatcher.tool("reset_consumer_group_offsets", max_concurrency=2, max_queue=8)
+    async def reset_consumer_group_offsets_tool(arguments: dict) -> list[TextContent]:
+        request = ResetConsumerGroupOffsets(**arguments)
+        cluster = clusters.get(request.cluster)
+        resolved = await resolve_partitions(cluster, list(dict.fromkeys(request.topics)))
+        assignments = {}
+        for topic in request.topics:
+            if not resolved.get(topic):
+                raise ValueError(f"Topic '{topic}' does not exist.")
+            partitions = resolved[topic] if request.partitions is None else [p for p in request.partitions if p in resolved[topic]]
+            if not partitions:
+                raise ValueError(f"Topic '{topic}' has none of the partitions {request.partitions}.")
+            assignments[topic] = partitions
+        async with cluster.clients.admin_client() as admin_client, cluster.clients.offsets_consumer() as consumer:
+            result = await handle_reset_consumer_group_offsets(
+                admin_client,
+                consumer,
+                list(dict.fromkeys(request.group_ids)),
+                assignments,
+                request.to,
+                timestamp_ms=request.timestamp_ms,
+                offsets=request.offsets,
+                dry_run=request.dry_run,
+                max_concurrency=request.max_concurrency,
+            )
+        return format_result(result, request)
+
+    @dispatcher.tool("delete_consumer_groups", max_concurrency=2, max_queue=8)
+    async def delete_consumer_groups_tool(arguments: dict) -> list[TextContent]:
+        request = DeleteConsumerGroups(**arguments)
+        cluster = clusters.get(request.cluster)
+        async with cluster.clients.admin_client() as admin_client:
+            result = await handle_delete_consumer_groups(
+                admin_client,
+                list(dict.fromkeys(request.group_ids)),
+                max_concurrency=request.max_concurrency,
+            )
+        return format_result(result, request)
+
+    @dispatcher.tool("delete_topic", max_concurrency=2, max_queue=8)
+    async def delete_topic_tool(arguments: dict) -> list[TextContent]:
+        request = DeleteTopic(**arguments)
+        cluster = clusters.get(request.cluster)
+        async with cluster.clients.admin_client() as admin_client:
+            await handle_delete_topic(admin_client, request.topic, cache=cluster.metadata_cache)
+        return [TextContent(type="text", text=f"Topic '{request.topic}' deleted successfully.")]
+
+    @dispatcher.tool("create_topic", max_concurrency=2, max_queue=8)
+    async def create_topic_tool(arguments: dict) -> list[TextContent]:
+        request = CreateTopic(**arguments)
+        cluster = clusters.get(request.cluster)
+        async with cluster.clients.admin_client() as admin_client:
+            await handle_create_topic(
+                admin_client,
+                request.topic,
+                num_partitions=request.num_partitions,
+                replication_factor=request.replication_factor,
+                config=request.config,
+                cache=cluster.metadata_cache,
+            )
+        return [TextContent(type="text", text=f"Topic '{request.topic}' created successfully.")]
+
+    @dispatcher.tool("create_topics", max_concurrency=2, max_queue=8)
+    async def create_topics_tool(arguments: dict) -> list[TextContent]:
+        request = CreateTopics(**arguments)
+        cluster = clusters.get(request.cluster)
+        async with cluster.clients.admin_client() as admin_client:
+            result = await handle_create_topics(
+                admin_client,
+                request.topics,
+                validate_only=request.validate_only,
+                if_exists=request.if_exists,
+                timeout_ms=request.timeout_ms,
+                cache=cluster.metadata_cache,
+            )
+        return format_result(result, request)
+
+    @dispatcher.tool("flush_metadata_cache", max_concurrency=4, max_queue=16, timeout_seconds=10)
+    async def flush_metadata_cache_tool(arguments: dict) -> list[TextContent]:
+        request = FlushMetadataCache(**arguments)
+        metadata_cache = clusters.get(request.cluster).metadata_cache
+        if request.topic:
+            metadata_cache.invalidate_topic(request.topic)
+            message = f"Cached metadata for topic '{request.topic}' flushed."
+        else:
+            removed = metadata_cache.clear()
+            message = f"Metadata cache flushed ({removed} entries removed)."
+        return [TextContent(type="text", text=f"{message} Cache stats: {dumps(metadata_cache.stats())}")]
+
+    @dispatcher.tool("get_connection_stats", max_concurrency=4, max_queue=16, timeout_seconds=10)
+    async def get_connection_stats_tool(arguments: dict) -> list[TextContent]:
+        request = GetConnectionStats(**arguments)
+        cluster = clusters.get(request.cluster)
+        result = {"cluster": cluster.name, **cluster.clients.stats(), "clusters": clusters.stats(), "sessions": session_limiter.stats()}
+        return format_result(result, request)
+
+    @dispatcher.tool("get_server_metrics", max_concurrency=4, max_queue=16, timeout_seconds=10)
+    async def get_server_metrics_tool(arguments: dict) -> list[TextContent]:
+        request = GetServerMetrics(**arguments)
+        if request.format == "prometheus":
+            return [TextContent(type="text", text=METRICS.render_prometheus())]
+        return format_result(METRICS.snapshot(), request)
 
     @server.list_tools()
     async def list_tools() -> list[Tool]:
@@ -58,52 +694,57 @@ async def serve(kafka_config: dict) -> None:
         name: str,
         arguments: dict
     ) -> list[TextContent]:
-        logger.debug(f"Executing tool: {name} with arguments: {arguments}")
+        logger.debug("Executing tool: %s with arguments: %s", name, arguments)
+        tool_label = name if name in known_tools else "unknown"
+        # Lets client leases and handlers attribute their phase timings to this tool
+        context_token = current_tool.set(tool_label)
+        started = time.perf_counter()
+        status = "ok"
         try:
-            # Initialize Kafka clients based on the tool being called
-            # Note: Consider optimizing client creation/reuse
-            if name == "publish_message":
-                topic = arguments["topic"]
-                message = arguments["message"]
-                key = arguments.get("key") # Optional message key
-                # Kafka topic names have fewer restrictions than RabbitMQ queues/exchanges
-                # We might add basic validation if needed (e.g., not empty)
-
-                async with get_kafka_producer(kafka_config) as producer:
-                    await handle_publish_message(producer, topic, message, key)
-                return [TextContent(type="text", text="Message published successfully.")]
-
-            elif name == "list_topics":
-                async with get_kafka_admin_client(kafka_config) as admin_client:
-                    result = await handle_list_topics(admin_client)
-                return [TextContent(type="text", text=str(result))] # Format appropriately
-
-            elif name == "get_topic_info":
-                 async with get_kafka_admin_client(kafka_config) as admin_client:
-                    topic = arguments["topic"]
-                    result = await handle_get_topic_info(admin_client, topic)
-                 return [TextContent(type="text", text=str(result))] # Format appropriately
-
-            elif name == "delete_topic":
-                 async with get_kafka_admin_client(kafka_config) as admin_client:
-                    topic = arguments["topic"]
-                    await handle_delete_topic(admin_client, topic)
-                 return [TextContent(type="text", text=f"Topic '{topic}' deleted successfully.")]
-
-            # Add more elif blocks for other Kafka tools (e.g., consume_messages, create_topic)
-
-            else:
-                 logger.error(f"Tool not found: {name}")
-                 raise ValueError(f"Tool not found: {name}")
-
+            with session_limiter.admit(server.request_context.session):
+                return await dispatcher.dispatch(name, arguments)
+        except (ToolBusyError, ToolTimeoutError, ToolRateLimitError) as e:
+            # Expected under load; no traceback
+            status = "error"
+            METRICS.inc("tool_errors_total", tool=tool_label, error_type=type(e).__name__)
+            logger.warning("%s", e)
+            return [TextContent(type="text", text=f"Failed to execute tool '{name}': {type(e).__name__} - {e}")]
         except Exception as e:
-            logger.error(f"Error executing tool '{name}': {e}", exc_info=True) # Log traceback
+            status = "error"
+            METRICS.inc("tool_errors_total", tool=tool_label, error_type=type(e).__name__)
+            logger.error("Error executing tool '%s': %s", name, e, exc_info=True) # Log traceback
             # Provide a user-friendly error message
             return [TextContent(type="text", text=f"Failed to execute tool '{name}': {type(e).__name__} - {e}")]
+        finally:
+            METRICS.observe("tool_duration_seconds", time.perf_counter() - started, tool=tool_label)
+            METRICS.inc("tool_calls_total", tool=tool_label, status=status)
+            current_tool.reset(context_token)
 
 
     options = server.create_initialization_options()
-    async with stdio_server() as (read_stream, write_stream):
-        # Pass the initialized logger to the server run method if supported/needed
-        # Otherwise, rely on the global logger configuration
-        await server.run(read_stream, write_stream, options, raise_exceptions=False) # Set raise_exceptions=False to handle errors gracefully in call_tool
+    METRICS.add_collector(collect_gauges)
+    metrics_server = None
+    async with clusters:
+        try:
+            if metrics_port is not None:
+                metrics_server = await start_metrics_server(metrics_host, metrics_port)
+            if streams is not None:
+                # Caller-provided transport, e.g. in-memory streams for benchmarks
+                await run_server_concurrently(server, streams[0], streams[1], options, raise_exceptions=False)
+            elif transport == "sse":
+                # Imported here: the HTTP stack is only loaded when it is used
+                from .http_transport import serve_sse
+                await serve_sse(server, options, host=http_host, port=http_port, max_sessions=max_sessions)
+            else:
+                async with stdio_server() as (read_stream, write_stream):
+                    # Pass the initialized logger to the server run method if supported/needed
+                    # Otherwise, rely on the global logger configuration
+                    await run_server_concurrently(server, read_stream, write_stream, options, raise_exceptions=False) # Set raise_exceptions=False to handle errors gracefully in call_tool
+        finally:
+            # Tail fetch loops hold dedicated consumers; stop them before the clients
+            await tails.close()
+            if metrics_server is not None:
+                metrics_server.close()
+                await metrics_server.wait_closed()
+            METRICS.remove_collector(collect_gauges)
+    logger.info("Kafka clients closed, server shut down.")
@@ -0,0 +1,137 @@
+"""Fixed-memory streaming summaries used by topic_stats.
+
+Each sketch takes one item at a time and keeps a bounded amount of state, so
+summarizing a sample costs the same memory whatever the topic's size.
+"""
+import hashlib
+import math
+import random
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+def _hash64(data: bytes) -> int:
+    # Stable across processes, unlike hash(), so sketches can be compared and merged
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Estimates the number of distinct byte strings added, with ~1.04/sqrt(2**precision) relative error.
+
+    Uses 2**precision one-byte registers (4 KiB at the default precision of 12,
+    about 1.6% error) and the standard small-range correction.
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16.")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, data: bytes) -> None:
+        h = _hash64(data)
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost 1 bit in the remaining bits, 1-based
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Folds another sketch of the same precision into this one (union of the sets)."""
+        if other.precision != self.precision:
+            raise ValueError("Only HyperLogLogs of the same precision can be merged.")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class Reservoir:
+    """A uniform random sample of at most size items from a stream (Algorithm R).
+
+    Also tracks the exact count, sum, minimum and maximum of numeric items.
+    """
+
+    def __init__(self, size: int = 1024, seed: Optional[int] = None):
+        self.size = size
+        self.items: List[Any] = []
+        self.seen = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._random = random.Random(seed)
+
+    def add(self, item: float) -> None:
+        self.seen += 1
+        self.total += item
+        self.min = item if self.min is None else min(self.min, item)
+        self.max = item if self.max is None else max(self.max, item)
+        if len(self.items) < self.size:
+            self.items.append(item)
+        else:
+            slot = self._random.randrange(self.seen)
+            if slot < self.size:
+                self.items[slot] = item
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.seen if self.seen else None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile (0..1) of everything added, from the sample."""
+        if not self.items:
+            return None
+        ordered = sorted(self.items)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.seen,
+            "avg": round(self.mean, 1) if self.seen else None,
+            "min": self.min,
+            "p50": self.percentile(0.50),
+            "p90": self.percentile(0.90),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class SpaceSaving:
+    """Tracks the most frequent items of a stream in at most capacity counters.
+
+    When a new item arrives with every counter in use, it replaces the item
+    with the lowest count and inherits that count as its possible error. Any
+    item occurring more than total/capacity times is guaranteed to be kept,
+    and counts are overestimated by at most the reported error.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.total = 0
+        # item -> [count, error]
+        self.counters: Dict[Hashable, List[int]] = {}
+
+    def add(self, item: Hashable) -> None:
+        self.total += 1
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += 1
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [1, 0]
+        else:
+            # O(capacity), but capacity is small and most hot items hit the branch above
+            victim = min(self.counters, key=lambda k: self.counters[k][0])
+            count, _ = self.counters.pop(victim)
+            self.counters[item] = [count + 1, count]
+
+    def top(self, n: int) -> List[Tuple[Hashable, int, int]]:
+        """The n most frequent items as (item, estimated count, maximum overestimate)."""
+        ranked = sorted(self.counters.items(), key=lambda entry: entry[1][0], reverse=True)
+        return [(item, count, error) for item, (count, error) in ranked[:n]]
@@ -0,0 +1,251 @@
+"""On-disk snapshot of cached topic metadata, for warm restarts.
+
+The snapshot is a SQLite file holding the metadata cache entries of every
+cluster the server has talked to, keyed by the cluster's id. At startup the
+entries are loaded into each cluster's MetadataCache as due for refresh, so
+the first list_topics and get_topic_info calls answer from memory while the
+cache refreshes them in the background. A reconcile pass then checks the
+cluster id, drops topics that no longer exist and re-describes the rest in
+batches. Cache changes are written back periodically and on shutdown.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import zlib
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .cache import TOPICS_KEY, MetadataCache, TopicIndex, topic_key
+
+if TYPE_CHECKING:
+    from .clusters import Cluster
+
+logger = logging.getLogger(__name__)
+
+# Cache entry kinds stored per topic besides the topic index
+_TOPIC_KINDS = ("topic_info", "partitions")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clusters (
+    source TEXT PRIMARY KEY,
+    cluster_id TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    cluster_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    saved_at REAL NOT NULL,
+    PRIMARY KEY (cluster_id, key)
+) WITHOUT ROWID;
+"""
+
+
+def snapshot_source(kafka_config: dict) -> str:
+    """The name a cluster's entries are found under before its id is known: its bootstrap servers."""
+    servers = kafka_config.get("bootstrap_servers") or ""
+    if isinstance(servers, str):
+        servers = servers.split(",")
+    return ",".join(sorted(server.strip() for server in servers))
+
+
+def encode_entry(key: str, value: Any) -> bytes:
+    if key == TOPICS_KEY:
+        value = {"names": value.names, "internal": sorted(value.internal)}
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode('utf-8'))
+
+
+def decode_entry(key: str, data: bytes) -> Any:
+    value = json.loads(zlib.decompress(data))
+    if key == TOPICS_KEY:
+        return TopicIndex(value["names"], value["internal"])
+    return value
+
+
+class MetadataSnapshot:
+    """A SQLite file of metadata cache entries per cluster id.
+
+    Methods are blocking and meant to be run in a worker thread; each call
+    opens its own connection, so calls from different threads do not share
+    state. Entries older than max_age_seconds are not loaded.
+    """
+
+    def __init__(self, path: str, max_age_seconds: float = 7 * 86400):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def load(self, sources: Dict[str, str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """Returns (cluster id, {key: value}) per cluster name, for the given {name: source}."""
+        loaded = {}
+        cutoff = time.time() - self.max_age_seconds
+        connection = self._connect()
+        try:
+            for name, source in sources.items():
+                row = connection.execute("SELECT cluster_id FROM clusters WHERE source = ?", (source,)).fetchone()
+                if row is None:
+                    continue
+                entries = {}
+                for key, data in connection.execute(
+                    "SELECT key, value FROM entries WHERE cluster_id = ? AND saved_at >= ?", (row[0], cutoff)
+                ):
+                    try:
+                        entries[key] = decode_entry(key, data)
+                    except (ValueError, KeyError, zlib.error) as e:
+                        logger.warning("Skipping unreadable snapshot entry '%s': %s", key, e)
+                loaded[name] = (row[0], entries)
+        finally:
+            connection.close()
+        return loaded
+
+    def save(self, source: str, cluster_id: str, changes: Dict[str, Any]) -> None:
+        """Records the cluster id of source and applies {key: value} changes; a None value deletes the key."""
+        now = time.time()
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO clusters (source, cluster_id, updated_at) VALUES (?, ?, ?)",
+                    (source, cluster_id, now),
+                )
+                # Also drops what other cluster ids left behind once it is too old to load
+                connection.execute("DELETE FROM entries WHERE saved_at < ?", (now - self.max_age_seconds,))
+                connection.executemany(
+                    "DELETE FROM entries WHERE cluster_id = ? AND key = ?",
+                    [(cluster_id, key) for key, value in changes.items() if value is None],
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO entries (cluster_id, key, value, saved_at) VALUES (?, ?, ?, ?)",
+                    [(cluster_id, key, encode_entry(key, value), now) for key, value in changes.items() if value is not None],
+                )
+        finally:
+            connection.close()
+
+
+class SnapshotSync:
+    """Keeps one cluster's metadata cache and its snapshot entries in step.
+
+    start() seeds the cache with the loaded entries and begins a background
+    task that reconciles them with the cluster once, then writes cache
+    changes back every flush_interval seconds. close() writes what is left.
+    """
+
+    def __init__(self, snapshot: MetadataSnapshot, cluster: "Cluster", cluster_id: Optional[str] = None,
+                 entries: Optional[Dict[str, Any]] = None, flush_interval: float = 5.0,
+                 reconcile_batch_size: int = 50, reconcile_concurrency: int = 2):
+        self.snapshot = snapshot
+        self.cluster = cluster
+        self.source = snapshot_source(cluster.config.kafka_config)
+        self.cluster_id = cluster_id
+        self.entries = entries or {}
+        self.flush_interval = flush_interval
+        self.reconcile_batch_size = reconcile_batch_size
+        self.reconcile_concurrency = reconcile_concurrency
+        self.reconciled = False
+        self.flushes = 0
+        # Cache keys changed since the last flush, with their new value or None if dropped
+        self._dirty: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def cache(self) -> MetadataCache:
+        return self.cluster.metadata_cache
+
+    def start(self) -> None:
+        for key, value in self.entries.items():
+            self.cache.seed(key, value)
+        if self.entries:
+            logger.info("Loaded %s metadata entries of cluster '%s' from the snapshot.", len(self.entries), self.cluster.name)
+        self.cache.on_change = self._changed
+        self._task = asyncio.create_task(self._run())
+
+    def _changed(self, key: str, value: Any) -> None:
+        self._dirty[key] = value
+
+    async def _run(self) -> None:
+        while True:
+            if not self.reconciled:
+                try:
+                    await self.reconcile()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Seeded entries are still served and refreshed on use meanwhile
+                    logger.warning("Could not reconcile the metadata snapshot of cluster '%s', retrying: %s", self.cluster.name, e)
+            await self.flush()
+            await asyncio.sleep(self.flush_interval)
+
+    async def reconcile(self) -> None:
+        """Checks the snapshot against the cluster and refreshes the entries it seeded."""
+        from .admin import handle_describe_topics
+        from .handlers import fetch_topic_index
+        async with self.cluster.clients.admin_client() as admin_client:
+            cluster_id = (await admin_client.describe_cluster())["cluster_id"]
+            if self.cluster_id is not None and cluster_id != self.cluster_id:
+                # Same address, different cluster: nothing loaded can be trusted
+                logger.warning("Cluster '%s' now has id %s instead of %s; discarding its snapshot.", self.cluster.name, cluster_id, self.cluster_id)
+                self.cache.clear()
+                self._dirty.clear()
+                self.entries = {}
+            self.cluster_id = cluster_id
+
+            index = await fetch_topic_index(admin_client)
+            self.cache.put(TOPICS_KEY, index)
+            seeded = sorted({key.split(":", 1)[1] for key in self.entries if key != TOPICS_KEY})
+            gone = [topic for topic in seeded if topic not in index]
+            if gone:
+                self.cache.invalidate(*(topic_key(kind, topic) for topic in gone for kind in _TOPIC_KINDS))
+            live = [topic for topic in seeded if topic in index]
+
+            async def store(batch: List[Dict[str, Any]]) -> None:
+                for info in batch:
+                    if "error" in info:
+                        continue
+                    self.cache.put(topic_key("topic_info", info["topic_name"]), info)
+                    self.cache.put(topic_key("partitions", info["topic_name"]), sorted(p["partition_id"] for p in info["partitions"]))
+
+            if live:
+                await handle_describe_topics(
+                    admin_client, live, include_configs=True,
+                    batch_size=self.reconcile_batch_size, max_concurrency=self.reconcile_concurrency, on_batch=store,
+                )
+        self.reconciled = True
+        logger.info("Reconciled the metadata snapshot of cluster '%s': %s topics, %s refreshed, %s gone.", self.cluster.name, len(index), len(live), len(gone))
+
+    async def flush(self) -> None:
+        """Writes cache changes since the last flush to the snapshot."""
+        if not self._dirty or self.cluster_id is None:
+            return
+        changes, self._dirty = self._dirty, {}
+        try:
+            await asyncio.to_thread(self.snapshot.save, self.source, self.cluster_id, changes)
+            self.flushes += 1
+        except Exception as e:
+            logger.warning("Could not write the metadata snapshot of cluster '%s': %s", self.cluster.name, e)
+            # Retried with the next flush unless newer changes replaced them
+            self._dirty = {**changes, **self._dirty}
+
+    async def close(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.snapshot.path,
+            "cluster_id": self.cluster_id,
+            "loaded_entries": len(self.entries),
+            "reconciled": self.reconciled,
+            "pending_changes": len(self._dirty),
+            "flushes": self.flushes,
+        }
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .codec import Decoder
+from .connection import KafkaClientManager
+from .handlers import record_to_dict
+from .logging_setup import HOT_PATH
+from .metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Awaited with (records delivered so far, the notification's payload)
+Notify = Callable[[int, Dict[str, Any]], Awaitable[None]]
+
+# Records arriving within this many seconds of the last notification are
+# batched into the next one instead of being sent one by one
+NOTIFICATION_INTERVAL = 0.1
+
+
+class TailSubscription:
+    """One tail_topic call's view of a shared fetch loop.
+
+    Records are buffered up to max_buffered; when the caller reads slower
+    than the topic grows, the oldest buffered records are dropped and counted.
+    """
+
+    def __init__(self, max_buffered: int):
+        self.buffer: Deque[Any] = deque()
+        self.max_buffered = max_buffered
+        self.dropped = 0
+        self.error: Optional[BaseException] = None
+        self.ready = asyncio.Event()
+
+    def offer(self, records: List[Any]) -> None:
+        self.buffer.extend(records)
+        overflow = len(self.buffer) - self.max_buffered
+        if overflow > 0:
+            for _ in range(overflow):
+                self.buffer.popleft()
+            self.dropped += overflow
+        self.ready.set()
+
+    def fail(self, error: BaseException) -> None:
+        self.error = error
+        self.ready.set()
+
+
+class TopicTail:
+    """A single consumer fetch loop over a topic's partitions, fanned out to every subscriber.
+
+    The loop starts at the end of each partition when the first caller
+    subscribes and stops when the last one leaves, so any number of
+    concurrent tails of the same partitions cost one consumer and one fetch
+    loop. The consumer is dedicated rather than pooled, since a tail can hold
+    it for minutes.
+    """
+
+    def __init__(self, clients: KafkaClientManager, topic: str, partitions: List[int],
+                 poll_timeout_ms: int = 1000, max_poll_records: int = 500):
+        self.clients = clients
+        self.topic = topic
+        self.partitions = partitions
+        self.poll_timeout_ms = poll_timeout_ms
+        self.max_poll_records = max_poll_records
+        self.subscribers: List[TailSubscription] = []
+        self.fetched = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self, max_buffered: int) -> TailSubscription:
+        subscription = TailSubscription(max_buffered)
+        self.subscribers.append(subscription)
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: TailSubscription) -> None:
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        from aiokafka.structs import TopicPartition
+        tps = [TopicPartition(self.topic, p) for p in self.partitions]
+        logger.info("Starting tail of topic '%s' partitions %s.", self.topic, self.partitions)
+        try:
+            async with self.clients.dedicated_consumer(self.topic, self.partitions) as consumer:
+                end_offsets = await consumer.end_offsets(tps)
+                for tp in tps:
+                    consumer.seek(tp, end_offsets[tp])
+                while self.subscribers:
+                    batch = await consumer.getmany(*tps, timeout_ms=self.poll_timeout_ms, max_records=self.max_poll_records)
+                    records = [msg for tp in tps for msg in batch.get(tp, ())]
+                    if not records:
+                        continue
+                    self.fetched += len(records)
+                    METRICS.inc("messages_consumed_total", len(records))
+                    METRICS.inc("bytes_consumed_total", sum(len(msg.key or b"") + len(msg.value or b"") for msg in records))
+                    for subscription in list(self.subscribers):
+                        subscription.offer(records)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Tail of topic '%s' failed: %s", self.topic, e)
+            for subscription in list(self.subscribers):
+                subscription.fail(e)
+        finally:
+            logger.info("Stopped tail of topic '%s' partitions %s.", self.topic, self.partitions)
+
+    async def close(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+class TailManager:
+    """Shares TopicTail fetch loops between tail_topic calls, keyed by cluster, topic and partitions."""
+
+    def __init__(self):
+        self._tails: Dict[Tuple[str, str, Tuple[int, ...]], TopicTail] = {}
+
+    def subscribe(self, cluster: str, clients: KafkaClientManager, topic: str, partitions: List[int],
+                  max_buffered: int) -> Tuple[TopicTail, TailSubscription]:
+        key = (cluster, topic, tuple(sorted(set(partitions))))
+        tail = self._tails.get(key)
+        if tail is None or tail.clients is not clients:
+            tail = self._tails[key] = TopicTail(clients, topic, list(key[2]))
+        return tail, tail.subscribe(max_buffered)
+
+    def unsubscribe(self, tail: TopicTail, subscription: TailSubscription) -> None:
+        tail.unsubscribe(subscription)
+        if not tail.subscribers:
+            for key, existing in list(self._tails.items()):
+                if existing is tail:
+                    del self._tails[key]
+
+    async def close(self) -> None:
+        tails, self._tails = list(self._tails.values()), {}
+        await asyncio.gather(*(tail.close() for tail in tails))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tails": len(self._tails),
+            "subscribers": sum(len(tail.subscribers) for tail in self._tails.values()),
+            "records_fetched": sum(tail.fetched for tail in self._tails.values()),
+        }
+
+
+async def handle_tail_topic(
+    tails: TailManager,
+    cluster: str,
+    clients: KafkaClientManager,
+    topic: str,
+    partitions: List[int],
+    notify: Notify,
+    timeout_ms: int = 30000,
+    max_records: int = 1000,
+    max_records_per_second: float = 100.0,
+    max_notification_bytes: int = 65536,
+    max_buffered: int = 10000,
+    decode_key: Optional[Decoder] = None,
+    decode_value: Optional[Decoder] = None,
+) -> Dict[str, Any]:
+    """Streams new records of a topic to the caller as notifications until a limit is hit.
+
+    Each notification carries a batch of decoded records of at most
+    max_notification_bytes of keys and values (at least one record). Batches
+    are paced to max_records_per_second with a token bucket holding up to
+    one second of records, and at most one is sent per NOTIFICATION_INTERVAL
+    so that a trickle of records is still batched. The call ends at timeout_ms, after max_records, or
+    when cancelled, and returns a summary with the next offset per partition.
+    """
+    logger.info("Tailing topic '%s' partitions %s for up to %sms...", topic, partitions, timeout_ms, extra=HOT_PATH)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    tail, subscription = tails.subscribe(cluster, clients, topic, partitions, max_buffered)
+    delivered = 0
+    notifications = 0
+    reported_dropped = 0
+    next_offsets: Dict[int, int] = {}
+    capacity = max(max_records_per_second, 1.0)
+    tokens = capacity
+    refilled_at = loop.time()
+    notified_at = 0.0
+    stopped_reason = "deadline"
+    try:
+        while True:
+            if delivered >= max_records:
+                stopped_reason = "max_records"
+                break
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            if not subscription.buffer and subscription.error is None:
+                subscription.ready.clear()
+                try:
+                    await asyncio.wait_for(subscription.ready.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if subscription.error is not None:
+                raise subscription.error
+            wait = min(notified_at + NOTIFICATION_INTERVAL - loop.time(), deadline - loop.time())
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            now = loop.time()
+            tokens = min(capacity, tokens + (now - refilled_at) * max_records_per_second)
+            refilled_at = now
+            if tokens < 1:
+                await asyncio.sleep(min((1 - tokens) / max_records_per_second, remaining))
+                continue
+
+            limit = min(int(tokens), max_records - delivered)
+            records = []
+            size = 0
+            while subscription.buffer and len(records) < limit:
+                msg = subscription.buffer[0]
+                msg_size = len(msg.key or b"") + len(msg.value or b"")
+                if records and size + msg_size > max_notification_bytes:
+                    break
+                subscription.buffer.popleft()
+                records.append(record_to_dict(msg, decode_key, decode_value))
+                next_offsets[msg.partition] = msg.offset + 1
+                size += msg_size
+            tokens -= len(records)
+            delivered += len(records)
+            notifications += 1
+            payload: Dict[str, Any] = {"topic": topic, "records": records}
+            if subscription.dropped > reported_dropped:
+                payload["dropped"] = subscription.dropped - reported_dropped
+                reported_dropped = subscription.dropped
+            await notify(delivered, payload)
+            notified_at = loop.time()
+    except asyncio.CancelledError:
+        logger.info("Tail of topic '%s' cancelled after %s records.", topic, delivered)
+        raise
+    finally:
+        tails.unsubscribe(tail, subscription)
+
+    logger.info("Tail of topic '%s' delivered %s records in %s notifications (%s).", topic, delivered, notifications, stopped_reason, extra=HOT_PATH)
+    return {
+        "topic": topic,
+        "partitions": tail.partitions,
+        "records_delivered": delivered,
+        "notifications": notifications,
+        "dropped": subscription.dropped,
+        "stopped_reason": stopped_reason,
+        # Where a consume_messages call would continue after the delivered records
+        "next_offsets": next_offsets,
+    }
@@ -1,9 +1,28 @@
 from .models import (
     PublishMessage,
+    PublishMessages,
     ListTopics,
     GetTopicInfo,
+    DescribeTopics,
+    GetTopicOffsets,
     DeleteTopic,
-    CreateTopic
+    CreateTopic,
+    GetConnectionStats,
+    ConsumeMessages,
+    FlushMetadataCache,
+    GetServerMetrics,
+    SearchMessages,
+    CreateTopics,
+    TailTopic,
+    CopyMessages,
+    PublishTransaction,
+    PublishLargeMessage,
+    ConsumeLargeMessages,
+    TopicStats,
+    ListConsumerGroups,
+    DescribeConsumerGroups,
+    ResetConsumerGroupOffsets,
+    DeleteConsumerGroups
     # Add other Kafka models here if implemented
 )
 from mcp.types import (
@@ -17,16 +36,66 @@ MCP_TOOLS = [
         description="Publish a message to a Kafka topic.",
         inputSchema=PublishMessage.model_json_schema(),
     ),
+    Tool(
+        name="publish_messages",
+        description="Publish a batch of messages to a Kafka topic in one pipelined send. Returns the partition and offset (or error) for every record.",
+        inputSchema=PublishMessages.model_json_schema(),
+    ),
+    Tool(
+        name="publish_transaction",
+        description="Publish a batch of messages to one or more Kafka topics atomically in a single transaction: either every record is committed or, if any fails, none is visible to read_committed consumers. Uses one long-lived transactional producer; transactions run one at a time.",
+        inputSchema=PublishTransaction.model_json_schema(),
+    ),
+    Tool(
+        name="publish_large_message",
+        description="Publish a payload too large for one Kafka record, given as text, base64 or a file in the server's file directory, as a sequence of chunk records. Chunks share one key and partition and carry the payload id, their index, the chunk count and size in headers, plus a SHA-256 on the last chunk. Files are streamed a chunk at a time. Returns the payload id and the offsets of its first and last chunk; read it back with consume_large_messages.",
+        inputSchema=PublishLargeMessage.model_json_schema(),
+    ),
     Tool(
         name="list_topics",
-        description="List all available topics in the Kafka cluster.",
+        description="List topics in the Kafka cluster, filtered by prefix or regex, sorted and paginated with a cursor. Internal topics are hidden unless requested. Results may be served from the metadata cache.",
         inputSchema=ListTopics.model_json_schema(),
     ),
     Tool(
         name="get_topic_info",
-        description="Get detailed information about a specific Kafka topic.",
+        description="Get detailed information about a specific Kafka topic. Results may be served from the metadata cache.",
         inputSchema=GetTopicInfo.model_json_schema(),
     ),
+    Tool(
+        name="describe_topics",
+        description="Describe many Kafka topics at once, selected by name list or glob/regex pattern. Uses batched, concurrent metadata and config requests and streams partial results as progress notifications when the client supplies a progress token.",
+        inputSchema=DescribeTopics.model_json_schema(),
+    ),
+    Tool(
+        name="get_topic_offsets",
+        description="Get beginning/end offsets and message counts per partition for one or many topics, plus per-consumer-group lag, most lagging groups first.",
+        inputSchema=GetTopicOffsets.model_json_schema(),
+    ),
+    Tool(
+        name="list_consumer_groups",
+        description="List consumer groups, filtered by id prefix or glob, optionally with their state and member count. All brokers are asked at once.",
+        inputSchema=ListConsumerGroups.model_json_schema(),
+    ),
+    Tool(
+        name="describe_consumer_groups",
+        description="Describe many consumer groups at once: state, assignor, members with their assigned partitions, and committed offsets with lag per partition. Groups are described with one request per coordinator broker, all coordinators concurrently.",
+        inputSchema=DescribeConsumerGroups.model_json_schema(),
+    ),
+    Tool(
+        name="reset_consumer_group_offsets",
+        description="Reset the committed offsets of many consumer groups on the given topics to the earliest or latest offset, a timestamp or explicit offsets. Each group's offsets are written with a single commit, groups concurrently. Only groups without active members are reset. Supports a dry run; returns the previous and new offset of every partition.",
+        inputSchema=ResetConsumerGroupOffsets.model_json_schema(),
+    ),
+    Tool(
+        name="delete_consumer_groups",
+        description="Delete consumer groups and their committed offsets, with one request per coordinator broker. Groups with active members are not deleted and reported as errors.",
+        inputSchema=DeleteConsumerGroups.model_json_schema(),
+    ),
+    Tool(
+        name="topic_stats",
+        description="Answer 'is this topic hot or skewed?' without pulling raw messages: measures messages/sec and bytes/sec from end offset growth over a short window, and samples the most recent records of every partition concurrently to report record size percentiles, distinct key estimates, the most frequent keys and skew across partitions and keys. Memory use does not grow with the topic size.",
+        inputSchema=TopicStats.model_json_schema(),
+    ),
     Tool(
         name="delete_topic",
         description="Delete a specific Kafka topic.",
@@ -37,7 +106,52 @@ MCP_TOOLS = [
         description="Create a new Kafka topic.",
         inputSchema=CreateTopic.model_json_schema(),
     ),
-    # Add definitions for other Kafka tools here (e.g., consume_messages)
+    Tool(
+        name="create_topics",
+        description="Create many Kafka topics at once with a single CreateTopics request, e.g. to provision a new tenant. Supports dry-run validation, skipping existing topics or updating their configs, and returns a result per topic. Config updates read the current overrides and then replace them, which is not atomic: an override changed by another client in between is reverted. Topics with sensitive overrides are not updated.",
+        inputSchema=CreateTopics.model_json_schema(),
+    ),
+    Tool(
+        name="get_connection_stats",
+        description="Get health, age and usage statistics for the server's shared Kafka clients, and the client sessions with their call limits.",
+        inputSchema=GetConnectionStats.model_json_schema(),
+    ),
+    Tool(
+        name="consume_messages",
+        description="Read messages from a Kafka topic starting at explicit offsets, a timestamp, the beginning or the end of each partition. Stops at max_messages, max_bytes or timeout_ms, whichever comes first, and does not commit offsets.",
+        inputSchema=ConsumeMessages.model_json_schema(),
+    ),
+    Tool(
+        name="consume_large_messages",
+        description="Read payloads published with publish_large_message: reassembles their chunks in order, verifies the checksum and returns each payload inline or writes it to a file in the server's file directory. Memory for partial payloads is bounded by max_pending_bytes. Returns the next offset per partition, before any payload that was not complete yet.",
+        inputSchema=ConsumeLargeMessages.model_json_schema(),
+    ),
+    Tool(
+        name="search_messages",
+        description="Find messages in a Kafka topic by key, header values, substring, regular expression or JSON path, optionally within a time window (e.g. the last hour). All partitions are scanned concurrently inside the server and only matching messages are returned. Stops at max_matches, max_scan_bytes or timeout_ms and reports where each partition stopped.",
+        inputSchema=SearchMessages.model_json_schema(),
+    ),
+    Tool(
+        name="copy_messages",
+        description="Copy or replay a range of messages from one topic into another, e.g. offsets A to B of topic X into topic Y, optionally filtered by key, headers or content and re-keyed from a JSON field. Runs inside the server as a streaming consume-to-produce pipeline: payloads are passed through as raw bytes, sends are pipelined up to max_in_flight, and max_messages_per_second limits the rate. Sends progress notifications when the request has a progress token and returns counts and where each partition stopped, so a partial copy can be resumed.",
+        inputSchema=CopyMessages.model_json_schema(),
+    ),
+    Tool(
+        name="tail_topic",
+        description="Watch a Kafka topic for new messages, starting at the current end of each partition. Batches of new records are pushed as log notifications (and progress notifications when the request has a progress token) while the call runs, paced by max_records_per_second and max_notification_bytes. Ends at timeout_ms or max_records and returns a summary with the next offset per partition. Concurrent tails of the same partitions share one fetch loop.",
+        inputSchema=TailTopic.model_json_schema(),
+    ),
+    Tool(
+        name="flush_metadata_cache",
+        description="Drop cached topic metadata, either for one topic or entirely, so the next calls query the cluster.",
+        inputSchema=FlushMetadataCache.model_json_schema(),
+    ),
+    Tool(
+        name="get_server_metrics",
+        description="Get the server's own metrics: call counts, errors by type, latency histograms per tool and per phase (client_acquire, broker_call, encode), bytes produced and consumed, plus cache and client gauges.",
+        inputSchema=GetServerMetrics.model_json_schema(),
+    ),
+    # Add definitions for other Kafka tools here
 ]
 
 # Removed MCP_TOOL_ROUTING as it was empty/unused in the original
\ No newline at end of file
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from .connection import KafkaClientManager
+from .handlers import RangeReader
+from .logging_setup import HOT_PATH
+from .metrics import METRICS
+from .sketches import HyperLogLog, Reservoir, SpaceSaving
+
+logger = logging.getLogger(__name__)
+
+# Keys longer than this are cut in results
+MAX_KEY_CHARS = 200
+# Heavy-hitter counters kept per partition and for the whole topic
+TOP_KEY_COUNTERS = 64
+
+
+class PartitionSample:
+    """Streaming summaries of the records sampled from one partition."""
+
+    def __init__(self, partition: int):
+        self.partition = partition
+        self.records = 0
+        self.bytes = 0
+        self.keys = HyperLogLog()
+        self.top_keys = SpaceSaving(TOP_KEY_COUNTERS)
+        self.null_keys = 0
+        self.first_timestamp: Optional[int] = None
+        self.last_timestamp: Optional[int] = None
+
+    def add(self, msg: Any) -> int:
+        size = len(msg.key or b"") + len(msg.value or b"")
+        self.records += 1
+        self.bytes += size
+        if msg.key is None:
+            self.null_keys += 1
+        else:
+            self.keys.add(msg.key)
+            self.top_keys.add(msg.key)
+        if self.first_timestamp is None or msg.timestamp < self.first_timestamp:
+            self.first_timestamp = msg.timestamp
+        if self.last_timestamp is None or msg.timestamp > self.last_timestamp:
+            self.last_timestamp = msg.timestamp
+        return size
+
+
+def _key_text(key: bytes) -> str:
+    text = str(key, 'utf-8', 'replace')
+    return text if len(text) <= MAX_KEY_CHARS else text[:MAX_KEY_CHARS] + "..."
+
+
+def _top_keys(sketch: SpaceSaving, n: int) -> List[Dict[str, Any]]:
+    return [
+        {"key": _key_text(key), "count": count, "share": round(count / sketch.total, 4), "max_overcount": error}
+        for key, count, error in sketch.top(n)
+    ]
+
+
+def _skew(values: List[float]) -> Optional[float]:
+    # Largest value over the mean; 1.0 means perfectly even
+    mean = sum(values) / len(values) if values else 0
+    return round(max(values) / mean, 3) if mean else None
+
+
+async def handle_topic_stats(
+    clients: KafkaClientManager,
+    topic: str,
+    partitions: List[int],
+    sample_per_partition: int = 1000,
+    window_ms: int = 5000,
+    top_keys: int = 5,
+    timeout_ms: int = 30000,
+) -> Dict[str, Any]:
+    """Summarizes a topic's traffic, record sizes and key distribution.
+
+    Rates come from end-offset deltas over window_ms. Meanwhile the most
+    recent sample_per_partition records of every partition are read through
+    one assigned consumer, whose fetcher queries all partition leaders in
+    parallel, and streamed into fixed-size sketches: a reservoir of record
+    sizes for percentiles, a HyperLogLog per partition for distinct keys, and
+    space-saving counters for the hottest keys. Memory is bounded by the
+    number of partitions, not by the sample or topic size. With window_ms=0
+    no window is measured and rates are estimated from the sample's
+    timestamps. Sampling stops at timeout_ms; rates and summaries cover what
+    was read by then.
+    """
+    from aiokafka.structs import TopicPartition
+    logger.info("Sampling up to %s records per partition of topic '%s' over a %sms window...", sample_per_partition, topic, window_ms, extra=HOT_PATH)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    tps = [TopicPartition(topic, p) for p in partitions]
+
+    try:
+        async with clients.offsets_consumer() as consumer:
+            beginning_offsets, window_start = await asyncio.gather(consumer.beginning_offsets(tps), consumer.end_offsets(tps))
+        window_started_at = loop.time()
+
+        samples = {tp: PartitionSample(tp.partition) for tp in tps}
+        # Topic-wide summaries, fed alongside the per-partition ones
+        sizes = Reservoir(1024)
+        hot_keys = SpaceSaving(TOP_KEY_COUNTERS)
+        positions = {tp: max(beginning_offsets[tp], window_start[tp] - sample_per_partition) for tp in tps}
+        async with clients.consumer(topic, partitions) as consumer:
+            for tp in tps:
+                consumer.seek(tp, positions[tp])
+            # Only the records that existed when the window opened are sampled
+            reader = RangeReader(consumer, tps, positions, window_start, deadline)
+            async for tp, msg in reader.records():
+                sizes.add(samples[tp].add(msg))
+                if msg.key is not None:
+                    hot_keys.add(msg.key)
+
+        sampled = sizes.seen
+        sampled_bytes = int(sizes.total)
+        METRICS.inc("messages_consumed_total", sampled)
+        METRICS.inc("bytes_consumed_total", sampled_bytes)
+
+        window_seconds = None
+        window_end = None
+        if window_ms > 0:
+            wait = min(window_started_at + window_ms / 1000, deadline) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            async with clients.offsets_consumer() as consumer:
+                window_end = await consumer.end_offsets(tps)
+            window_seconds = loop.time() - window_started_at
+
+        all_keys = HyperLogLog()
+        per_partition = []
+        for tp in tps:
+            sample = samples[tp]
+            all_keys.merge(sample.keys)
+            if window_end is not None:
+                messages_per_sec = (window_end[tp] - window_start[tp]) / window_seconds
+            elif sample.records > 1 and sample.last_timestamp > sample.first_timestamp:
+                messages_per_sec = (sample.records - 1) / ((sample.last_timestamp - sample.first_timestamp) / 1000)
+            else:
+                messages_per_sec = 0.0
+            top = sample.top_keys.top(1)
+            avg_size = sample.bytes / sample.records if sample.records else 0
+            per_partition.append({
+                "partition": tp.partition,
+                "messages": window_start[tp] - beginning_offsets[tp],
+                "messages_per_sec": round(messages_per_sec, 2),
+                "bytes_per_sec": round(messages_per_sec * avg_size, 1),
+                "sampled": sample.records,
+                "avg_record_bytes": round(avg_size, 1) if sample.records else None,
+                "distinct_keys": sample.keys.count() if sample.records > sample.null_keys else 0,
+                "null_keys": sample.null_keys,
+                "top_key_share": round(top[0][1] / sample.records, 4) if top else None,
+            })
+
+        messages_per_sec = sum(p["messages_per_sec"] for p in per_partition)
+        bytes_per_sec = sum(p["bytes_per_sec"] for p in per_partition)
+        logger.info("Sampled %s records (%s bytes) of topic '%s'.", sampled, sampled_bytes, topic, extra=HOT_PATH)
+        return {
+            "topic": topic,
+            "partition_count": len(tps),
+            "messages": sum(p["messages"] for p in per_partition),
+            "rate_source": "window" if window_end is not None else "sample_timestamps",
+            "window_seconds": round(window_seconds, 3) if window_seconds is not None else None,
+            "messages_per_sec": round(messages_per_sec, 2),
+            "bytes_per_sec": round(bytes_per_sec, 1),
+            "record_bytes": sizes.summary(),
+            "keys": {
+                "distinct_estimate": all_keys.count() if sampled > sum(s.null_keys for s in samples.values()) else 0,
+                "null_keys": sum(s.null_keys for s in samples.values()),
+                "top": _top_keys(hot_keys, top_keys) if top_keys else [],
+            },
+            "skew": {
+                # Busiest partition relative to the average partition
+                "partition_rate": _skew([p["messages_per_sec"] for p in per_partition]),
+                "partition_size": _skew([p["messages"] for p in per_partition]),
+                "max_top_key_share": max((p["top_key_share"] for p in per_partition if p["top_key_share"] is not None), default=None),
+            },
+            "sample_complete": not reader.timed_out,
+            "partitions": per_partition,
+        }
+    except Exception as e:
+        logger.error("Failed to compute stats for topic '%s': %s", topic, e, exc_info=True)
+        raise
@@ -0,0 +1,75 @@
+import asyncio
+
+from aiokafka.structs import TopicPartition
+
+from mcp_server_kafka.chunked import (
+    HEADER_COUNT, HEADER_ID, HEADER_INDEX, HEADER_SIZE, ChunkAssembler, handle_consume_chunked,
+)
+from mcp_server_kafka.fake_kafka import FakeConsumer, FakeKafkaCluster
+
+
+def append_chunk(cluster: FakeKafkaCluster, message_id: str, index: int, count: int, chunk: bytes) -> None:
+    headers = [
+        (HEADER_ID, message_id.encode('utf-8')),
+        (HEADER_INDEX, str(index).encode('utf-8')),
+        (HEADER_COUNT, str(count).encode('utf-8')),
+        (HEADER_SIZE, str(count * len(chunk)).encode('utf-8')),
+    ]
+    cluster.append("big", chunk, key=b"k", partition=0, headers=headers)
+
+
+async def consume(cluster: FakeKafkaCluster, offsets=None, skip_message_ids=None, max_messages=1):
+    consumer = FakeConsumer(cluster)
+    consumer.assign([TopicPartition("big", 0)])
+    assembler = ChunkAssembler(skip_message_ids=skip_message_ids)
+    return await handle_consume_chunked(consumer, "big", [0], assembler, offsets=offsets, max_messages=max_messages, timeout_ms=1000)
+
+
+def test_interleaved_payload_is_not_returned_twice():
+    async def run():
+        cluster = FakeKafkaCluster()
+        cluster.create_topic("big")
+        # b is sent whole between the two chunks of a
+        append_chunk(cluster, "a", 0, 2, b"aa")
+        append_chunk(cluster, "b", 0, 2, b"bb")
+        append_chunk(cluster, "b", 1, 2, b"bb")
+        append_chunk(cluster, "a", 1, 2, b"aa")
+
+        first = await consume(cluster)
+        assert [m["message_id"] for m in first["messages"]] == ["b"]
+        assert first["stopped_reason"] == "max_messages"
+        # Resumes at a's first chunk, which comes before b
+        assert first["next_offsets"] == {0: 0}
+        assert first["skip_message_ids"] == ["b"]
+
+        second = await consume(cluster, offsets=first["next_offsets"], skip_message_ids=first["skip_message_ids"])
+        assert [m["message_id"] for m in second["messages"]] == ["a"]
+        assert second["next_offsets"] == {0: 4}
+        assert second["skip_message_ids"] == []
+
+    asyncio.run(run())
+
+
+def test_skipped_payload_stays_skipped_until_passed():
+    async def run():
+        cluster = FakeKafkaCluster()
+        cluster.create_topic("big")
+        append_chunk(cluster, "a", 0, 2, b"aa")
+        append_chunk(cluster, "b", 0, 1, b"bb")
+
+        first = await consume(cluster, max_messages=10)
+        assert [m["message_id"] for m in first["messages"]] == ["b"]
+        assert first["stopped_reason"] == "end"
+        assert first["next_offsets"] == {0: 0}
+
+        # a is still incomplete, so b is still ahead of the next offsets
+        second = await consume(cluster, offsets=first["next_offsets"], skip_message_ids=first["skip_message_ids"], max_messages=10)
+        assert second["messages"] == []
+        assert second["skip_message_ids"] == ["b"]
+
+        append_chunk(cluster, "a", 1, 2, b"aa")
+        third = await consume(cluster, offsets=second["next_offsets"], skip_message_ids=second["skip_message_ids"], max_messages=10)
+        assert [m["message_id"] for m in third["messages"]] == ["a"]
+        assert third["skip_message_ids"] == []
+
+    asyncio.run(run())